@@ -0,0 +1,167 @@
+"""
+Answer extraction for Hallucinator
+Finds the multiple-choice letter a model chose in its raw response, using
+compiled pattern sets per model family with a confidence score per match
+"""
+
+import re
+from collections import namedtuple
+
+# Letter chosen ("?" if none found), confidence in [0, 1] and the name of the rule that matched
+Extraction = namedtuple("Extraction", ["letter", "confidence", "rule"])
+
+NO_ANSWER = Extraction("?", 0.0, "none")
+
+
+class AnswerPattern:
+    """
+    One extraction rule
+
+    Args:
+        name: Rule name recorded with each extraction
+        pattern: Regex whose first group captures the letter
+        confidence: Confidence assigned when this rule matches
+        last: Use the last match instead of the first (for conclusions after reasoning)
+    """
+
+    def __init__(self, name, pattern, confidence, last=False):
+        self.name = name
+        self.regex = re.compile(pattern)
+        self.confidence = confidence
+        self.last = last
+
+    def search(self, text):
+        if self.last:
+            match = None
+            for match in self.regex.finditer(text):
+                pass
+        else:
+            match = self.regex.search(text)
+        return match.group(1).upper() if match else None
+
+class AnswerExtractor:
+    """
+    Ordered set of extraction rules; the first rule that matches wins
+
+    Args:
+        patterns: AnswerPattern list, most specific first
+        strip_patterns: Regexes removed from the response before matching (e.g.
+            hidden reasoning blocks)
+    """
+
+    def __init__(self, patterns, strip_patterns=()):
+        self.patterns = list(patterns)
+        self.strip_patterns = list(strip_patterns)
+        self.strip_regexes = [re.compile(p, re.DOTALL | re.IGNORECASE) for p in self.strip_patterns]
+
+    def extract(self, response_text):
+        """
+        Extract the chosen letter from a raw response
+
+        Args:
+            response_text: Raw model response
+
+        Returns:
+            Extraction (NO_ANSWER if nothing matched)
+        """
+        text = response_text or ""
+        for regex in self.strip_regexes:
+            text = regex.sub(" ", text)
+        text = text.strip()
+        for pattern in self.patterns:
+            letter = pattern.search(text)
+            if letter:
+                return Extraction(letter, pattern.confidence, pattern.name)
+        return NO_ANSWER
+
+    def extended(self, patterns=(), strip_patterns=()):
+        """Return a new extractor with extra rules tried before these ones"""
+        return AnswerExtractor(list(patterns) + self.patterns, list(strip_patterns) + self.strip_patterns)
+
+# "Answer is", "Final answer:" and similar labels, up to the chosen letter
+ANSWER_LABEL = r"(?i:\b(?:final\s+)?answer\b)\s*(?:is|:|=|-)?\s*(?:option\s+)?\**\(?"
+
+# Rules shared by every model family, most to least specific. Letters must be
+# upper case so the article "a" never matches; after an answer label a lower
+# case letter counts only when a delimiter follows it ("answer: b)"), and an
+# upper case "A" followed by a word ("answer is A warrantless search") may be
+# the article, so it only gets a low-confidence rule.
+DEFAULT_EXTRACTOR = AnswerExtractor([
+    AnswerPattern("bare_letter", r"^\(?\**([A-Da-d])\**\)?[.):]?$", 1.0),
+    AnswerPattern("answer_label", ANSWER_LABEL + r"((?:[B-D]|A(?!\s+[a-z]))\b|[a-d](?=[).:*]|[ \t]*(?:\n|$)))", 0.95, last=True),
+    AnswerPattern("answer_label_article", ANSWER_LABEL + r"(A)\s+[a-z]", 0.6, last=True),
+    AnswerPattern("boxed", r"\\boxed\{\s*\(?([A-D])\)?\s*\}", 0.95, last=True),
+    AnswerPattern("leading_option", r"^\**\(?([A-D])\)?\**(?:[.):]|\s+-|\s*$)", 0.9),
+    AnswerPattern("bold_letter", r"\*\*\(?([A-D])\)?[.):]?\*\*", 0.8, last=True),
+    AnswerPattern("option_mention", r"(?i:\b(?:option|choice)\s+)\(?([A-D])\b", 0.6, last=True),
+    AnswerPattern("leading_letter", r"^([A-D])\b", 0.5),
+    AnswerPattern("standalone_letter", r"(?<![A-Za-z'])\(?([A-D])\)?(?![A-Za-z'])", 0.3, last=True),
+])
+
+# Per-family extractors, keyed by OpenRouter model ID prefix
+EXTRACTORS = {
+    # Claude tends to conclude with "The answer is (C)" after a short rationale
+    "anthropic/": DEFAULT_EXTRACTOR.extended([
+        AnswerPattern("correct_answer_is", r"(?i:\bcorrect\s+(?:answer|option|choice)\s+is)\s*:?\s*\**\(?((?:[B-D]|A(?!\s+[a-z]))\b)", 0.95, last=True),
+    ]),
+    # Gemini often bolds a labelled answer line ("**Answer: C**")
+    "google/": DEFAULT_EXTRACTOR.extended([
+        AnswerPattern("bold_answer_label", r"\*\*(?i:answer)\s*:?\s*\(?([A-D])\b", 0.95, last=True),
+    ]),
+    # Reasoning models may emit their chain of thought inline; only the conclusion counts
+    "deepseek/": DEFAULT_EXTRACTOR.extended(strip_patterns=[r"<think>.*?</think>"]),
+}
+
+
+def register_extractor(model_prefix, extractor):
+    """Register (or replace) the extractor used for model IDs starting with model_prefix"""
+    EXTRACTORS[model_prefix] = extractor
+
+def get_extractor(model_id):
+    """Return the extractor for a model ID (longest matching prefix, else the default)"""
+    best = ""
+    for prefix in EXTRACTORS:
+        if model_id.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    return EXTRACTORS[best] if best else DEFAULT_EXTRACTOR
+
+def extract_answer(response_text, model_id=""):
+    """
+    Extract the chosen letter from a raw response with the model's extractor
+
+    Args:
+        response_text: Raw model response
+        model_id: OpenRouter model ID
+
+    Returns:
+        Extraction
+    """
+    return get_extractor(model_id).extract(response_text)
+
+# Matches one entry of a batched answer vector ("3:C", "3. C", "3) (C)")
+ANSWER_VECTOR_PATTERN = re.compile(r'(?<!\d)(\d{1,3})\s*[:.)=\-]\s*\(?([A-D])\b')
+
+def parse_answer_vector(response_text, count):
+    """
+    Parse a batched answer vector like "1:C 2:A 3:D"
+
+    Args:
+        response_text: Raw model response
+        count: Number of questions in the batch
+
+    Returns:
+        Dictionary mapping 1-based question number to letter; items that are
+        missing or answered inconsistently are left out
+    """
+    answers = {}
+    conflicting = set()
+    for number, letter in ANSWER_VECTOR_PATTERN.findall(response_text.upper()):
+        number = int(number)
+        if not 1 <= number <= count:
+            continue
+        if answers.get(number, letter) != letter:
+            conflicting.add(number)
+        answers[number] = letter
+    for number in conflicting:
+        del answers[number]
+    return answers
@@ -7,12 +7,33 @@ import streamlit as st
 import json
 import os
 import re
-from datetime import datetime
-from openai import OpenAI
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import time
 import html
+import math
+import random
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import prompts
+import mcq_parser
+import bank_io
+import storage
+import jobs
+import stats
+import query
+import search
+import answer_extraction
+import response_archive
+import rescore
+import transport
+import routing
+import local_models
+import costs
+import verification
+import shuffling
+from storage import QUESTIONS_FILE, RESULTS_FILE, save_question
 
 # Load environment variables - force reload and show status
 load_dotenv(override=True)
@@ -42,6 +63,20 @@ MODELS = {
     "Gemini 2.5 Flash": "google/gemini-2.5-flash"
 }
 
+# Models served by a local OpenAI-compatible server (HALLUCINATOR_LOCAL_URL), e.g.
+# llama.cpp or vLLM, are listed alongside the hosted ones
+LOCAL_DISCOVERY_TTL = 60
+
+@st.cache_data(ttl=LOCAL_DISCOVERY_TTL, show_spinner=False)
+def get_local_models():
+    return local_models.discover_models()
+
+MODELS.update(local_models.model_entries(get_local_models()))
+
+# Model ID prefixes that accept explicit prompt-caching breakpoints (cache_control) via OpenRouter.
+# OpenAI models cache long prompt prefixes automatically, so they need no hint.
+PROMPT_CACHE_PROVIDERS = ("anthropic/", "google/")
+
 # Legal topics
 TOPICS = [
     "Criminal Procedure",
@@ -52,9 +87,45 @@ TOPICS = [
     "Constitutional Criminal Law"
 ]
 
-# File paths
-QUESTIONS_FILE = "questions.json"
-RESULTS_FILE = "eval_results.json"
+# Evaluate-tab difficulty filter: label -> query.QuestionIndex.query arguments
+# (same thresholds as the EASY/MEDIUM/HARD badges)
+DIFFICULTY_FILTERS = {
+    "Any difficulty": {},
+    "Easy (≥70% correct)": {"min_accuracy": 0.7},
+    "Medium (40–70%)": {"min_accuracy": 0.4, "max_accuracy": 0.7},
+    "Hard (<40%)": {"max_accuracy": 0.4},
+    "Not yet evaluated": {"unevaluated": True}
+}
+
+# Reference extraction chunking - large pastes are split on question boundaries
+# and extracted in parallel so they fit the extraction model's context window
+REFERENCE_CHUNK_CHARS = 12000
+REFERENCE_CHUNK_OVERLAP = 1500
+REFERENCE_EXTRACTION_WORKERS = 4
+
+# Seconds between UI refreshes while a background evaluation is running
+EVAL_POLL_INTERVAL = 1.0
+
+# Questions shown in the live evaluation view (the most recently answered)
+EVAL_LIVE_WINDOW = 10
+
+# Batched evaluation - fraction of batched answers re-checked in single-question mode
+BATCH_PARITY_RATE = 0.1
+
+# Extractions below this confidence are reported as low-confidence
+EXTRACTION_LOW_CONFIDENCE = 0.5
+
+# Multi-sample (self-consistency) evaluation temperature
+SAMPLING_TEMPERATURE = 0.7
+
+# Option shuffling: most option orders evaluated per question
+SHUFFLE_MAX_ORDERS = 8
+
+# Speculative generation: a cheap model drafts in parallel and the selected model
+# validates each draft; drafting stops after quantity * SPECULATIVE_MAX_DRAFT_RATIO drafts
+SPECULATIVE_DRAFT_MODEL = "Haiku 4.5"
+SPECULATIVE_CONCURRENCY = 6
+SPECULATIVE_MAX_DRAFT_RATIO = 3
 
 # Custom CSS for dark mode aesthetics
 def load_custom_css():
@@ -675,6 +746,53 @@ def load_custom_css():
             color: #FF6464;
         }
 
+        /* Leaderboard confidence interval bars */
+        .ci-row {
+            display: flex;
+            align-items: center;
+            gap: 1rem;
+            margin: 0.35rem 0;
+            font-size: 0.85rem;
+        }
+
+        .ci-label {
+            width: 11rem;
+            flex-shrink: 0;
+            color: #E0E0E0;
+        }
+
+        .ci-track {
+            position: relative;
+            flex-grow: 1;
+            height: 14px;
+            background: rgba(255, 255, 255, 0.04);
+            border-radius: 7px;
+        }
+
+        .ci-bar {
+            position: absolute;
+            top: 3px;
+            height: 8px;
+            border-radius: 4px;
+            background: rgba(0, 217, 255, 0.35);
+        }
+
+        .ci-point {
+            position: absolute;
+            top: 0;
+            width: 3px;
+            height: 14px;
+            margin-left: -1px;
+            background: #00D9FF;
+        }
+
+        .ci-tier {
+            width: 4rem;
+            flex-shrink: 0;
+            text-align: right;
+            color: #9CA3AF;
+        }
+
         /* Clear results button */
         .clear-results-button>button {
             background: rgba(255, 100, 100, 0.1) !important;
@@ -693,82 +811,236 @@ def load_custom_css():
         </style>
     """, unsafe_allow_html=True)
 
-# Initialize OpenRouter client
+# Initialize the model router (OpenRouter plus any direct or self-hosted providers,
+# sharing one pooled HTTP transport across every session and worker thread)
 @st.cache_resource
-def get_openrouter_client():
+def get_model_router():
+    # OpenRouter is optional when another provider is configured (e.g. only a local server offline)
     api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        st.error("⚠️ OPENROUTER_API_KEY not found in .env file")
-        st.stop()
-
-    # Debug: Show first/last 4 chars of API key (safe to display)
-    masked_key = f"{api_key[:7]}...{api_key[-4:]}" if len(api_key) > 11 else "***"
-    print(f"[DEBUG] Using API key: {masked_key}")
-
-    # Create client with explicit Authorization header
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-        default_headers={
-            "Authorization": f"Bearer {api_key}",
+    openrouter_headers = None
+    if api_key:
+        # Debug: Show first/last 4 chars of API key (safe to display)
+        masked_key = f"{api_key[:7]}...{api_key[-4:]}" if len(api_key) > 11 else "***"
+        print(f"[DEBUG] Using API key: {masked_key}")
+
+        # App attribution headers; the client sends the API key itself
+        openrouter_headers = {
             "HTTP-Referer": "http://localhost:8501",
             "X-Title": "Hallucinator - Legal Benchmark Generator",
         }
-    )
 
-    print(f"[DEBUG] Client created with base_url: {client.base_url}")
-    print(f"[DEBUG] Default headers: {list(client.default_headers.keys())}")
+    router = routing.create_router(openrouter_headers=openrouter_headers)
+    if not router.providers:
+        st.error(f"⚠️ No model provider configured - set OPENROUTER_API_KEY (or {local_models.LOCAL_URL_ENV} for a local server) in the .env file")
+        st.stop()
 
-    return client
+    print(f"[DEBUG] Router created with providers: {list(router.providers.keys())}")
 
-# Data management functions
-def load_questions():
-    """Load questions from JSON file"""
-    if os.path.exists(QUESTIONS_FILE):
-        with open(QUESTIONS_FILE, 'r') as f:
-            return json.load(f)
-    return []
+    return router
 
-def save_question(question_data):
-    """Save a new question to JSON file"""
-    questions = load_questions()
+def get_openrouter_client():
+    """Shared client for chat completions (a routing.ModelRouter)"""
+    return get_model_router()
 
-    # Generate new ID
-    new_id = max([q.get('id', 0) for q in questions], default=0) + 1
-    question_data['id'] = new_id
-    question_data['created_at'] = datetime.now().isoformat()
+# Compact question bank and results, shared across sessions and rebuilt only when the files change
+@st.cache_resource(max_entries=1)
+def get_question_bank(version):
+    """Load the question bank for a given file version (see storage.file_version)"""
+    return storage.load_question_bank()
 
-    questions.append(question_data)
+@st.cache_resource
+def get_question_index():
+    """Shared question query index, synced incrementally as the bank grows (see query.QuestionIndex.sync)"""
+    return query.QuestionIndex()
+
+@st.cache_resource(max_entries=1)
+def get_result_table(version):
+    """Load the evaluation results for a given file version (see storage.file_version)"""
+    return storage.load_result_table()
+
+@st.cache_resource(max_entries=1)
+def get_difficulty_index(version):
+    """Load the per-question difficulty index for a given file version (see storage.file_version)"""
+    return storage.load_difficulty_index()
+
+@st.cache_resource(max_entries=1)
+def get_result_matrix(version):
+    """Question x model answer matrix for a given results file version (see storage.file_version)"""
+    return storage.load_result_matrix()
+
+@st.cache_resource(max_entries=1)
+def get_leaderboard(version):
+    """Leaderboard intervals and significance tests for a given results file version"""
+    return compute_leaderboard(get_result_matrix(version))
+
+@st.cache_resource(max_entries=1)
+def get_prompt_token_estimates(version):
+    """Estimated evaluation-prompt tokens per question id for a given questions file version"""
+    return {
+        q['id']: costs.estimate_tokens(prompts.get_evaluation_prompt(q['question'], q['options']))
+        for q in storage.iter_questions()
+    }
+
+@st.cache_resource(max_entries=1)
+def get_completion_averages(version):
+    """Mean completion tokens per model ID from the results file, for cost estimates"""
+    return costs.completion_averages(get_result_table(version), MODELS)
+
+@st.cache_resource(max_entries=1)
+def get_verdicts(version):
+    """Cached answer-key verdicts for a given verdicts file version (see storage.file_version)"""
+    return verification.load_verdicts()
+
+@st.cache_resource
+def get_verification_jobs():
+    """Answer-key verification jobs of this server process, by id"""
+    return {}
+
+@st.cache_resource
+def get_job_runner():
+    """Shared background job runner (one per server process)"""
+    return jobs.JobRunner()
 
-    with open(QUESTIONS_FILE, 'w') as f:
-        json.dump(questions, f, indent=2)
+# Reference extraction functions
+def split_reference_text(reference_text, max_chars=REFERENCE_CHUNK_CHARS, overlap=REFERENCE_CHUNK_OVERLAP):
+    """
+    Split reference text into chunks on question boundaries
 
-    return new_id
+    Consecutive questions are packed into chunks of at most max_chars. Each chunk
+    after the first repeats up to overlap characters of trailing questions from the
+    previous chunk, so a question cut at a boundary is seen whole at least once.
 
-def load_results():
-    """Load evaluation results from JSON file"""
-    if os.path.exists(RESULTS_FILE):
-        with open(RESULTS_FILE, 'r') as f:
-            return json.load(f)
-    return []
+    Args:
+        reference_text: Unstructured text containing MCQ questions
+        max_chars: Maximum characters per chunk
+        overlap: Maximum characters carried over from the previous chunk
 
-def save_results(results):
-    """Save evaluation results to JSON file"""
-    with open(RESULTS_FILE, 'w') as f:
-        json.dump(results, f, indent=2)
+    Returns:
+        List of text chunks
+    """
+    if len(reference_text) <= max_chars:
+        return [reference_text]
+
+    # Split into question blocks
+    starts = [m.start() for m in mcq_parser.QUESTION_BOUNDARY_PATTERN.finditer(reference_text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    blocks = [reference_text[start:end] for start, end in zip(starts, starts[1:] + [len(reference_text)])]
+
+    # Hard-split any block that is too large on its own (unnumbered text)
+    sized_blocks = []
+    for block in blocks:
+        while len(block) > max_chars:
+            cut = block.rfind("\n", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            sized_blocks.append(block[:cut])
+            block = block[cut:]
+        if block:
+            sized_blocks.append(block)
+
+    chunks = []
+    current = []
+    current_len = 0
+    for block in sized_blocks:
+        if current and current_len + len(block) > max_chars:
+            chunks.append("".join(current))
+
+            # Carry trailing blocks over as overlap
+            carried = []
+            carried_len = 0
+            for prev in reversed(current):
+                if carried_len + len(prev) > overlap or carried_len + len(prev) + len(block) > max_chars:
+                    break
+                carried.insert(0, prev)
+                carried_len += len(prev)
+            current = carried
+            current_len = carried_len
+
+        current.append(block)
+        current_len += len(block)
+
+    if current:
+        chunks.append("".join(current))
+
+    return chunks
+
+def _normalize_question_key(question_text, options=()):
+    """
+    Normalize a question for deduplication across overlapping chunks
 
-# Reference extraction function
-def extract_reference_questions(client, reference_text):
+    The key covers the full stem and the option texts (without their labels), so
+    questions sharing a generic stem or a long fact pattern stay distinct. The
+    answer key is left out: the same question extracted with and without its
+    answer must still match, so the answered copy can be kept.
     """
-    Extract MCQ questions from unstructured text using Claude Haiku 4.5
+    text = re.sub(r'^\s*(?:(?:question|q)\s*\d+\b|\d+[.)])', '', question_text.lower())
+    stem = re.sub(r'[^a-z0-9]+', ' ', text).strip()
+    if not stem:
+        return ""
+    option_texts = [
+        re.sub(r'[^a-z0-9]+', ' ', re.sub(r'^\s*\(?[a-d][.):]\s*', '', str(option).lower())).strip()
+        for option in options or ()
+    ]
+    return "\n".join([stem] + option_texts)
+
+def merge_reference_extractions(extractions):
+    """
+    Merge per-chunk extraction results into a single reference
 
     Args:
-        client: OpenRouter client
-        reference_text: Unstructured text containing MCQ questions
+        extractions: List of extraction dictionaries (one per chunk)
 
     Returns:
-        Dictionary with extracted questions or error
+        Dictionary with deduplicated questions, recomputed count and aggregated notes
     """
+    questions = []
+    seen = {}
+    style_notes = []
+    difficulty_notes = []
+    errors = []
+    failed_chunks = 0
+
+    for extracted in extractions:
+        if extracted.get('failed'):
+            failed_chunks += 1
+        if extracted.get('error') and not extracted.get('questions'):
+            errors.append(extracted['error'])
+            continue
+
+        for q in extracted.get('questions', []):
+            key = _normalize_question_key(q.get('question', ''), q.get('options'))
+            if not key:
+                continue
+            if key in seen:
+                # Prefer the copy that carries an answer
+                existing = seen[key]
+                if not existing.get('has_answer', False) and q.get('has_answer', False):
+                    existing.update(q)
+                continue
+            seen[key] = q
+            questions.append(q)
+
+        for notes, field in ((style_notes, 'style_notes'), (difficulty_notes, 'difficulty_notes')):
+            note = (extracted.get(field) or '').strip()
+            if note and note not in notes:
+                notes.append(note)
+
+    if not questions:
+        error = errors[0] if errors else "No multiple-choice questions detected in the provided text."
+        return {"count": 0, "questions": [], "error": error}
+
+    return {
+        "count": len(questions),
+        "questions": questions,
+        "style_notes": "\n".join(style_notes),
+        "difficulty_notes": "\n".join(difficulty_notes),
+        "failed_chunks": failed_chunks,
+        "error": None
+    }
+
+def _extract_reference_chunk(client, reference_text):
+    """Extract MCQ questions from a single chunk of text using Claude Haiku 4.5"""
     try:
         prompt = prompts.get_reference_extraction_prompt(reference_text)
 
@@ -779,7 +1051,8 @@ def extract_reference_questions(client, reference_text):
                 {"role": "system", "content": "You are an expert at analyzing and extracting multiple-choice questions from text."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3
+            temperature=0.3,
+            **transport.call_options("extraction")
         )
 
         response_text = response.choices[0].message.content.strip()
@@ -796,10 +1069,117 @@ def extract_reference_questions(client, reference_text):
 
     except json.JSONDecodeError as e:
         print(f"[DEBUG] JSON parsing failed: {str(e)}")
-        return {"count": 0, "questions": [], "error": f"Failed to parse extraction results: {str(e)}"}
+        return {"count": 0, "questions": [], "error": f"Failed to parse extraction results: {str(e)}", "failed": True}
     except Exception as e:
         print(f"[DEBUG] Extraction error: {str(e)}")
-        return {"count": 0, "questions": [], "error": f"Extraction failed: {str(e)}"}
+        return {"count": 0, "questions": [], "error": f"Extraction failed: {str(e)}", "failed": True}
+
+def extract_reference_questions(client, reference_text, progress_callback=None):
+    """
+    Extract MCQ questions from unstructured text
+
+    Well-formatted questions are parsed locally; only the parts the local parser
+    could not handle are sent to the LLM extraction path.
+
+    Args:
+        client: OpenRouter client
+        reference_text: Unstructured text containing MCQ questions
+        progress_callback: Optional callable(completed_chunks, total_chunks)
+
+    Returns:
+        Dictionary with extracted questions or error
+    """
+    parsed_questions, unparsed_text = mcq_parser.parse_mcq_text(reference_text)
+
+    if not parsed_questions:
+        return _extract_reference_questions_llm(client, reference_text, progress_callback)
+
+    print(f"[DEBUG] Parsed {len(parsed_questions)} questions locally, {len(unparsed_text)} chars left for LLM")
+    local_data = mcq_parser.build_reference_data(parsed_questions)
+    if not unparsed_text.strip():
+        if progress_callback:
+            progress_callback(1, 1)
+        return local_data
+
+    llm_data = _extract_reference_questions_llm(client, unparsed_text, progress_callback)
+    merged_data = merge_reference_extractions([local_data, llm_data])
+    if llm_data.get('error') and not llm_data.get('failed'):
+        # The LLM found nothing extra in the leftovers - not a failure
+        merged_data['failed_chunks'] = 0
+    return merged_data
+
+def _extract_reference_questions_llm(client, reference_text, progress_callback=None):
+    """
+    Extract MCQ questions from unstructured text using Claude Haiku 4.5
+
+    Large inputs are split on question boundaries and the chunks are extracted in
+    parallel, then merged and deduplicated.
+
+    Args:
+        client: OpenRouter client
+        reference_text: Unstructured text containing MCQ questions
+        progress_callback: Optional callable(completed_chunks, total_chunks)
+
+    Returns:
+        Dictionary with extracted questions or error
+    """
+    chunks = split_reference_text(reference_text)
+    if len(chunks) == 1:
+        extracted_data = _extract_reference_chunk(client, chunks[0])
+        if progress_callback:
+            progress_callback(1, 1)
+        return extracted_data
+
+    print(f"[DEBUG] Reference text split into {len(chunks)} chunks")
+    extractions = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=REFERENCE_EXTRACTION_WORKERS) as executor:
+        futures = {executor.submit(_extract_reference_chunk, client, chunk): idx for idx, chunk in enumerate(chunks)}
+        for completed, future in enumerate(as_completed(futures), 1):
+            extractions[futures[future]] = future.result()
+            if progress_callback:
+                progress_callback(completed, len(chunks))
+
+    # Merge in document order so question numbering follows the source text
+    extracted_data = merge_reference_extractions(extractions)
+    print(f"[DEBUG] Merged {extracted_data['count']} unique questions from {len(chunks)} chunks")
+    return extracted_data
+
+def build_generation_messages(topic, model, reference_data=None):
+    """
+    Build the chat messages for question generation
+
+    The stable prompt prefix (reference questions and requirements) is sent as its
+    own content block, marked with a cache_control hint for providers that support
+    explicit prompt caching, so repeated generation calls only pay for the suffix.
+
+    Args:
+        topic: Legal topic for the question
+        model: Model name to use
+        reference_data: Optional reference questions data to match style/difficulty
+
+    Returns:
+        List of chat messages
+    """
+    prefix = prompts.get_question_generation_prefix(reference_data)
+    suffix = prompts.get_question_generation_suffix(topic)
+
+    if reference_data and MODELS[model].startswith(PROMPT_CACHE_PROVIDERS):
+        user_content = [
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": suffix}
+        ]
+    else:
+        user_content = prefix + "\n\n" + suffix
+
+    return [
+        {"role": "system", "content": "You are an expert in criminal law and legal education. Generate high-quality legal exam questions."},
+        {"role": "user", "content": user_content}
+    ]
+
+def get_cached_token_count(usage):
+    """Return the number of prompt tokens served from the provider's prompt cache"""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return (getattr(details, 'cached_tokens', 0) or 0) if details else 0
 
 # Question generation function with streaming
 def generate_question_stream(client, topic, model, reference_data=None):
@@ -813,36 +1193,38 @@ def generate_question_stream(client, topic, model, reference_data=None):
         reference_data: Optional reference questions data to match style/difficulty
 
     Returns:
-        Generator yielding chunks of text or parsed data
+        Generator yielding chunks of text, token usage or parsed data
     """
 
-    # Get prompt from prompts module (with or without reference)
-    prompt = prompts.get_question_generation_prompt(topic, reference_data)
+    # Get messages from prompts module (with or without reference)
+    messages = build_generation_messages(topic, model, reference_data)
 
     try:
         print(f"[DEBUG] Attempting API call with model: {MODELS[model]}")
         response = client.chat.completions.create(
             model=MODELS[model],
-            messages=[
-                {"role": "system", "content": "You are an expert in criminal law and legal education. Generate high-quality legal exam questions."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=messages,
             stream=True,
-            temperature=0.8
+            stream_options={"include_usage": True},
+            temperature=0.8,
+            **transport.call_options("generation")
         )
 
         full_response = ""
         for chunk in response:
-            if chunk.choices[0].delta.content:
+            if getattr(chunk, 'usage', None):
+                yield {"usage": {
+                    "prompt_tokens": chunk.usage.prompt_tokens or 0,
+                    "cached_tokens": get_cached_token_count(chunk.usage)
+                }}
+            if chunk.choices and chunk.choices[0].delta.content:
                 content = chunk.choices[0].delta.content
                 full_response += content
                 yield content
 
         # Parse the final JSON
         try:
-            # Strip markdown code fences if present
-            json_text = re.sub(r'^```json\s*', '', full_response.strip())
-            json_text = re.sub(r'\s*```$', '', json_text)
+            json_text = strip_code_fences(full_response)
 
             print(f"[DEBUG] Attempting to parse JSON (length: {len(json_text)} chars)")
             question_data = json.loads(json_text)
@@ -861,8 +1243,220 @@ def generate_question_stream(client, topic, model, reference_data=None):
             print(f"[DEBUG] Response: {e.response}")
         yield {"error": error_msg}
 
+def strip_code_fences(text):
+    """Remove markdown code fences around a JSON response"""
+    json_text = re.sub(r'^```json\s*', '', text.strip())
+    return re.sub(r'\s*```$', '', json_text)
+
+# Speculative generation functions
+class SpeculativeCallError(ValueError):
+    """A draft or validation that returned nothing usable; usage holds the token/cost fields already spent"""
+
+    def __init__(self, message, usage):
+        super().__init__(message)
+        self.usage = usage
+
+def draft_question(client, topic, model, reference_data=None):
+    """
+    Draft one question without streaming (speculative generation)
+
+    Args:
+        client: OpenRouter client
+        topic: Legal topic for the question
+        model: Draft model name
+        reference_data: Optional reference questions data to match style/difficulty
+
+    Returns:
+        Tuple of (question dictionary, token/cost fields)
+
+    Raises:
+        SpeculativeCallError: If the draft is not a well-formed question
+    """
+    response = client.chat.completions.create(
+        model=MODELS[model],
+        messages=build_generation_messages(topic, model, reference_data),
+        temperature=0.8,
+        **transport.call_options("generation")
+    )
+    usage = costs.usage_fields(MODELS[model], getattr(response, 'usage', None))
+    try:
+        question_data = json.loads(strip_code_fences(response.choices[0].message.content or ""))
+    except json.JSONDecodeError as e:
+        raise SpeculativeCallError(f"Failed to parse JSON: {str(e)}", usage)
+    if not isinstance(question_data, dict):
+        raise SpeculativeCallError("Draft is not a JSON object", usage)
+    try:
+        question_data.update(bank_io.validate_question(question_data))
+    except ValueError as e:
+        raise SpeculativeCallError(str(e), usage)
+    question_data['topic'] = topic
+    question_data['generated_by'] = model
+    return question_data, usage
+
+def validate_answer_key(client, question_data, model):
+    """
+    Have a strong model check a drafted question's answer key
+
+    The validator first answers the question blind, with the evaluation prompt
+    and no key or reasoning, so its answer is not anchored to the draft. Only if
+    it agrees with the key does a second call judge the key and the
+    distractors; the draft passes if both checks pass.
+
+    Args:
+        client: OpenRouter client
+        question_data: Drafted question dictionary
+        model: Validator model name
+
+    Returns:
+        Dictionary with valid, validator_answer, issues and token/cost fields
+
+    Raises:
+        SpeculativeCallError: If the blind answer or the verdict cannot be parsed
+    """
+    response = client.chat.completions.create(
+        model=MODELS[model],
+        messages=[{"role": "user", "content": prompts.get_evaluation_prompt(question_data['question'], question_data['options'])}],
+        temperature=0,
+        **transport.call_options("generation")
+    )
+    validator_answer = answer_extraction.extract_answer(response.choices[0].message.content or "", MODELS[model]).letter
+    usage = costs.usage_fields(MODELS[model], getattr(response, 'usage', None))
+    if validator_answer not in shuffling.LETTERS:
+        raise SpeculativeCallError("No answer letter in the validator's blind answer", usage)
+    if validator_answer != question_data['correct_answer']:
+        result = {
+            "valid": False,
+            "validator_answer": validator_answer,
+            "issues": [f"Validator answered {validator_answer}, key is {question_data['correct_answer']}"]
+        }
+        result.update(usage)
+        return result
+
+    response = client.chat.completions.create(
+        model=MODELS[model],
+        messages=[{"role": "user", "content": prompts.get_validation_prompt(question_data)}],
+        temperature=0,
+        **transport.call_options("generation")
+    )
+    costs.add_costs(usage, costs.usage_fields(MODELS[model], getattr(response, 'usage', None)))
+    try:
+        verdict = json.loads(strip_code_fences(response.choices[0].message.content or ""))
+    except json.JSONDecodeError as e:
+        raise SpeculativeCallError(f"Failed to parse verdict JSON: {str(e)}", usage)
+    if not isinstance(verdict, dict):
+        raise SpeculativeCallError("Verdict is not a JSON object", usage)
+    valid = verdict.get('key_correct') is True and verdict.get('distractors_wrong') is True
+    result = {"valid": valid, "validator_answer": validator_answer, "issues": verdict.get('issues') or []}
+    result.update(usage)
+    return result
+
+def speculative_generate(client, topic, draft_model, validator_model, quantity, reference_data=None, progress_callback=None):
+    """
+    Generate questions by drafting with a cheap model and validating with a strong one
+
+    Drafts run in parallel and each is validated as soon as it arrives, so
+    drafting and validation overlap. Enough drafts are kept in flight to cover
+    the questions still needed at the acceptance rate observed so far.
+
+    Args:
+        client: OpenRouter client
+        topic: Legal topic for the questions
+        draft_model: Cheap model name that drafts questions
+        validator_model: Strong model name that checks answer keys
+        quantity: Number of validated questions wanted
+        reference_data: Optional reference questions data to match style/difficulty
+        progress_callback: Optional callable(validated, quantity, stats), called
+            from the calling thread after each draft or validation finishes
+
+    Returns:
+        Tuple of (validated question list, stats dictionary with drafted,
+        validated, rejected, failed, cost, elapsed and rejections)
+    """
+    run_stats = {"drafted": 0, "validated": 0, "rejected": 0, "failed": 0, "cost": 0.0, "elapsed": 0.0, "rejections": []}
+    max_drafts = quantity * SPECULATIVE_MAX_DRAFT_RATIO
+    validated = []
+    submitted = 0
+    start = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=SPECULATIVE_CONCURRENCY) as executor:
+        tasks = {}  # future -> drafted question (None for a draft in progress)
+
+        def top_up():
+            nonlocal submitted
+            finished = run_stats['validated'] + run_stats['rejected'] + run_stats['failed']
+            acceptance = run_stats['validated'] / finished if finished else 1.0
+            in_flight_target = math.ceil((quantity - len(validated)) / max(acceptance, 1 / SPECULATIVE_MAX_DRAFT_RATIO))
+            while submitted < max_drafts and len(tasks) < in_flight_target:
+                tasks[executor.submit(draft_question, client, topic, draft_model, reference_data)] = None
+                submitted += 1
+
+        top_up()
+        while tasks:
+            done, _ = wait(tasks, return_when=FIRST_COMPLETED)
+            for future in done:
+                draft = tasks.pop(future)
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    print(f"[DEBUG] Speculative {'validation' if draft else 'draft'} failed: {str(e)}")
+                    if isinstance(e, SpeculativeCallError):
+                        run_stats['cost'] += e.usage.get('cost') or 0
+                    run_stats['failed'] += 1
+                    continue
+
+                if draft is None:
+                    question_data, usage = outcome
+                    run_stats['drafted'] += 1
+                    run_stats['cost'] += usage.get('cost') or 0
+                    # Once enough questions are validated, late drafts are not worth a paid validation
+                    if len(validated) < quantity:
+                        tasks[executor.submit(validate_answer_key, client, question_data, validator_model)] = question_data
+                    continue
+
+                run_stats['cost'] += outcome.get('cost') or 0
+                if outcome['valid'] and len(validated) < quantity:
+                    draft['validated_by'] = validator_model
+                    validated.append(draft)
+                    run_stats['validated'] += 1
+                elif not outcome['valid']:
+                    run_stats['rejected'] += 1
+                    run_stats['rejections'].append({"question": draft['question'], "issues": outcome['issues']})
+
+            if len(validated) < quantity:
+                top_up()
+            else:
+                # Enough validated: drop drafts that have not started yet
+                for future in [f for f in tasks if f.cancel()]:
+                    del tasks[future]
+            if progress_callback:
+                progress_callback(len(validated), quantity, run_stats)
+
+    run_stats['elapsed'] = time.monotonic() - start
+    print(f"[DEBUG] Speculative generation: {run_stats['validated']} validated of {run_stats['drafted']} drafts "
+          f"({run_stats['rejected']} rejected, {run_stats['failed']} failed) in {run_stats['elapsed']:.1f}s, ${run_stats['cost']:.4f}")
+    return validated, run_stats
+
+def save_and_index_question(question_data):
+    """
+    Save an approved question and add it to the full-text search index
+
+    Indexing is best effort: the question is already stored when it runs, so an
+    index error (e.g. SQLite built without FTS5) is logged and the next search
+    resyncs the index.
+
+    Returns:
+        The new question ID
+    """
+    previous_version = storage.file_version(QUESTIONS_FILE)
+    question_id = save_question(question_data)
+    try:
+        search.index_question(question_data, previous_version)
+    except Exception as e:
+        print(f"[DEBUG] Could not index question {question_id} for search: {str(e)}")
+    return question_id
+
 # Evaluation function
-def evaluate_question(client, question_data, model_name):
+def evaluate_question(client, question_data, model_name, temperature=0):
     """Evaluate a single question with a specific model"""
 
     prompt = prompts.get_evaluation_prompt(
@@ -874,38 +1468,410 @@ def evaluate_question(client, question_data, model_name):
         response = client.chat.completions.create(
             model=MODELS[model_name],
             messages=[{"role": "user", "content": prompt}],
-            temperature=0
+            temperature=temperature,
+            **transport.call_options("eval")
         )
 
-        answer = response.choices[0].message.content.strip().upper()
+        raw_response = response.choices[0].message.content or ""
+        result = score_response(question_data, model_name, prompt, raw_response)
+        result.update(costs.usage_fields(MODELS[model_name], getattr(response, 'usage', None)))
+        return result
 
-        # Extract just the letter
-        for char in answer:
-            if char in ['A', 'B', 'C', 'D']:
-                selected = char
-                break
-        else:
-            selected = answer[0] if answer else "?"
+    except Exception as e:
+        return error_result(question_data, model_name, e)
+
+def score_response(question_data, model_name, prompt, raw_response):
+    """Build the result for a model's raw response to a single-question prompt"""
+    # Extract the letter with the model family's patterns
+    extraction = answer_extraction.extract_answer(raw_response, MODELS[model_name])
+    is_correct = extraction.letter == question_data['correct_answer']
+
+    result = {
+        "question_id": question_data['id'],
+        "model": model_name,
+        "selected": extraction.letter,
+        "correct": is_correct,
+        "timestamp": datetime.now().isoformat(),
+        "confidence": extraction.confidence,
+        "extraction_rule": extraction.rule
+    }
+    result.update(archive_response(MODELS[model_name], prompt, raw_response))
+    return result
+
+def error_result(question_data, model_name, error):
+    """Result recorded when a model call fails"""
+    return {
+        "question_id": question_data['id'],
+        "model": model_name,
+        "selected": "ERROR",
+        "correct": False,
+        "timestamp": datetime.now().isoformat(),
+        "error": str(error)
+    }
+
+def evaluate_local_batch(questions, model_name):
+    """
+    Evaluate a batch of questions with a local model
 
-        is_correct = selected == question_data['correct_answer']
+    Each question gets the same prompt as evaluate_question; the whole batch is
+    submitted to the local server at once.
 
-        return {
-            "question_id": question_data['id'],
-            "model": model_name,
-            "selected": selected,
-            "correct": is_correct,
-            "timestamp": datetime.now().isoformat()
-        }
+    Args:
+        questions: List of question dictionaries
+        model_name: Display name of a local model
+
+    Returns:
+        List of result dictionaries, one per question
+    """
+    batch_prompts = [prompts.get_evaluation_prompt(q['question'], q['options']) for q in questions]
+    responses = local_models.get_backend().complete_batch(MODELS[model_name], batch_prompts)
+    results = []
+    for question_data, prompt, response in zip(questions, batch_prompts, responses):
+        if isinstance(response, Exception):
+            results.append(error_result(question_data, model_name, response))
+            continue
+        raw_response, usage = response
+        result = score_response(question_data, model_name, prompt, raw_response)
+        result.update(costs.usage_fields(MODELS[model_name], usage))
+        results.append(result)
+    return results
+
+def evaluate_permutation(client, question_data, model_name, order_index, order_count):
+    """
+    Evaluate a question with its options in one of several orders
+
+    A prompt the archive already holds exactly one response to (the original
+    order from an earlier evaluation, or an order from an earlier shuffled run)
+    is scored from that response without an API call; prompts with several
+    archived responses were sampled, so they are asked again.
+
+    Args:
+        client: OpenRouter client
+        question_data: Question dictionary
+        model_name: Model display name
+        order_index: Index of the order in shuffling.option_permutations
+        order_count: Orders evaluated per question
+
+    Returns:
+        Result dictionary scored in the original labels, with the order's
+        'permutation' code, the letter 'shown' and the key position 'shown_key'
+    """
+    permutation = shuffling.option_permutations(question_data['id'], order_count)[order_index]
+    code = shuffling.permutation_code(permutation)
+    try:
+        permuted = shuffling.permute_question(question_data, permutation)
+    except Exception as e:
+        print(f"[DEBUG] Could not reorder the options of question {question_data['id']}: {str(e)}")
+        result = error_result(question_data, model_name, e)
+        result.update({"permutation": code, "shown": "ERROR", "shown_key": "?", "shuffle_index": order_index})
+        return result
+    prompt = prompts.get_evaluation_prompt(permuted['question'], permuted['options'])
+
+    try:
+        archived = response_archive.get_archive().find(MODELS[model_name], prompt)
+    except Exception as e:
+        print(f"[DEBUG] Could not read the response archive: {str(e)}")
+        archived = []
+    if len(archived) == 1:
+        result = score_response(permuted, model_name, prompt, archived[0])
+        result['cached'] = True
+    else:
+        result = evaluate_question(client, permuted, model_name)
+
+    shown = result['selected']
+    if shown != "ERROR":
+        result['selected'] = shuffling.to_original(shown, code)
+        result['correct'] = result['selected'] == question_data['correct_answer']
+    result.update({"permutation": code, "shown": shown, "shown_key": permuted['correct_answer'], "shuffle_index": order_index})
+    return result
+
+def archive_response(model_id, prompt, raw_response):
+    """
+    Store a raw response in the response archive for offline re-scoring
+
+    Returns:
+        Fields to add to the result: the archive key, or the raw response inline
+        if the archive could not be written (so a paid response is never lost)
+    """
+    try:
+        key, _ = response_archive.get_archive().store(model_id, prompt, raw_response)
+        return {"response_key": key}
+    except Exception as e:
+        print(f"[DEBUG] Could not archive response: {str(e)}")
+        return {"raw_response": raw_response}
+
+def combine_samples(sample_results):
+    """
+    Combine several sampled answers for one (question, model) pair
+
+    The majority answer becomes 'selected'. The per-sample answers are stored as a
+    compact string (one character per sample, '!' for API errors), along with the
+    majority agreement and the answer entropy in bits.
+
+    Args:
+        sample_results: List of result dictionaries for the same question and model
+
+    Returns:
+        Single result dictionary
+    """
+    answers = "".join("!" if r['selected'] == "ERROR" else (r['selected'] or "?")[0] for r in sample_results)
+    counts = {}
+    for answer in answers:
+        counts[answer] = counts.get(answer, 0) + 1
+
+    # Majority vote; ties go to the answer sampled first, errors never win over a real answer
+    ranked = sorted(counts, key=lambda a: (a == "!", -counts[a], answers.index(a)))
+    majority = ranked[0]
+    majority_result = next(r for r, answer in zip(sample_results, answers) if answer == majority)
+
+    n = len(answers)
+    entropy = max(0.0, -sum((c / n) * math.log2(c / n) for c in counts.values()))
+
+    combined = dict(majority_result)
+    costs.add_costs(combined, *(r for r in sample_results if r is not majority_result))
+    combined.update({
+        "timestamp": max(r['timestamp'] for r in sample_results),
+        "samples": answers,
+        "agreement": round(counts[majority] / n, 3),
+        "entropy": round(entropy, 3)
+    })
+    return combined
+
+def compute_extraction_quality(results):
+    """
+    Summarize answer-extraction confidence per model
+
+    Args:
+        results: Iterable of result dictionaries
+
+    Returns:
+        List of per-model rows (empty if no results carry an extraction confidence)
+    """
+    quality = {}
+    for result in results:
+        confidence = result.get('confidence')
+        if confidence is None:
+            continue
+        row = quality.setdefault(result['model'], {'n': 0, 'confidence': 0.0, 'low': 0, 'unparsed': 0})
+        row['n'] += 1
+        row['confidence'] += confidence
+        row['low'] += 0 < confidence < EXTRACTION_LOW_CONFIDENCE
+        row['unparsed'] += result['selected'] == "?"
+
+    return [
+        {
+            "Model": model,
+            "Answers": row['n'],
+            "Mean Confidence": f"{row['confidence'] / row['n']:.2f}",
+            "Low Confidence": row['low'],
+            "Unparsed": row['unparsed']
+        }
+        for model, row in quality.items()
+    ]
+
+def compute_answer_stability(results):
+    """
+    Summarize multi-sample answer stability per model
+
+    Args:
+        results: Iterable of result dictionaries
+
+    Returns:
+        List of per-model stability rows (empty if no multi-sample results exist)
+    """
+    stats = {}
+    for result in results:
+        if not result.get('samples'):
+            continue
+        row = stats.setdefault(result['model'], {'n': 0, 'agreement': 0.0, 'entropy': 0.0, 'unstable': 0})
+        row['n'] += 1
+        row['agreement'] += result['agreement']
+        row['entropy'] += result['entropy']
+        row['unstable'] += result['agreement'] < 1
+
+    return [
+        {
+            "Model": model,
+            "Questions": row['n'],
+            "Mean Agreement": f"{row['agreement'] / row['n'] * 100:.1f}%",
+            "Mean Entropy (bits)": f"{row['entropy'] / row['n']:.2f}",
+            "Unstable": row['unstable']
+        }
+        for model, row in stats.items()
+    ]
+
+def compute_position_bias(results):
+    """
+    Summarize answer-position bias per model from option-shuffled results
+
+    Args:
+        results: Iterable of result dictionaries
+
+    Returns:
+        List of per-model rows (empty if no shuffled results exist)
+    """
+    matrix = shuffling.shuffle_matrix(results)
+    if matrix is None:
+        return []
+    bias = stats.position_bias(matrix.key_positions, matrix.choices)
+
+    rows = []
+    for j, model in enumerate(matrix.models):
+        if not bias['answered'][j]:
+            continue
+        row = {"Model": model, "Answers": int(bias['answered'][j])}
+        for p, letter in enumerate(shuffling.LETTERS):
+            accuracy = bias['accuracy_by_key'][j, p]
+            row[f"Picks {letter}"] = f"{bias['choice_share'][j, p] * 100:.0f}% (key {bias['key_share'][j, p] * 100:.0f}%)"
+            row[f"Acc. key at {letter}"] = f"{accuracy * 100:.0f}%" if not np.isnan(accuracy) else "-"
+        row.update({
+            "χ² p-value": f"{bias['p_value'][j]:.3f}",
+            "Right in all orders": f"{bias['all_correct'][j] * 100:.1f}%",
+            "Order-dependent": f"{bias['flipped'][j] * 100:.1f}%"
+        })
+        rows.append(row)
+    return rows
+
+def evaluate_question_batch(client, questions, model_name, parity_rate=0.0):
+    """
+    Evaluate several questions with a specific model in a single request
+
+    Items the model's answer vector does not cover are re-asked one at a time.
+    A random parity_rate fraction of batched answers is also evaluated in
+    single-question mode and recorded as 'single_selected' for parity reporting.
+
+    Args:
+        client: OpenRouter client
+        questions: List of question dictionaries
+        model_name: Model display name
+        parity_rate: Fraction of batched items to re-check in single-question mode
+
+    Returns:
+        List of result dictionaries, one per question
+    """
+    prompt = prompts.get_batch_evaluation_prompt(questions)
 
+    try:
+        response = client.chat.completions.create(
+            model=MODELS[model_name],
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+            **transport.call_options("eval")
+        )
+        raw_response = response.choices[0].message.content or ""
+        answers = answer_extraction.parse_answer_vector(raw_response, len(questions))
+        response_fields = archive_response(MODELS[model_name], prompt, raw_response)
+        # The batched call's tokens and cost are split evenly across its questions
+        response_fields.update(costs.usage_fields(MODELS[model_name], getattr(response, 'usage', None), 1 / len(questions)))
     except Exception as e:
-        return {
+        print(f"[DEBUG] Batched evaluation failed for {model_name}: {str(e)}")
+        answers = {}
+        response_fields = {}
+
+    results = []
+    for number, question_data in enumerate(questions, 1):
+        selected = answers.get(number)
+        if selected is None:
+            # Unparseable item - fall back to a single-question call
+            result = evaluate_question(client, question_data, model_name)
+            result['eval_mode'] = "single_fallback"
+            costs.add_costs(result, response_fields)
+            results.append(result)
+            continue
+
+        result = {
             "question_id": question_data['id'],
             "model": model_name,
-            "selected": "ERROR",
-            "correct": False,
+            "selected": selected,
+            "correct": selected == question_data['correct_answer'],
             "timestamp": datetime.now().isoformat(),
-            "error": str(e)
-        }
+            "eval_mode": "batched",
+            "batch_position": number
+        }
+        result.update(response_fields)
+        if parity_rate and random.random() < parity_rate:
+            single_result = evaluate_question(client, question_data, model_name)
+            result['single_selected'] = single_result['selected']
+            result['single_correct'] = single_result['correct']
+            if single_result.get('response_key'):
+                result['single_response_key'] = single_result['response_key']
+            costs.add_costs(result, single_result)
+        results.append(result)
+
+    print(f"[DEBUG] Batch of {len(questions)} for {model_name}: {len(answers)} parsed, {len(questions) - len(answers)} fell back")
+    return results
+
+def compute_batch_parity(results):
+    """
+    Compare batched answers against single-question answers on the parity sample
+
+    Args:
+        results: Iterable of result dictionaries
+
+    Returns:
+        List of per-model parity rows (empty if no parity samples exist)
+    """
+    stats = {}
+    for result in results:
+        if result.get('single_selected') is None:
+            continue
+        row = stats.setdefault(result['model'], {'n': 0, 'agree': 0, 'batched': 0, 'single': 0})
+        row['n'] += 1
+        row['agree'] += result['single_selected'] == result['selected']
+        row['batched'] += bool(result['correct'])
+        row['single'] += bool(result.get('single_correct'))
+
+    return [
+        {
+            "Model": model,
+            "Sampled": row['n'],
+            "Agreement": f"{row['agree'] / row['n'] * 100:.1f}%",
+            "Batched Accuracy": f"{row['batched'] / row['n'] * 100:.1f}%",
+            "Single Accuracy": f"{row['single'] / row['n'] * 100:.1f}%"
+        }
+        for model, row in stats.items()
+    ]
+
+def compute_leaderboard(matrix, confidence=0.95, alpha=stats.SIGNIFICANCE_LEVEL):
+    """
+    Rank models with confidence intervals and statistically tied tiers
+
+    API errors are excluded. Intervals are Wilson score intervals and paired
+    bootstrap intervals over questions; tiers group models whose pairwise
+    McNemar test against the tier leader is not significant.
+
+    Args:
+        matrix: storage.ResultMatrix
+        confidence: Confidence level for the intervals
+        alpha: Significance level for the McNemar tests
+
+    Returns:
+        Tuple of (rows sorted by accuracy, pairwise McNemar tests)
+    """
+    models = matrix.models
+    correct = matrix.correct
+    answered = matrix.answered
+    bootstrap = stats.bootstrap_intervals(correct, answered, confidence=confidence, seed=0)
+
+    rows = []
+    for column, model in enumerate(models):
+        model_correct = int(correct[:, column].sum())
+        model_total = int(answered[:, column].sum())
+        rows.append({
+            "model": model,
+            "correct": model_correct,
+            "total": model_total,
+            "accuracy": model_correct / model_total if model_total else 0.0,
+            "wilson": stats.wilson_interval(model_correct, model_total, confidence),
+            "bootstrap": tuple(float(bound) for bound in bootstrap[column])
+        })
+    rows.sort(key=lambda row: row['accuracy'], reverse=True)
+
+    tests = stats.pairwise_mcnemar(correct, answered, models)
+    tiers = stats.tied_groups([row['model'] for row in rows], tests, alpha)
+    for row in rows:
+        row['tier'] = tiers[row['model']]
+    return rows, tests
 
 # Dialog functions for reference management
 @st.dialog("Add Reference Questions", width="large")
@@ -932,9 +1898,16 @@ def show_add_reference_dialog(client):
                 st.error("Please enter some text to analyze.")
                 return
 
-            # Show loading spinner
+            # Show loading spinner, with per-chunk progress for large inputs
+            chunk_progress = st.empty()
+
+            def report_chunk_progress(completed, total):
+                if total > 1:
+                    chunk_progress.progress(completed / total, text=f"Extracted {completed} of {total} chunks")
+
             with st.spinner("Analyzing reference questions..."):
-                extracted_data = extract_reference_questions(client, reference_text)
+                extracted_data = extract_reference_questions(client, reference_text, report_chunk_progress)
+            chunk_progress.empty()
 
             # Check for errors
             if extracted_data.get('error'):
@@ -946,6 +1919,9 @@ def show_add_reference_dialog(client):
                 st.error("No multiple-choice questions detected in the provided text. Please check your input and try again.")
                 return
 
+            if extracted_data.get('failed_chunks'):
+                st.warning(f"{extracted_data['failed_chunks']} section(s) of the text could not be analyzed; questions in them may be missing.")
+
             # Check for incomplete questions (missing correct answers)
             incomplete_questions = [
                 q for q in extracted_data.get('questions', [])
@@ -1002,6 +1978,253 @@ def show_clear_reference_dialog():
             st.rerun()
 
 
+def submit_evaluation_job(client, questions, models, run_id=None, batch_size=1, samples=1, parity_rate=0.0, adaptive=False,
+                          budget=None, shuffled=False):
+    """
+    Submit an evaluation to the background job runner in the requested mode
+
+    Args:
+        client: OpenRouter client
+        questions: Questions to evaluate
+        models: Model names to evaluate
+        run_id: Optional checkpointed run to resume
+        batch_size: Questions per request (batched mode when > 1)
+        samples: Samples per (question, model) pair (self-consistency mode when > 1)
+        parity_rate: Fraction of batched answers re-checked in single-question mode
+        adaptive: Stop querying models once their rank is settled
+        budget: Optional spend cap in USD; no new calls are made once it is reached
+        shuffled: Evaluate each question under `samples` option orders instead of
+            sampling (option-shuffling mode)
+
+    Returns:
+        The submitted EvaluationJob
+    """
+    if batch_size > 1:
+        evaluate_fn = lambda batch, model_name: evaluate_question_batch(client, batch, model_name, parity_rate)
+    elif samples > 1 and shuffled:
+        evaluate_fn = lambda question, model_name, sample: evaluate_permutation(client, question, model_name, sample, samples)
+    elif samples > 1:
+        evaluate_fn = lambda question, model_name, sample: evaluate_question(client, question, model_name, SAMPLING_TEMPERATURE)
+    else:
+        evaluate_fn = lambda question, model_name: evaluate_question(client, question, model_name)
+
+    # Local models are evaluated in large batches on the local server (sampled runs
+    # go through the router one call at a time like hosted models)
+    batched_models = {
+        model_name: (evaluate_local_batch, local_models.LOCAL_BATCH_SIZE)
+        for model_name in models
+        if samples == 1 and local_models.is_local(MODELS[model_name])
+    }
+
+    return get_job_runner().submit_evaluation(
+        evaluate_fn,
+        questions,
+        models,
+        run_id=run_id,
+        batch_size=batch_size,
+        samples=samples,
+        combine_fn=(shuffling.combine_permutations if shuffled else combine_samples) if samples > 1 else None,
+        adaptive=adaptive,
+        batched_models=batched_models,
+        budget=budget,
+        shuffled=shuffled and samples > 1,
+        parity_rate=parity_rate if batch_size > 1 else 0.0
+    )
+
+def render_evaluation_job(job):
+    """
+    Render live progress for a background evaluation job
+
+    The live view reruns on its own every EVAL_POLL_INTERVAL seconds while the
+    job runs (the rest of the page is left alone) and applies only the results
+    added since its last update: per-model counters and cards for the
+    EVAL_LIVE_WINDOW most recently answered questions, so each update costs the
+    same however long the run gets. The job itself keeps running if the tab is
+    closed.
+
+    Args:
+        job: EvaluationJob to display
+    """
+    @st.fragment(run_every=EVAL_POLL_INTERVAL if job.is_active else None)
+    def live_view():
+        view = update_live_view(job)
+        st.progress(job.completed / job.total if job.total else 1.0)
+
+        if job.is_active:
+            col_status, col_stop = st.columns([4, 1])
+            with col_status:
+                st.markdown(
+                    f"<div class='status-info'>🔍 Evaluating {len(job.questions)} questions with {len(job.models)} models "
+                    f"in the background... ({job.completed}/{job.total}). You can leave this page - results are saved as they arrive.</div>",
+                    unsafe_allow_html=True
+                )
+            with col_stop:
+                if st.button("⏹ Stop", use_container_width=True, key="stop_eval_btn"):
+                    job.cancel()
+        elif job.status == "failed":
+            st.error(f"❌ Evaluation failed: {job.error}")
+        elif job.status == "budget_reached":
+            st.markdown(
+                f"<div class='status-info'>💵 Evaluation stopped at the ${job.budget:.2f} spend cap ({job.completed}/{job.total}). "
+                f"Resume it to continue with a higher cap.</div>",
+                unsafe_allow_html=True
+            )
+        else:
+            label = "stopped" if job.status == "cancelled" else "complete"
+            saved = f" - early stopping saved {job.total - job.completed} calls" if job.adaptive and job.status == "complete" else ""
+            st.markdown(f"<div class='status-success'>✅ Evaluation {label}! ({job.completed}/{job.total}){saved}</div>", unsafe_allow_html=True)
+
+        if job.cost:
+            cap = f" of ${job.budget:.2f} cap" if job.budget is not None else ""
+            st.caption(f"💰 Spent ${job.cost:.4f}{cap}")
+
+        # Running per-model counters (adaptive mode adds intervals and which models have been dropped)
+        errors = job.error_counts()
+        counter_rows = []
+        for model_name, (correct, answered) in job.model_counts().items():
+            row = {
+                "Model": model_name,
+                "Answered": answered,
+                "Correct": correct,
+                "Accuracy": f"{correct / answered * 100:.1f}%" if answered else "-",
+                "Errors": errors.get(model_name, 0)
+            }
+            if job.adaptive:
+                low, high = stats.wilson_interval(correct, answered, jobs.ADAPTIVE_CONFIDENCE)
+                row[f"{jobs.ADAPTIVE_CONFIDENCE:.0%} CI"] = f"{low * 100:.0f}-{high * 100:.0f}%"
+                row["Status"] = "✓ Rank settled" if model_name in job.stopped_models else "Evaluating"
+            counter_rows.append(row)
+        st.table(counter_rows)
+
+        # Most recently answered questions, newest first
+        if view['cards']:
+            st.caption(f"Latest {len(view['cards'])} of {len(view['answered'])} answered questions")
+            st.markdown("".join(reversed(view['cards'].values())), unsafe_allow_html=True)
+
+        if not job.is_active and st.session_state.eval_job_id == job.id:
+            # Finished - show the final state briefly, then reload the whole page with the results
+            st.session_state.eval_job_id = None
+            time.sleep(1)
+            st.rerun()
+
+    live_view()
+
+def update_live_view(job):
+    """
+    Apply a job's new results to this session's live view
+
+    Only results added since the previous update are read; each touches the
+    card of its question, which moves to the front of the window, and the
+    oldest cards fall out once there are more than EVAL_LIVE_WINDOW.
+
+    Args:
+        job: EvaluationJob being displayed
+
+    Returns:
+        View state: 'position' in the job's results, 'results' and 'cards'
+        (question id -> results / card HTML, oldest first) for the window, and
+        the 'answered' question ids
+    """
+    view = st.session_state.get('eval_live_view')
+    if view is None or view['job_id'] != job.id:
+        view = {"job_id": job.id, "position": 0, "results": OrderedDict(), "cards": OrderedDict(), "answered": set()}
+        st.session_state.eval_live_view = view
+
+    new_results, view['position'] = job.results_since(view['position'])
+    touched = set()
+    for result in new_results:
+        q_id = result['question_id']
+        view['answered'].add(q_id)
+        view['results'].setdefault(q_id, []).append(result)
+        view['results'].move_to_end(q_id)
+        touched.add(q_id)
+    while len(view['results']) > EVAL_LIVE_WINDOW:
+        q_id, _ = view['results'].popitem(last=False)
+        view['cards'].pop(q_id, None)
+        touched.discard(q_id)
+
+    # Rebuild only the cards whose question received results, keeping the window order
+    for q_id in touched:
+        question = job.questions[job.question_positions[q_id]]
+        view['cards'][q_id] = live_question_card(job, question, view['results'][q_id])
+    view['cards'] = OrderedDict((q_id, view['cards'][q_id]) for q_id in view['results'])
+    return view
+
+def live_question_card(job, question, q_results):
+    """Card HTML for one question of the live view, with each model's answer so far"""
+    question_text_escaped = html.escape(question.get('question', 'N/A'))
+    topic = question.get('topic', 'Unknown')
+    correct_answer = question.get('correct_answer', '?')
+
+    model_results_html = []
+    for result in sorted(q_results, key=lambda r: job.model_positions.get(r['model'], 0)):
+        emoji = "✅" if result['correct'] else "❌"
+        response_class = "model-response-correct" if result['correct'] else "model-response-incorrect"
+        agreement = f" ({result['samples'].count(result['selected'])}/{len(result['samples'])})" if result.get('samples') else ""
+        if result.get('shuffle_choices'):
+            agreement = f" ({round(result['agreement'] * len(result['shuffle_choices']))}/{len(result['shuffle_choices'])} orders)"
+        model_results_html.append(
+            f"<span class='model-response-item {response_class}'>{emoji} {result['model']} → {result['selected']}{agreement}</span>"
+        )
+
+    return f"""
+    <div class='eval-question-card'>
+        <div class='eval-question-header'>
+            <div class='eval-question-text'>{job.question_positions.get(question['id'], 0) + 1}. {question_text_escaped}</div>
+            <div class='eval-question-meta'>
+                <span class='correct-answer-badge'>Answer: {correct_answer}</span>
+                <span class='eval-topic-badge'>{topic}</span>
+            </div>
+        </div>
+        <div class='model-responses'>{"".join(model_results_html)}</div>
+    </div>
+    """
+
+def render_verification_job(job):
+    """
+    Render progress for a background answer-key verification job
+
+    Like the evaluation view, the progress reruns on its own every
+    EVAL_POLL_INTERVAL seconds while the job runs, leaving the rest of the page
+    alone; once the job finishes the whole page reloads with the new verdicts.
+
+    Args:
+        job: verification.VerificationJob to display
+    """
+    @st.fragment(run_every=EVAL_POLL_INTERVAL if job.is_active else None)
+    def live_view():
+        st.progress(job.completed / job.total if job.total else 1.0)
+        if job.is_active:
+            col_status, col_stop = st.columns([4, 1])
+            with col_status:
+                st.markdown(
+                    f"<div class='status-info'>🔑 Verifying answer keys with {len(job.models)} models... "
+                    f"({job.completed}/{job.total} checks, ${job.cost:.4f})</div>",
+                    unsafe_allow_html=True
+                )
+            with col_stop:
+                if st.button("⏹ Stop", use_container_width=True, key="stop_verify_btn"):
+                    job.cancel()
+        elif job.status == "failed":
+            st.error(f"❌ Verification failed: {job.error}")
+        else:
+            label = "stopped" if job.status == "cancelled" else "complete"
+            retried = job.errors + job.unparsed
+            errors = f", {retried} failed or unreadable answer(s) will be retried next run" if retried else ""
+            st.markdown(
+                f"<div class='status-success'>✅ Verification {label}: {job.completed}/{job.total} checks, ${job.cost:.4f}{errors}</div>",
+                unsafe_allow_html=True
+            )
+
+        if not job.is_active and st.session_state.get('verify_job_id') == job.id:
+            # Finished - show the final state briefly, then reload the whole page with the new verdicts
+            st.session_state.verify_job_id = None
+            time.sleep(1)
+            st.rerun()
+
+    live_view()
+
+
 # Initialize session state
 def init_session_state():
     if 'generated_questions' not in st.session_state:
@@ -1012,6 +2235,8 @@ def init_session_state():
         st.session_state.workflow_state = "idle"  # "idle" | "generating" | "reviewing" | "complete"
     if 'evaluating' not in st.session_state:
         st.session_state.evaluating = False
+    if 'eval_job_id' not in st.session_state:
+        st.session_state.eval_job_id = None
     # Reference-related state
     if 'reference_data' not in st.session_state:
         st.session_state.reference_data = None
@@ -1039,7 +2264,7 @@ def main():
     """, unsafe_allow_html=True)
 
     # Create tabs
-    tab1, tab2 = st.tabs(["✨ Generate Questions", "📊 Evaluate"])
+    tab1, tab2, tab3, tab4 = st.tabs(["✨ Generate Questions", "📊 Evaluate", "🔎 Search Bank", "🔑 Verify Keys"])
 
     # ==================== TAB 1: GENERATE QUESTIONS ====================
     with tab1:
@@ -1062,6 +2287,24 @@ def main():
                 show_add_reference_dialog(client)
             st.markdown('</div>', unsafe_allow_html=True)
 
+        # Speculative mode: a cheap model drafts, the selected model validates the answer keys
+        col_spec, col_draft = st.columns([2, 2])
+        with col_spec:
+            st.markdown("<br>", unsafe_allow_html=True)
+            speculative = st.checkbox(
+                "⚡ Speculative generation",
+                value=False, key="gen_speculative",
+                help="A cheap model drafts questions in parallel and the selected model checks each answer key and its "
+                     "distractors; only drafts that pass reach review"
+            )
+        with col_draft:
+            model_names = list(MODELS.keys())
+            draft_model = st.selectbox(
+                "✏️ Draft model", model_names,
+                index=model_names.index(SPECULATIVE_DRAFT_MODEL) if SPECULATIVE_DRAFT_MODEL in model_names else 0,
+                key="gen_draft_model", disabled=not speculative
+            )
+
         # Display reference card if active
         if st.session_state.reference_active and st.session_state.reference_data:
             ref_data = st.session_state.reference_data
@@ -1123,6 +2366,8 @@ def main():
             st.session_state.workflow_state = "generating"
             st.session_state.approved_count = 0
             st.session_state.skipped_count = 0
+            st.session_state.generation_cache_stats = {"prompt_tokens": 0, "cached_tokens": 0}
+            st.session_state.speculative_stats = None
 
             # Generate questions
             progress_bar = st.progress(0)
@@ -1131,39 +2376,63 @@ def main():
             # Get reference data if active
             reference_data = st.session_state.reference_data if st.session_state.reference_active else None
 
-            for i in range(quantity):
-                status_text.markdown(f"<div class='status-info'>🎯 Generating question {i+1} of {quantity}...</div>", unsafe_allow_html=True)
-
-                # Streaming container
-                stream_container = st.empty()
-
-                full_text = ""
-                question_data = None
-
-                for chunk in generate_question_stream(client, topic, model, reference_data):
-                    if isinstance(chunk, dict):
-                        if "parsed" in chunk:
-                            question_data = chunk["parsed"]
-                            question_data['topic'] = topic
-                            question_data['generated_by'] = model
-                        elif "error" in chunk:
-                            # Show all errors to user
-                            st.error(f"❌ {chunk['error']}")
-                            break
+            if speculative:
+                status_text.markdown(
+                    f"<div class='status-info'>⚡ Drafting with {draft_model}, validating with {model}...</div>",
+                    unsafe_allow_html=True
+                )
+
+                def report_speculative_progress(validated_count, target, run_stats):
+                    progress_bar.progress(validated_count / target)
+                    status_text.markdown(
+                        f"<div class='status-info'>⚡ {validated_count} of {target} validated · {run_stats['drafted']} drafted · "
+                        f"{run_stats['rejected']} rejected</div>",
+                        unsafe_allow_html=True
+                    )
+
+                validated_questions, speculative_stats = speculative_generate(
+                    client, topic, draft_model, model, quantity, reference_data, report_speculative_progress
+                )
+                st.session_state.generated_questions = validated_questions
+                st.session_state.speculative_stats = speculative_stats
+
+            else:
+                for i in range(quantity):
+                    status_text.markdown(f"<div class='status-info'>🎯 Generating question {i+1} of {quantity}...</div>", unsafe_allow_html=True)
+
+                    # Streaming container
+                    stream_container = st.empty()
+
+                    full_text = ""
+                    question_data = None
+
+                    for chunk in generate_question_stream(client, topic, model, reference_data):
+                        if isinstance(chunk, dict):
+                            if "parsed" in chunk:
+                                question_data = chunk["parsed"]
+                                question_data['topic'] = topic
+                                question_data['generated_by'] = model
+                            elif "usage" in chunk:
+                                for key, value in chunk["usage"].items():
+                                    st.session_state.generation_cache_stats[key] += value
+                            elif "error" in chunk:
+                                # Show all errors to user
+                                st.error(f"❌ {chunk['error']}")
+                                break
+                        else:
+                            full_text += chunk
+                            stream_container.markdown(f"<div class='json-stream-box'>{full_text}</div>", unsafe_allow_html=True)
+
+                    if question_data:
+                        st.session_state.generated_questions.append(question_data)
+                        print(f"[DEBUG] Appended question {i+1}, total questions now: {len(st.session_state.generated_questions)}")
+                        # Show success message briefly
+                        stream_container.markdown("<div class='status-success'>✅ Question generated successfully!</div>", unsafe_allow_html=True)
+                        stream_container.empty()
                     else:
-                        full_text += chunk
-                        stream_container.markdown(f"<div class='json-stream-box'>{full_text}</div>", unsafe_allow_html=True)
-
-                if question_data:
-                    st.session_state.generated_questions.append(question_data)
-                    print(f"[DEBUG] Appended question {i+1}, total questions now: {len(st.session_state.generated_questions)}")
-                    # Show success message briefly
-                    stream_container.markdown("<div class='status-success'>✅ Question generated successfully!</div>", unsafe_allow_html=True)
-                    stream_container.empty()
-                else:
-                    print(f"[DEBUG] Question {i+1} failed to generate (question_data is None)")
+                        print(f"[DEBUG] Question {i+1} failed to generate (question_data is None)")
 
-                progress_bar.progress((i + 1) / quantity)
+                    progress_bar.progress((i + 1) / quantity)
 
             # Clear generation UI elements
             status_text.empty()
@@ -1171,6 +2440,7 @@ def main():
 
             # Transition to review mode with validation
             print(f"[DEBUG] Generation complete. Total questions generated: {len(st.session_state.generated_questions)}")
+            print(f"[DEBUG] Prompt cache stats: {st.session_state.generation_cache_stats}")
             print(f"[DEBUG] Session state generated_questions: {st.session_state.generated_questions}")
 
             if len(st.session_state.generated_questions) > 0:
@@ -1179,7 +2449,11 @@ def main():
                 print(f"[DEBUG] Transitioning to 'reviewing' state")
                 st.rerun()
             else:
-                st.error("❌ No questions were generated successfully. Please try again.")
+                spec_stats = st.session_state.speculative_stats
+                if spec_stats and spec_stats['rejected']:
+                    st.error(f"❌ None of the {spec_stats['drafted']} drafts passed validation. Try another draft model or topic.")
+                else:
+                    st.error("❌ No questions were generated successfully. Please try again.")
                 st.session_state.workflow_state = "idle"
                 print(f"[DEBUG] No questions generated, staying in 'idle' state")
 
@@ -1207,6 +2481,28 @@ def main():
             if 'skipped_count' not in st.session_state:
                 st.session_state.skipped_count = 0
 
+            # Cached-token savings from prompt-prefix caching (only shown when the cache was hit)
+            cache_stats = st.session_state.get('generation_cache_stats') or {}
+            cached_stat_html = ""
+            if cache_stats.get('cached_tokens'):
+                cached_pct = cache_stats['cached_tokens'] / max(cache_stats['prompt_tokens'], 1) * 100
+                cached_stat_html = f"""
+                <div class='stat-item'>
+                    <span class='stat-label'>Cached Prompt Tokens</span>
+                    <span class='stat-value'>{cache_stats['cached_tokens']:,} ({cached_pct:.0f}%)</span>
+                </div>"""
+
+            # Speculative generation yield: validated drafts and cost per validated question
+            spec_stats = st.session_state.get('speculative_stats')
+            speculative_stat_html = ""
+            if spec_stats:
+                cost_per_question = f" · ${spec_stats['cost'] / spec_stats['validated']:.4f}/q" if spec_stats['validated'] else ""
+                speculative_stat_html = f"""
+                <div class='stat-item'>
+                    <span class='stat-label'>Validated Drafts</span>
+                    <span class='stat-value'>{spec_stats['validated']} / {spec_stats['drafted']}{cost_per_question}</span>
+                </div>"""
+
             # Statistics panel
             st.markdown(f"""
             <div class='review-stats'>
@@ -1221,12 +2517,19 @@ def main():
                 <div class='stat-item'>
                     <span class='stat-label'>Skipped</span>
                     <span class='stat-value stat-skipped'>{st.session_state.skipped_count}</span>
-                </div>
+                </div>{cached_stat_html}{speculative_stat_html}
             </div>
             """, unsafe_allow_html=True)
 
             st.progress((idx + 1) / total)
 
+            if spec_stats and spec_stats['rejections']:
+                with st.expander(f"🚫 {len(spec_stats['rejections'])} draft(s) rejected in validation", expanded=False):
+                    for rejection in spec_stats['rejections']:
+                        st.markdown(f"**{html.escape(rejection['question'][:160])}**")
+                        for issue in rejection['issues']:
+                            st.markdown(f"- {html.escape(str(issue))}")
+
             # Build options HTML - no indentation to avoid markdown parsing issues
             options_html = ""
             for i, option in enumerate(q.get('options', [])):
@@ -1259,7 +2562,7 @@ def main():
             with col1:
                 st.markdown('<div class="review-button review-button-primary">', unsafe_allow_html=True)
                 if st.button("✓ Approve & Save", use_container_width=True, key="approve_btn"):
-                    question_id = save_question(q)
+                    question_id = save_and_index_question(q)
                     st.session_state.approved_count += 1
                     st.toast(f"🎉 Question saved with ID #{question_id}", icon="✅")
                     st.session_state.current_question_idx += 1
@@ -1323,27 +2626,101 @@ def main():
         st.markdown("### 📊 Model Evaluation")
 
         # Load approved questions
-        all_questions = load_questions()
+        all_questions = get_question_bank(storage.file_version(QUESTIONS_FILE))
 
-        # Topic filter
-        st.markdown("#### Filter Questions")
-        selected_topic = st.selectbox("📚 Filter by Topic", ["All Topics"] + TOPICS, key="eval_topic")
+        # Query index over the bank (inverted/sorted indexes, updated incrementally on save)
+        question_index = get_question_index()
+        question_index.sync(all_questions, storage.file_version(QUESTIONS_FILE))
+        difficulty_version = storage.file_version(storage.DIFFICULTY_INDEX_FILE)
+        question_index.set_difficulty(stats.item_statistics(get_difficulty_index(difficulty_version)), difficulty_version)
 
-        # Filter questions by topic
+        # Filters
+        st.markdown("#### Filter Questions")
+        col_topic, col_author, col_difficulty = st.columns(3)
+        with col_topic:
+            selected_topic = st.selectbox("📚 Filter by Topic", ["All Topics"] + TOPICS, key="eval_topic")
+        with col_author:
+            selected_author = st.selectbox("🤖 Generated by", ["Any model"] + question_index.authors(), key="eval_author")
+        with col_difficulty:
+            selected_difficulty = st.selectbox("🔥 Past difficulty", list(DIFFICULTY_FILTERS), key="eval_difficulty")
+
+        col_text, col_dates = st.columns([2, 1])
+        with col_text:
+            search_text = st.text_input("🔎 Question or options contain", key="eval_search", placeholder="e.g. hearsay declarant")
+        with col_dates:
+            created_range = st.date_input("📅 Created between", value=(), key="eval_created")
+
+        filters = dict(DIFFICULTY_FILTERS[selected_difficulty])
         if selected_topic != "All Topics":
-            questions = [q for q in all_questions if q.get('topic') == selected_topic]
+            filters['topic'] = selected_topic
+        if selected_author != "Any model":
+            filters['generated_by'] = selected_author
+        if search_text.strip():
+            filters['text'] = search_text
+        if created_range:
+            filters['created_after'] = created_range[0].isoformat()
+            filters['created_before'] = (created_range[-1] + timedelta(days=1)).isoformat()
+
+        if filters:
+            questions = [all_questions.get(q_id) for q_id in question_index.query(**filters)]
+            questions = [q for q in questions if q is not None]
         else:
             questions = all_questions
 
         # Show question counts
-        if selected_topic != "All Topics":
-            st.markdown(f"<div class='status-info'>📚 {len(questions)} questions in '{selected_topic}' ({len(all_questions)} total)</div>", unsafe_allow_html=True)
+        if filters:
+            st.markdown(f"<div class='status-info'>📚 {len(questions)} matching questions ({len(all_questions)} total)</div>", unsafe_allow_html=True)
         else:
             st.markdown(f"<div class='status-info'>📚 {len(questions)} questions ready for evaluation</div>", unsafe_allow_html=True)
 
-        if len(questions) == 0:
+        if len(all_questions) == 0:
             st.warning("⚠️ No approved questions yet. Generate and approve some questions first!")
+        elif len(questions) == 0:
+            st.warning("⚠️ No questions match these filters")
         else:
+            # A job started in this session, or one still running from another session/connection
+            job_runner = get_job_runner()
+            active_job = job_runner.get(st.session_state.eval_job_id) or job_runner.latest_active()
+
+            # Offer to resume a checkpointed run that was interrupted, stopped or failed
+            if active_job is None:
+                resumable_runs = job_runner.resumable_runs()
+                if resumable_runs:
+                    run = resumable_runs[0]
+                    resume_budget = run.get('budget')
+                    if run.get('status') == "budget_reached":
+                        resume_budget = st.number_input(
+                            f"💵 New spend cap (USD) - ${run.get('cost', 0):.2f} spent so far",
+                            min_value=0.0, value=float(run['budget']) * 2, step=1.0, key="resume_spend_cap"
+                        ) or None
+                    col_info, col_resume, col_discard = st.columns([3, 1, 1])
+                    with col_info:
+                        st.markdown(
+                            f"<div class='status-info'>⏸️ Unfinished evaluation from {run['created_at'][:16].replace('T', ' ')}: "
+                            f"{run['completed']}/{run['total']} done across {len(run['models'])} models</div>",
+                            unsafe_allow_html=True
+                        )
+                    with col_resume:
+                        if st.button("▶ Resume", use_container_width=True, key="resume_run_btn"):
+                            run_questions = [q for q in (all_questions.get(q_id) for q_id in run['question_ids']) if q is not None]
+                            run_models = [m for m in run['models'] if m in MODELS]
+                            active_job = submit_evaluation_job(
+                                client, run_questions, run_models,
+                                run_id=run['run_id'],
+                                batch_size=run.get('batch_size', 1),
+                                samples=run.get('samples', 1),
+                                parity_rate=run.get('parity_rate', BATCH_PARITY_RATE),
+                                adaptive=run.get('adaptive', False),
+                                budget=resume_budget,
+                                shuffled=run.get('shuffled', False)
+                            )
+                            st.session_state.eval_job_id = active_job.id
+                            st.rerun()
+                    with col_discard:
+                        if st.button("✕ Discard", use_container_width=True, key="discard_run_btn"):
+                            job_runner.discard_run(run['run_id'])
+                            st.rerun()
+
             st.markdown("#### Select Models to Evaluate")
 
             # Model selection in columns
@@ -1362,88 +2739,163 @@ def main():
             else:
                 st.markdown(f"<div class='status-info'>🎯 {len(selected_models)} models selected</div>", unsafe_allow_html=True)
 
-                if st.button("🚀 Run Evaluation", use_container_width=True):
-                    # Run evaluation
-                    progress_bar = st.progress(0)
-                    status_container = st.empty()
-
-                    all_results = []
-
-                    total_evaluations = len(questions) * len(selected_models)
-                    current_eval = 0
-
-                    # Container for question cards
-                    question_containers = {}
-
-                    for q_idx, question in enumerate(questions):
-                        # Create question card
-                        question_text_escaped = html.escape(question.get('question', 'N/A'))
-                        topic = question.get('topic', 'Unknown')
-                        correct_answer = question.get('correct_answer', '?')
-
-                        question_card_html = f"""
-                        <div class='eval-question-card'>
-                            <div class='eval-question-header'>
-                                <div class='eval-question-text'>{q_idx + 1}. {question_text_escaped}</div>
-                                <div class='eval-question-meta'>
-                                    <span class='correct-answer-badge'>Answer: {correct_answer}</span>
-                                    <span class='eval-topic-badge'>{topic}</span>
-                                </div>
-                            </div>
-                            <div class='model-responses' id='q{q_idx}_responses'></div>
-                        </div>
-                        """
-
-                        # Display question card
-                        question_containers[q_idx] = st.empty()
-                        question_containers[q_idx].markdown(question_card_html, unsafe_allow_html=True)
-
-                        # Evaluate with each model
-                        model_results_html = []
-                        for model_name in selected_models:
-                            current_eval += 1
-
-                            status_container.markdown(
-                                f"<div class='status-info'>🔍 Evaluating Question {q_idx + 1}/{len(questions)} "
-                                f"with {model_name}... ({current_eval}/{total_evaluations})</div>",
-                                unsafe_allow_html=True
-                            )
-
-                            result = evaluate_question(client, question, model_name)
-                            all_results.append(result)
-
-                            # Build model response HTML
-                            emoji = "✅" if result['correct'] else "❌"
-                            response_class = "model-response-correct" if result['correct'] else "model-response-incorrect"
-                            model_results_html.append(
-                                f"<span class='model-response-item {response_class}'>{emoji} {model_name} → {result['selected']}</span>"
-                            )
-
-                            # Update question card with all results so far
-                            updated_card_html = f"""
-                            <div class='eval-question-card'>
-                                <div class='eval-question-header'>
-                                    <div class='eval-question-text'>{q_idx + 1}. {question_text_escaped}</div>
-                                    <div class='eval-question-meta'>
-                                        <span class='correct-answer-badge'>Answer: {correct_answer}</span>
-                                        <span class='eval-topic-badge'>{topic}</span>
-                                    </div>
-                                </div>
-                                <div class='model-responses'>{"".join(model_results_html)}</div>
-                            </div>
-                            """
-                            question_containers[q_idx].markdown(updated_card_html, unsafe_allow_html=True)
-
-                            progress_bar.progress(current_eval / total_evaluations)
-
-                    # Save results
-                    save_results(all_results)
+                # Evaluation mode: batched requests (fewer calls), multiple samples (stability)
+                # or shuffled option orders (position bias)
+                col_batch, col_samples, col_shuffle, col_parity = st.columns(4)
+                with col_batch:
+                    batch_size = st.number_input(
+                        "📦 Questions per request",
+                        min_value=1, max_value=25, value=1, key="eval_batch_size",
+                        help="Values above 1 pack several questions into one request and ask for an answer vector like '1:C 2:A'"
+                    )
+                with col_samples:
+                    samples = st.number_input(
+                        "🎲 Samples per question",
+                        min_value=1, max_value=10, value=1, key="eval_samples",
+                        disabled=batch_size > 1 or st.session_state.get("eval_shuffle_orders", 1) > 1,
+                        help=f"Values above 1 ask each model several times at temperature {SAMPLING_TEMPERATURE} and record the majority vote, agreement and entropy"
+                    )
+                with col_shuffle:
+                    shuffle_orders = st.number_input(
+                        "🔀 Option orders per question",
+                        min_value=1, max_value=SHUFFLE_MAX_ORDERS, value=1, key="eval_shuffle_orders",
+                        disabled=batch_size > 1 or samples > 1,
+                        help="Values above 1 ask each question with its options reordered (the key moves through every "
+                             "position first) and report each model's position bias; orders answered before are reused "
+                             "from the response archive"
+                    )
+                with col_parity:
+                    check_parity = st.checkbox(
+                        f"Check parity on a {BATCH_PARITY_RATE:.0%} sample",
+                        value=True, key="eval_batch_parity", disabled=batch_size == 1,
+                        help="Re-asks a sample of batched questions one at a time to measure accuracy parity"
+                    )
+                if batch_size > 1:
+                    samples = shuffle_orders = 1
+                if shuffle_orders > 1:
+                    samples = shuffle_orders
+
+                # Fewer calls: a question subset and/or adaptive early stopping
+                col_selection, col_budget, col_adaptive = st.columns(3)
+                with col_selection:
+                    question_selection = st.selectbox(
+                        "🎯 Questions",
+                        ["All questions", "Topic-stratified sample", "Most discriminative"],
+                        key="eval_selection",
+                        help="'Most discriminative' uses past results to skip questions every model gets right or wrong "
+                             "and keeps the ones that best separate models - useful to triage a new model cheaply"
+                    )
+                with col_budget:
+                    question_budget = st.number_input(
+                        "Subset size",
+                        min_value=1, max_value=len(questions), value=max(1, len(questions) // 10), key="eval_budget",
+                        disabled=question_selection == "All questions"
+                    )
+                with col_adaptive:
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    adaptive = st.checkbox(
+                        "⚡ Adaptive early stopping",
+                        value=False, key="eval_adaptive", disabled=len(selected_models) < 2,
+                        help="Evaluate questions in random topic-stratified order and stop querying a model once its rank is statistically settled "
+                             "(needs at least two models)"
+                    ) and len(selected_models) >= 2
+
+                # Pre-run cost estimate from prompt lengths and observed completion lengths, and a hard spend cap
+                col_cap, col_estimate = st.columns([1, 2])
+                with col_cap:
+                    spend_cap = st.number_input(
+                        "💵 Spend cap (USD, 0 = none)",
+                        min_value=0.0, value=0.0, step=1.0, key="eval_spend_cap",
+                        help="Stops scheduling new calls once the run has spent this much; calls already in flight finish"
+                    ) or None
+                with col_estimate:
+                    prompt_tokens = get_prompt_token_estimates(storage.file_version(QUESTIONS_FILE))
+                    run_tokens = [prompt_tokens.get(q['id'], 0) for q in questions]
+                    if question_selection != "All questions" and run_tokens:
+                        mean_tokens = sum(run_tokens) / len(run_tokens)
+                        run_tokens = [mean_tokens] * min(question_budget, len(run_tokens))
+                    estimates, estimated_total = costs.estimate_run_cost(
+                        run_tokens, [MODELS[m] for m in selected_models], calls_per_prompt=samples,
+                        history=get_completion_averages(storage.file_version(RESULTS_FILE))
+                    )
+                    unpriced = [m for m in selected_models if estimates[MODELS[m]] is None]
+                    breakdown = ", ".join(
+                        f"{m} ${estimates[MODELS[m]]:.2f}" for m in selected_models if estimates[MODELS[m]] is not None
+                    )
+                    st.markdown(
+                        f"<div class='status-info'>💰 Estimated cost: up to ${estimated_total:.2f} ({breakdown})"
+                        f"{' - no price for ' + ', '.join(unpriced) if unpriced else ''}</div>",
+                        unsafe_allow_html=True
+                    )
+                    if spend_cap and estimated_total > spend_cap:
+                        st.caption(f"⚠️ The estimate exceeds the ${spend_cap:.2f} cap; the run will stop when the cap is reached.")
+
+                if st.button("🚀 Run Evaluation", use_container_width=True, disabled=active_job is not None):
+                    run_questions = questions
+                    if question_selection == "Most discriminative":
+                        difficulty_index = get_difficulty_index(storage.file_version(storage.DIFFICULTY_INDEX_FILE))
+                        selected_ids = stats.select_discriminative(difficulty_index, question_budget, {q['id'] for q in questions})
+                        run_questions = [all_questions.get(q_id) for q_id in selected_ids]
+                        print(f"[DEBUG] Selected {len(run_questions)} discriminative questions")
+                    elif adaptive or question_selection == "Topic-stratified sample":
+                        run_questions = stats.stratified_order(questions, key=lambda q: q.get('topic', 'Unknown'))
+                        if question_selection == "Topic-stratified sample":
+                            run_questions = run_questions[:question_budget]
+
+                    if not run_questions:
+                        st.warning("⚠️ No discriminative questions yet - run a full evaluation with several models first")
+                    else:
+                        # Submit as a background job so the run survives reruns and disconnects
+                        active_job = submit_evaluation_job(
+                            client, run_questions, selected_models,
+                            batch_size=batch_size,
+                            samples=samples,
+                            parity_rate=BATCH_PARITY_RATE if check_parity else 0.0,
+                            adaptive=adaptive,
+                            budget=spend_cap,
+                            shuffled=shuffle_orders > 1
+                        )
+                        st.session_state.eval_job_id = active_job.id
+                        st.rerun()
 
-                    status_container.markdown("<div class='status-success'>✅ Evaluation complete!</div>", unsafe_allow_html=True)
-                    time.sleep(1)
-                    status_container.empty()
-                    progress_bar.empty()
-                    st.rerun()
+            # Live progress for the running (or just finished) evaluation job
+            if active_job is not None:
+                render_evaluation_job(active_job)
+
+            # Provider health and the shared HTTP connection pool
+            router = get_model_router()
+            pool = router.http_transport.metrics()
+            if pool["calls"]:
+                with st.expander("🔌 Providers & connection pool", expanded=False):
+                    st.table([
+                        {
+                            "Provider": provider["provider"],
+                            "Status": "🟢 healthy" if provider["healthy"] else f"🔴 cooling down ({provider['cooldown']:.0f}s)",
+                            "Requests": provider["requests"],
+                            "Errors": provider["errors"],
+                            "Eval latency": f"{provider['latency']['eval']:.2f}s" if "eval" in provider["latency"] else "-",
+                            "Last error": provider["last_error"] or ""
+                        }
+                        for provider in router.status()
+                    ])
+                    connections = (
+                        f"{pool['open_connections']} open / {pool['idle_connections']} idle connections · "
+                        if pool['open_connections'] is not None else ""
+                    )
+                    http2_connections = f" ({pool['http2_connections']} connections)" if pool['http2_connections'] is not None else ""
+                    st.caption(
+                        f"{pool['in_flight']} in flight (peak {pool['peak_in_flight']}) · {connections}"
+                        f"HTTP/2 {'on' if pool['http2_enabled'] else 'off'}{http2_connections}"
+                    )
+                    st.table([
+                        {
+                            "Call type": call_type,
+                            "Requests": call["requests"],
+                            "Errors": call["errors"],
+                            "Mean latency": f"{call['mean_latency']:.2f}s"
+                        }
+                        for call_type, call in sorted(pool["calls"].items())
+                    ])
 
             # Display results
             st.markdown("---")
@@ -1462,77 +2914,156 @@ def main():
                         st.rerun()
                 st.markdown('</div>', unsafe_allow_html=True)
 
-            results = load_results()
+            results = get_result_table(storage.file_version(RESULTS_FILE))
+            matrix = get_result_matrix(storage.file_version(RESULTS_FILE))
 
             if len(results) > 0:
-                # Calculate accuracy per model
-                model_stats = {}
-
-                for result in results:
-                    model = result['model']
-                    if model not in model_stats:
-                        model_stats[model] = {'correct': 0, 'total': 0}
-
-                    model_stats[model]['total'] += 1
-                    if result['correct']:
-                        model_stats[model]['correct'] += 1
-
-                # Create results table
+                # Accuracy per model; API errors are excluded, as on the leaderboard and in earlier-run stats
+                model_stats = {
+                    model: {'correct': correct, 'total': total}
+                    for model, (correct, total) in matrix.model_counts(include_errors=False).items()
+                }
+
+                # Leaderboard ranked on the numeric accuracy, with intervals and tied tiers
+                leaderboard, pairwise_tests = get_leaderboard(storage.file_version(RESULTS_FILE))
+                spend = costs.model_costs(results)
                 results_data = []
-                for model, stats in model_stats.items():
-                    accuracy = (stats['correct'] / stats['total'] * 100) if stats['total'] > 0 else 0
-                    results_data.append({
-                        "Model": model,
-                        "Correct": stats['correct'],
-                        "Total": stats['total'],
-                        "Accuracy": f"{accuracy:.1f}%"
-                    })
-
-                # Sort by accuracy
-                results_data.sort(key=lambda x: float(x['Accuracy'].rstrip('%')), reverse=True)
-
-                # Add rank medals
-                for idx, row in enumerate(results_data):
+                for idx, row in enumerate(leaderboard):
                     if idx == 0:
-                        row['Rank'] = "🥇"
+                        rank = "🥇"
                     elif idx == 1:
-                        row['Rank'] = "🥈"
+                        rank = "🥈"
                     elif idx == 2:
-                        row['Rank'] = "🥉"
+                        rank = "🥉"
                     else:
-                        row['Rank'] = f"{idx + 1}"
-
-                # Reorder columns
-                results_data = [{k: row[k] for k in ['Rank', 'Model', 'Correct', 'Total', 'Accuracy']} for row in results_data]
+                        rank = f"{idx + 1}"
+                    results_data.append({
+                        "Rank": rank,
+                        "Model": row['model'],
+                        "Correct": row['correct'],
+                        "Total": row['total'],
+                        "Accuracy": f"{row['accuracy'] * 100:.1f}%",
+                        "95% CI (Wilson)": f"{row['wilson'][0] * 100:.1f}–{row['wilson'][1] * 100:.1f}%",
+                        "95% CI (Bootstrap)": f"{row['bootstrap'][0] * 100:.1f}–{row['bootstrap'][1] * 100:.1f}%",
+                        "Tier": row['tier']
+                    })
+                    # Cost efficiency: spend per 1,000 questions and correct answers per dollar
+                    if spend:
+                        model_spend = spend.get(row['model'])
+                        cost_per_question = model_spend['cost'] / model_spend['results'] if model_spend else None
+                        results_data[-1]["Cost / 1k Q"] = f"${cost_per_question * 1000:.2f}" if cost_per_question is not None else "-"
+                        results_data[-1]["Correct / $"] = (
+                            f"{row['accuracy'] / cost_per_question:,.0f}" if cost_per_question else ("∞" if model_spend else "-")
+                        )
 
                 st.table(results_data)
 
+                # Confidence interval bars
+                bars_html = []
+                for row in leaderboard:
+                    low, high = row['bootstrap']
+                    bars_html.append(
+                        f"<div class='ci-row'>"
+                        f"<span class='ci-label'>{html.escape(row['model'])}</span>"
+                        f"<span class='ci-track'>"
+                        f"<span class='ci-bar' style='left: {low * 100:.1f}%; width: {max(high - low, 0.005) * 100:.1f}%;'></span>"
+                        f"<span class='ci-point' style='left: {row['accuracy'] * 100:.1f}%;'></span>"
+                        f"</span>"
+                        f"<span class='ci-tier'>Tier {row['tier']}</span>"
+                        f"</div>"
+                    )
+                st.markdown("".join(bars_html), unsafe_allow_html=True)
+
+                tied_tiers = {row['tier'] for row in leaderboard if sum(other['tier'] == row['tier'] for other in leaderboard) > 1}
+                if tied_tiers:
+                    st.caption(f"Models in the same tier are not significantly different from the tier leader (McNemar, p ≥ {stats.SIGNIFICANCE_LEVEL}).")
+
+                with st.expander("🔬 Pairwise significance (McNemar)", expanded=False):
+                    st.table([
+                        {
+                            "Model A": model_a,
+                            "Model B": model_b,
+                            "Only A correct": only_a,
+                            "Only B correct": only_b,
+                            "p-value": f"{p_value:.4f}",
+                            "Significant": "✓" if p_value < stats.SIGNIFICANCE_LEVEL else ""
+                        }
+                        for (model_a, model_b), (only_a, only_b, p_value) in pairwise_tests.items()
+                    ])
+
+                # Triage: compare with models evaluated in earlier runs on the same questions
+                difficulty_index = get_difficulty_index(storage.file_version(storage.DIFFICULTY_INDEX_FILE))
+                result_question_ids = {int(q_id) for q_id in matrix.question_ids}
+                historical_counts = stats.subset_accuracy(difficulty_index, result_question_ids, exclude_models=set(model_stats))
+                if historical_counts:
+                    comparison_rows = [
+                        {"Model": model, "Source": "This run", "Correct": s['correct'], "Total": s['total'],
+                         "Accuracy": s['correct'] / s['total'] * 100 if s['total'] else 0}
+                        for model, s in model_stats.items()
+                    ] + [
+                        {"Model": model, "Source": "Earlier runs", "Correct": c, "Total": t, "Accuracy": c / t * 100}
+                        for model, (c, t) in historical_counts.items()
+                    ]
+                    comparison_rows.sort(key=lambda row: row['Accuracy'], reverse=True)
+                    for row in comparison_rows:
+                        row['Accuracy'] = f"{row['Accuracy']:.1f}%"
+                    st.markdown("#### 📚 Compared With Earlier Runs (Same Questions)")
+                    st.table(comparison_rows)
+
+                # Batched-mode parity against single-question answers
+                parity_rows = compute_batch_parity(results)
+                if parity_rows:
+                    st.markdown("#### 📦 Batched vs. Single-Question Parity")
+                    st.table(parity_rows)
+
+                # Answer extraction quality, with offline re-scoring from stored raw responses
+                extraction_rows = compute_extraction_quality(results)
+                if extraction_rows:
+                    st.markdown("#### 🧩 Answer Extraction")
+                    st.table(extraction_rows)
+                    if st.button("🔁 Re-score from raw responses", key="rescore_btn",
+                                 help="Re-parse archived model responses with the current extractors and answer keys - no API calls"):
+                        rescored, summary = rescore.rescore_results(results, all_questions)
+                        storage.save_results(rescored)
+                        storage.update_difficulty_index(rescored)
+                        st.toast(f"Re-scored {summary['results']} results ({summary['changed_answers']} answers, "
+                                 f"{summary['changed_correct']} scores changed, {summary['not_rescorable']} "
+                                 f"multi-sample/shuffled left unchanged)", icon="🔁")
+                        st.rerun()
+
+                # Multi-sample answer stability
+                stability_rows = compute_answer_stability(results)
+                if stability_rows:
+                    st.markdown("#### 🎲 Answer Stability")
+                    st.table(stability_rows)
+
+                # Answer-position bias under shuffled option orders
+                bias_rows = compute_position_bias(results)
+                if bias_rows:
+                    st.markdown("#### 🔀 Position Bias")
+                    st.table(bias_rows)
+                    st.caption("Choice shares vs. the share of orders with the key at each position; a low p-value means "
+                               "the model picks positions out of proportion to where the correct answers are")
+
                 # Per-Question Breakdown
                 st.markdown("---")
                 st.markdown("### 📋 Per-Question Breakdown")
 
+                # Question lookup by id (QuestionBank keeps a sorted id index)
+                questions_dict = all_questions
+
+                # Difficulty (% of models that got each question right), one value per matrix row
+                question_accuracy = matrix.question_accuracy() * 100
+
                 with st.expander("View detailed results for each question", expanded=False):
-                    # Group results by question_id
-                    question_results = {}
-                    for result in results:
-                        q_id = result['question_id']
-                        if q_id not in question_results:
-                            question_results[q_id] = []
-                        question_results[q_id].append(result)
-
-                    # Get all questions
-                    questions_dict = {q['id']: q for q in all_questions}
-
-                    # Display each question with results
-                    for q_id, q_results in sorted(question_results.items()):
+                    # Display each question with results (matrix rows are sorted by question id)
+                    for row, q_id in enumerate(matrix.question_ids):
+                        q_id = int(q_id)
                         question = questions_dict.get(q_id)
                         if not question:
                             continue
 
-                        # Calculate difficulty (% of models that got it right)
-                        total_attempts = len(q_results)
-                        correct_count = sum(1 for r in q_results if r['correct'])
-                        accuracy_pct = (correct_count / total_attempts * 100) if total_attempts > 0 else 0
+                        accuracy_pct = question_accuracy[row]
 
                         # Determine difficulty badge
                         if accuracy_pct >= 70:
@@ -1547,11 +3078,11 @@ def main():
 
                         # Build model responses HTML
                         responses_html = []
-                        for r in q_results:
-                            emoji = "✅" if r['correct'] else "❌"
-                            response_class = "model-response-correct" if r['correct'] else "model-response-incorrect"
+                        for model, selected, correct in matrix.responses(row):
+                            emoji = "✅" if correct else "❌"
+                            response_class = "model-response-correct" if correct else "model-response-incorrect"
                             responses_html.append(
-                                f"<span class='model-response-item {response_class}'>{emoji} {r['model']} → {r['selected']}</span>"
+                                f"<span class='model-response-item {response_class}'>{emoji} {model} → {selected}</span>"
                             )
 
                         # Question card
@@ -1579,26 +3110,19 @@ def main():
                 st.markdown("---")
                 st.markdown("### 🔥 Hardest Questions")
 
-                # Calculate difficulty for each question
-                question_difficulty = []
-                for q_id, q_results in question_results.items():
-                    question = questions_dict.get(q_id)
-                    if not question:
-                        continue
-
-                    total_attempts = len(q_results)
-                    correct_count = sum(1 for r in q_results if r['correct'])
-                    accuracy_pct = (correct_count / total_attempts * 100) if total_attempts > 0 else 0
-
-                    question_difficulty.append({
-                        'id': q_id,
-                        'question': question,
-                        'accuracy': accuracy_pct,
-                        'results': q_results
-                    })
-
-                # Sort by accuracy (lowest first) and take top 5
-                hardest_questions = sorted(question_difficulty, key=lambda x: x['accuracy'])[:5]
+                # Lowest-accuracy rows first (stable, so ties keep question id order); keep the top 5 still in the bank
+                hardest_questions = []
+                for row in np.argsort(question_accuracy, kind='stable'):
+                    question = questions_dict.get(int(matrix.question_ids[row]))
+                    if question:
+                        hardest_questions.append({
+                            'id': int(matrix.question_ids[row]),
+                            'row': row,
+                            'question': question,
+                            'accuracy': question_accuracy[row]
+                        })
+                    if len(hardest_questions) == 5:
+                        break
 
                 if hardest_questions:
                     st.markdown("<div class='status-info'>Questions with the lowest model accuracy</div>", unsafe_allow_html=True)
@@ -1607,7 +3131,7 @@ def main():
                         q_id = item['id']
                         question = item['question']
                         accuracy_pct = item['accuracy']
-                        q_results = item['results']
+                        row = item['row']
 
                         # Determine difficulty badge
                         if accuracy_pct >= 70:
@@ -1622,11 +3146,11 @@ def main():
 
                         # Build model responses HTML
                         responses_html = []
-                        for r in q_results:
-                            emoji = "✅" if r['correct'] else "❌"
-                            response_class = "model-response-correct" if r['correct'] else "model-response-incorrect"
+                        for model, selected, correct in matrix.responses(row):
+                            emoji = "✅" if correct else "❌"
+                            response_class = "model-response-correct" if correct else "model-response-incorrect"
                             responses_html.append(
-                                f"<span class='model-response-item {response_class}'>{emoji} {r['model']} → {r['selected']}</span>"
+                                f"<span class='model-response-item {response_class}'>{emoji} {model} → {selected}</span>"
                             )
 
                         # Question card
@@ -1656,25 +3180,17 @@ def main():
                 st.markdown("---")
                 st.markdown("### 🤝 Model Agreement Statistics")
 
-                # Calculate consensus for each question
-                total_questions = len(question_results)
-                full_consensus_count = 0
-                majority_consensus_count = 0
-
-                for q_id, q_results in question_results.items():
-                    # Get all selected answers
-                    selected_answers = [r['selected'] for r in q_results]
-                    unique_answers = set(selected_answers)
+                # Calculate consensus for each question from per-answer vote counts
+                total_questions = len(matrix)
+                answer_counts = matrix.answer_counts()
+                most_common_count = answer_counts.max(axis=1) if answer_counts.size else np.zeros(total_questions)
+                attempts = matrix.attempted.sum(axis=1)
 
-                    # Full consensus: all models chose the same answer
-                    if len(unique_answers) == 1:
-                        full_consensus_count += 1
+                # Full consensus: all models chose the same answer
+                full_consensus_count = int(np.count_nonzero(most_common_count == attempts))
 
-                    # Majority consensus: >50% chose the same answer
-                    if selected_answers:
-                        most_common_count = max(selected_answers.count(ans) for ans in unique_answers)
-                        if most_common_count > len(selected_answers) / 2:
-                            majority_consensus_count += 1
+                # Majority consensus: >50% chose the same answer
+                majority_consensus_count = int(np.count_nonzero(most_common_count > attempts / 2))
 
                 # Calculate percentages
                 full_consensus_pct = (full_consensus_count / total_questions * 100) if total_questions > 0 else 0
@@ -1740,12 +3256,136 @@ def main():
                 if st.button("📥 Download Results", use_container_width=True):
                     st.download_button(
                         label="Download JSON",
-                        data=json.dumps(results, indent=2),
+                        data=json.dumps(results.to_records(), indent=2),
                         file_name=f"eval_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                         mime="application/json"
                     )
             else:
                 st.markdown("<div class='status-info'>💡 No evaluation results yet. Run an evaluation to see results here.</div>", unsafe_allow_html=True)
 
+    # ==================== TAB 3: SEARCH BANK ====================
+    with tab3:
+        st.markdown("### 🔎 Search the Question Bank")
+
+        col_query, col_topic = st.columns([3, 1])
+        with col_query:
+            search_query = st.text_input("Search questions, options and reasoning", key="search_query",
+                                         placeholder="e.g. Miranda custodial interrogation")
+        with col_topic:
+            search_topic = st.selectbox("📚 Topic", ["All Topics"] + TOPICS, key="search_topic")
+
+        if search_query.strip():
+            start = time.perf_counter()
+            hits = search.search_questions(search_query, limit=50, topic=None if search_topic == "All Topics" else search_topic)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            st.markdown(f"<div class='status-info'>🔎 {len(hits)} result{'' if len(hits) == 1 else 's'} in {elapsed_ms:.0f} ms</div>", unsafe_allow_html=True)
+
+            all_questions = get_question_bank(storage.file_version(QUESTIONS_FILE))
+            for hit in hits:
+                question = all_questions.get(hit['id'])
+                if not question:
+                    continue
+                question_html = search.highlight(html.escape(hit['question']), "<mark>", "</mark>")
+                reasoning_html = ""
+                if hit['reasoning']:
+                    reasoning_html = f"<div class='reference-preview'>🧠 {search.highlight(html.escape(hit['reasoning']), '<mark>', '</mark>')}</div>"
+
+                st.markdown(f"""
+                <div class='eval-question-card'>
+                    <div class='eval-question-header'>
+                        <div class='eval-question-text'>Q{hit['id']}. {question_html}</div>
+                        <div class='eval-question-meta'>
+                            <span class='correct-answer-badge'>Answer: {question.get('correct_answer', '?')}</span>
+                            <span class='eval-topic-badge'>{html.escape(hit['topic'] or '')}</span>
+                        </div>
+                    </div>
+                    {reasoning_html}
+                </div>
+                """, unsafe_allow_html=True)
+        else:
+            st.markdown("<div class='status-info'>💡 Search by doctrine, case name or any words in the question, options or reasoning</div>", unsafe_allow_html=True)
+
+    with tab4:
+        st.markdown("### 🔑 Answer-Key Verification")
+        st.markdown(
+            "<div class='status-info'>💡 Several models answer every question blind; questions where they disagree with "
+            "the stored answer key are listed for review. Verdicts are cached per question, so only new or edited "
+            "questions are checked again.</div>",
+            unsafe_allow_html=True
+        )
+
+        model_names = list(MODELS.keys())
+        default_verifiers = [name for name in model_names if MODELS[name] in verification.DEFAULT_VERIFIER_MODELS]
+        verifier_models = st.multiselect("🧑‍⚖️ Verifier models", model_names, default=default_verifiers, key="verify_models")
+        verifier_ids = [MODELS[name] for name in verifier_models]
+
+        bank = get_question_bank(storage.file_version(QUESTIONS_FILE))
+        verdicts = get_verdicts(storage.file_version(verification.VERDICTS_FILE))
+        verification_jobs = get_verification_jobs()
+        verify_job = verification_jobs.get(st.session_state.get('verify_job_id'))
+        running_job = next((job for job in verification_jobs.values() if job.is_active), None)
+
+        if verifier_ids:
+            pending = verification.pending_checks(bank, verifier_ids, verdicts)
+            prompt_tokens = get_prompt_token_estimates(storage.file_version(QUESTIONS_FILE))
+            completion_history = get_completion_averages(storage.file_version(RESULTS_FILE))
+            estimated_cost = 0.0
+            for model_id in verifier_ids:
+                model_tokens = [prompt_tokens.get(question['id'], 0) for question, pending_model in pending if pending_model == model_id]
+                model_estimates, _ = costs.estimate_run_cost(model_tokens, [model_id], history=completion_history)
+                estimated_cost += model_estimates[model_id] or 0
+            st.caption(f"{len(pending)} check(s) pending for {len(bank)} questions · estimated cost ${estimated_cost:.2f}")
+
+            if st.button("🔑 Verify Answer Keys", use_container_width=True, disabled=running_job is not None or not pending):
+                verify_job = verification.VerificationJob(client, bank, verifier_ids).start()
+                verification_jobs[verify_job.id] = verify_job
+                st.session_state.verify_job_id = verify_job.id
+                st.rerun()
+        else:
+            st.warning("⚠️ Select at least one verifier model")
+
+        review_rows = verification.review_list(bank, verdicts, verifier_ids or None)
+        if review_rows:
+            flagged_count = sum(row['flagged'] for row in review_rows)
+            st.markdown(f"#### 🚩 Review List ({flagged_count} flagged, {len(review_rows)} with any disagreement)")
+            model_labels = {model_id: name for name, model_id in MODELS.items()}
+            st.table([
+                {
+                    "Question": f"Q{row['question_id']}",
+                    "Flag": "⚠️" if row['flagged'] else "",
+                    "Key": row['correct_answer'],
+                    "Consensus": row['consensus'],
+                    "Disagreement": f"{row['disagreement'] * 100:.0f}%",
+                    "Answers": ", ".join(f"{model_labels.get(m, m)}: {letter}" for m, letter in row['answers'].items())
+                }
+                for row in review_rows[:200]
+            ])
+
+            with st.expander("📋 Flagged questions", expanded=False):
+                for row in [r for r in review_rows if r['flagged']][:50]:
+                    question = bank.get(row['question_id'])
+                    if not question:
+                        continue
+                    options_html = "".join(f"<div>{html.escape(option)}</div>" for option in question.get('options', []))
+                    st.markdown(f"""
+                    <div class='eval-question-card'>
+                        <div class='eval-question-header'>
+                            <div class='eval-question-text'>Q{row['question_id']}. {html.escape(question.get('question', ''))}</div>
+                            <div class='eval-question-meta'>
+                                <span class='correct-answer-badge'>Key: {row['correct_answer']} · Consensus: {row['consensus']}</span>
+                                <span class='eval-topic-badge'>{html.escape(question.get('topic', 'Unknown'))}</span>
+                            </div>
+                        </div>
+                        <div class='reference-preview'>{options_html}</div>
+                        <div class='reference-preview'>🧠 {html.escape(question.get('reasoning', ''))}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+        elif verdicts:
+            st.markdown("<div class='status-success'>✅ No verified question disagrees with its answer key</div>", unsafe_allow_html=True)
+
+        # Live progress for the running (or just finished) verification job
+        if verify_job is not None:
+            render_verification_job(verify_job)
+
 if __name__ == "__main__":
     main()
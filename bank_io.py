@@ -0,0 +1,271 @@
+"""
+Bulk import/export for the Hallucinator question bank
+Streams JSON, JSONL, CSV and Parquet files in bounded memory
+
+Usage:
+    python bank_io.py import questions.jsonl
+    python bank_io.py import other_bank.json
+    python bank_io.py export bank.parquet --topic Evidence
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+import storage
+
+FORMATS = ("json", "jsonl", "csv", "parquet")
+OPTION_LETTERS = ["A", "B", "C", "D"]
+
+# Columns used for flat formats (CSV); options are spread across one column each
+CSV_COLUMNS = ["id", "question", "option_a", "option_b", "option_c", "option_d",
+               "correct_answer", "reasoning", "topic", "generated_by", "created_at"]
+
+# Rows buffered per Parquet record batch
+PARQUET_BATCH_SIZE = 1000
+
+
+def infer_format(path, fmt=None):
+    """Infer the file format from an explicit value or the file extension"""
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+    return fmt
+
+def validate_question(record):
+    """
+    Validate and normalize a single imported question record
+
+    Args:
+        record: Raw record dictionary
+
+    Returns:
+        Normalized question dictionary (without id)
+
+    Raises:
+        ValueError: If the record does not match the question schema
+    """
+    question_text = (record.get('question') or '').strip()
+    if not question_text:
+        raise ValueError("missing 'question'")
+
+    options = record.get('options')
+    if isinstance(options, str):
+        options = json.loads(options)
+    if options is None:
+        options = [record.get(f"option_{letter.lower()}") for letter in OPTION_LETTERS]
+    if not isinstance(options, (list, tuple)) or len(options) != len(OPTION_LETTERS):
+        raise ValueError("'options' must contain exactly 4 entries")
+
+    normalized_options = []
+    for letter, option in zip(OPTION_LETTERS, options):
+        option = (option or '').strip() if isinstance(option, str) else ''
+        if not option:
+            raise ValueError(f"option {letter} is empty")
+        # Accept both "A) text" and bare "text"
+        if option[:2].upper() in (f"{letter})", f"{letter}.", f"{letter}:"):
+            option = option[2:].strip()
+        normalized_options.append(f"{letter}) {option}")
+
+    correct_answer = (record.get('correct_answer') or '').strip().upper().rstrip(').')
+    if correct_answer not in OPTION_LETTERS:
+        raise ValueError(f"'correct_answer' must be one of A-D, got {record.get('correct_answer')!r}")
+
+    question_data = {
+        "question": question_text,
+        "options": normalized_options,
+        "correct_answer": correct_answer,
+        "reasoning": record.get('reasoning') or "",
+        "topic": record.get('topic') or "Unknown",
+    }
+    for field in ("generated_by", "created_at"):
+        if record.get(field):
+            question_data[field] = record[field]
+    return question_data
+
+# Readers
+def iter_records(path, fmt=None, on_error=None):
+    """
+    Stream raw records from a JSON array, JSONL, CSV or Parquet file
+
+    Args:
+        path: Input file path
+        fmt: Optional format, inferred from the extension if omitted
+        on_error: Optional callable(line number, message) for JSONL lines that
+            are not valid JSON; those lines are skipped. Without it they raise.
+
+    Returns:
+        Generator yielding record dictionaries
+    """
+    fmt = infer_format(path, fmt)
+
+    if fmt == "json":
+        # A JSON array like questions.json, streamed element by element
+        yield from storage.iter_json_array(path)
+
+    elif fmt == "jsonl":
+        with open(path, 'r') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    if on_error is None:
+                        raise
+                    on_error(line_no, f"invalid JSON ({e.msg})")
+                    continue
+                yield record
+
+    elif fmt == "csv":
+        with open(path, 'r', newline='') as f:
+            yield from csv.DictReader(f)
+
+    else:
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_SIZE):
+            yield from batch.to_pylist()
+
+def import_questions(path, fmt=None, max_errors=20):
+    """
+    Import questions from a file into the bank in a single write
+
+    Invalid records are skipped and reported.
+
+    Args:
+        path: Input file path
+        fmt: Optional format, inferred from the extension if omitted
+        max_errors: Maximum number of rejection messages to keep
+
+    Returns:
+        Tuple of (number imported, number rejected, list of rejection messages)
+    """
+    rejected = 0
+    unparsed = 0
+    errors = []
+
+    def reject(record_no, message):
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < max_errors:
+            errors.append(f"record {record_no}: {message}")
+
+    def skip_unparsed(line_no, message):
+        nonlocal unparsed
+        unparsed += 1
+        reject(line_no, message)
+
+    def valid_questions():
+        # Unparseable lines are numbered like records, so numbers match the file's records
+        for record_no, record in enumerate(iter_records(path, fmt, on_error=skip_unparsed), 1):
+            try:
+                yield validate_question(record)
+            except (ValueError, TypeError, AttributeError) as e:
+                reject(record_no + unparsed, e)
+
+    imported = storage.append_questions(valid_questions())
+    return imported, rejected, errors
+
+# Writers
+def export_questions(path, fmt=None, topic=None):
+    """
+    Export the bank to JSON, JSONL, CSV or Parquet, streaming question by question
+
+    Args:
+        path: Output file path
+        fmt: Optional format, inferred from the extension if omitted
+        topic: Optional topic filter
+
+    Returns:
+        Number of questions exported
+    """
+    fmt = infer_format(path, fmt)
+    questions = (q for q in storage.iter_questions() if topic is None or q.get('topic') == topic)
+    exported = 0
+
+    if fmt == "json":
+        with open(path, 'w') as f:
+            f.write("[")
+            for q in questions:
+                f.write(("\n  " if exported == 0 else ",\n  ") + json.dumps(q))
+                exported += 1
+            f.write("\n]\n" if exported else "]\n")
+
+    elif fmt == "jsonl":
+        with open(path, 'w') as f:
+            for q in questions:
+                f.write(json.dumps(q) + "\n")
+                exported += 1
+
+    elif fmt == "csv":
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            for q in questions:
+                row = dict(q)
+                for letter, option in zip(OPTION_LETTERS, q.get('options', [])):
+                    row[f"option_{letter.lower()}"] = option
+                writer.writerow(row)
+                exported += 1
+
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ("id", pa.int64()),
+            ("question", pa.string()),
+            ("options", pa.list_(pa.string())),
+            ("correct_answer", pa.string()),
+            ("reasoning", pa.string()),
+            ("topic", pa.string()),
+            ("generated_by", pa.string()),
+            ("created_at", pa.string()),
+        ])
+        with pq.ParquetWriter(path, schema) as writer:
+            batch = []
+            for q in questions:
+                batch.append({name: q.get(name) for name in schema.names})
+                exported += 1
+                if len(batch) >= PARQUET_BATCH_SIZE:
+                    writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                    batch = []
+            if batch:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+
+    return exported
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export for the question bank")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import questions from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=FORMATS)
+
+    export_parser = subparsers.add_parser("export", help="Export questions to a file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=FORMATS)
+    export_parser.add_argument("--topic")
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        imported, rejected, errors = import_questions(args.path, args.format)
+        print(f"✓ Imported {imported} question(s) into {storage.QUESTIONS_FILE}")
+        if rejected:
+            print(f"⚠ Rejected {rejected} invalid record(s):")
+            for error in errors:
+                print(f"   {error}")
+    else:
+        exported = export_questions(args.path, args.format, args.topic)
+        print(f"✓ Exported {exported} question(s) to {args.path}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
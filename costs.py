@@ -0,0 +1,160 @@
+"""
+Cost accounting for Hallucinator
+Per-model token pricing, the cost of each call from its reported usage,
+pre-run cost estimates and per-model spend summaries
+"""
+
+from collections import namedtuple
+
+import local_models
+
+# USD per million input and output tokens, and the completion tokens an
+# evaluation answer typically takes (reasoning models think before answering;
+# used for estimates until a model has usage history)
+Price = namedtuple("Price", ["input", "output", "completion_tokens"])
+
+PRICING = {
+    "anthropic/claude-sonnet-4.5": Price(3.00, 15.00, 40),
+    "anthropic/claude-opus-4.1": Price(15.00, 75.00, 40),
+    "anthropic/claude-haiku-4.5": Price(1.00, 5.00, 40),
+    "openai/gpt-5": Price(1.25, 10.00, 800),
+    "openai/gpt-5-mini": Price(0.25, 2.00, 600),
+    "openai/gpt-4.1": Price(2.00, 8.00, 20),
+    "openai/gpt-4o-mini": Price(0.15, 0.60, 20),
+    "google/gemini-2.5-pro": Price(1.25, 10.00, 800),
+    "google/gemini-2.5-flash": Price(0.30, 2.50, 400),
+}
+
+# Local models run on our own hardware
+FREE = Price(0.0, 0.0, 40)
+
+# Rough characters per token for English legal prose, for estimates only
+CHARS_PER_TOKEN = 4
+
+
+def get_price(model_id):
+    """Return the Price for a model ID, or None if it is not in the pricing table"""
+    if local_models.is_local(model_id):
+        return FREE
+    return PRICING.get(model_id)
+
+def call_cost(model_id, prompt_tokens, completion_tokens):
+    """
+    Cost of one call in USD
+
+    Args:
+        model_id: OpenRouter model ID
+        prompt_tokens: Input tokens
+        completion_tokens: Output tokens (including reasoning tokens)
+
+    Returns:
+        Cost in USD, or None if the model has no price
+    """
+    price = get_price(model_id)
+    if price is None:
+        return None
+    return (prompt_tokens * price.input + completion_tokens * price.output) / 1_000_000
+
+def usage_fields(model_id, usage, share=1.0):
+    """
+    Token and cost fields to store with a result
+
+    Args:
+        model_id: OpenRouter model ID
+        usage: response.usage of the call (may be None)
+        share: Fraction of the call attributed to this result (a batched call
+            is split evenly across its questions)
+
+    Returns:
+        Dictionary with prompt_tokens, completion_tokens and cost (cost only if
+        the model has a price); empty if the call reported no usage
+    """
+    if usage is None:
+        return {}
+    prompt_tokens = (getattr(usage, 'prompt_tokens', 0) or 0) * share
+    completion_tokens = (getattr(usage, 'completion_tokens', 0) or 0) * share
+    fields = {"prompt_tokens": round(prompt_tokens, 1), "completion_tokens": round(completion_tokens, 1)}
+    cost = call_cost(model_id, prompt_tokens, completion_tokens)
+    if cost is not None:
+        fields["cost"] = round(cost, 8)
+    return fields
+
+def add_costs(result, *other_results):
+    """Add the tokens and cost of extra calls made for a result (fallbacks, parity checks, samples)"""
+    for other in other_results:
+        for field in ("prompt_tokens", "completion_tokens", "cost"):
+            if other.get(field) is not None:
+                result[field] = round((result.get(field) or 0) + other[field], 8)
+    return result
+
+def estimate_tokens(text):
+    """Approximate token count of a text"""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def completion_averages(results, model_ids):
+    """
+    Mean completion tokens per call from past results
+
+    Args:
+        results: Iterable of result dictionaries
+        model_ids: Dictionary of model display name -> model ID
+
+    Returns:
+        Dictionary of model ID -> mean completion tokens, for models with usage history
+    """
+    totals = {}
+    for result in results:
+        tokens = result.get('completion_tokens')
+        model_id = model_ids.get(result['model'])
+        if tokens is None or model_id is None:
+            continue
+        total = totals.setdefault(model_id, [0.0, 0])
+        total[0] += tokens
+        total[1] += 1
+    return {model_id: total / count for model_id, (total, count) in totals.items() if count}
+
+def estimate_run_cost(prompt_tokens, model_ids, calls_per_prompt=1, history=None):
+    """
+    Estimate the cost of a run before it starts
+
+    Args:
+        prompt_tokens: Estimated input tokens of each prompt (see estimate_tokens)
+        model_ids: Model IDs to run every prompt on
+        calls_per_prompt: Calls per prompt and model (e.g. samples)
+        history: Optional model ID -> mean completion tokens (see completion_averages)
+
+    Returns:
+        Tuple of (model ID -> estimated USD, or None if the model has no price;
+        total USD over the priced models)
+    """
+    history = history or {}
+    total_prompt_tokens = sum(prompt_tokens)
+    estimates = {}
+    for model_id in model_ids:
+        price = get_price(model_id)
+        if price is None:
+            estimates[model_id] = None
+            continue
+        completion_tokens = history.get(model_id, price.completion_tokens)
+        estimates[model_id] = calls_per_prompt * call_cost(model_id, total_prompt_tokens, completion_tokens * len(prompt_tokens))
+    return estimates, sum(cost for cost in estimates.values() if cost is not None)
+
+def model_costs(results):
+    """
+    Spend per model
+
+    Args:
+        results: Iterable of result dictionaries
+
+    Returns:
+        Dictionary of model name -> {"cost": USD, "results": results with a cost}
+    """
+    totals = {}
+    for result in results:
+        cost = result.get('cost')
+        if cost is None:
+            continue
+        total = totals.setdefault(result['model'], {"cost": 0.0, "results": 0})
+        total['cost'] += cost
+        total['results'] += 1
+    return totals
@@ -0,0 +1,429 @@
+"""
+Background jobs for Hallucinator
+In-process worker pool that runs evaluations independently of the Streamlit
+script thread, persisting results as they complete
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import stats
+import storage
+
+# Maximum concurrent API calls across all running jobs
+EVAL_CONCURRENCY = 8
+
+# Results are checkpointed to disk every CHECKPOINT_BATCH_SIZE results or
+# CHECKPOINT_INTERVAL seconds, whichever comes first
+CHECKPOINT_BATCH_SIZE = 20
+CHECKPOINT_INTERVAL = 5.0
+
+# Run statuses that can be resumed from their checkpoint
+RESUMABLE_STATUSES = ("running", "cancelled", "failed", "budget_reached")
+
+# Adaptive (early-stopping) evaluation: questions per round, and the minimum
+# questions a model must answer before it can be dropped as settled
+ADAPTIVE_ROUND_SIZE = 10
+ADAPTIVE_MIN_QUESTIONS = 20
+ADAPTIVE_CONFIDENCE = 0.95
+
+
+class EvaluationJob:
+    """State of a single background evaluation run"""
+
+    def __init__(self, job_id, questions, models, completed_results=(), batch_size=1, samples=1, adaptive=False,
+                 budget=None, shuffled=False, parity_rate=0.0):
+        self.id = job_id
+        self.questions = list(questions)
+        self.models = list(models)
+        self.batch_size = batch_size
+        self.samples = samples
+        self.shuffled = shuffled  # Samples are evaluations under different option orders
+        self.parity_rate = parity_rate  # Batched mode: share of answers re-checked one at a time
+        self.adaptive = adaptive
+        self.stopped_models = {}  # Adaptive mode: model -> questions answered when its rank settled
+        self.total = len(self.questions) * len(self.models)
+        self.budget = budget  # Spend cap in USD, or None
+        self.status = "queued"  # "queued" | "running" | "complete" | "cancelled" | "budget_reached" | "failed"
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+        self._results = []
+        self.cost = 0.0
+        self._counts = {model: [0, 0, 0] for model in self.models}  # model -> [correct, answered, API errors]
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        for result in completed_results:
+            self.add_result(result)
+        self.resumed_count = len(self._results)
+        self.done_pairs = {(r['question_id'], r['model']) for r in self._results}
+
+        # Position of each question/model, used to restore a stable result order
+        self.question_positions = {q['id']: idx for idx, q in enumerate(self.questions)}
+        self.model_positions = {m: idx for idx, m in enumerate(self.models)}
+
+    @property
+    def completed(self):
+        return len(self._results)
+
+    @property
+    def is_active(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.cost >= self.budget
+
+    def cancel(self):
+        """Stop scheduling new calls; in-flight calls finish and are kept"""
+        self._cancelled.set()
+
+    def add_cost(self, cost):
+        """Count money spent on a call whose result is added later (a sample of a pair)"""
+        with self._lock:
+            self.cost += cost or 0
+
+    def add_result(self, result, cost_added=False):
+        with self._lock:
+            self._results.append(result)
+            if not cost_added:
+                self.cost += result.get('cost') or 0
+            counts = self._counts.get(result['model'])
+            if counts is not None:
+                if result['selected'] == "ERROR":
+                    counts[2] += 1
+                else:
+                    counts[0] += bool(result['correct'])
+                    counts[1] += 1
+
+    def snapshot(self):
+        """Return a copy of the results collected so far"""
+        with self._lock:
+            return list(self._results)
+
+    def results_since(self, position):
+        """
+        Results added since an earlier call, for views that apply updates incrementally
+
+        Args:
+            position: Position returned by the previous call (0 for all results)
+
+        Returns:
+            Tuple of (new results in arrival order, position to pass next time)
+        """
+        with self._lock:
+            return self._results[position:], len(self._results)
+
+    def manifest(self):
+        """Return the run manifest persisted alongside the checkpoint"""
+        return {
+            "run_id": self.id,
+            "status": self.status,
+            "question_ids": [q['id'] for q in self.questions],
+            "models": self.models,
+            "batch_size": self.batch_size,
+            "samples": self.samples,
+            "shuffled": self.shuffled,
+            "parity_rate": self.parity_rate,
+            "adaptive": self.adaptive,
+            "budget": self.budget,
+            "cost": round(self.cost, 6),
+            "stopped_models": self.stopped_models,
+            "total": self.total,
+            "completed": self.completed,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+    def model_counts(self):
+        """Return model -> (correct, answered) over the results so far, ignoring API errors"""
+        with self._lock:
+            return {model: (c[0], c[1]) for model, c in self._counts.items()}
+
+    def error_counts(self):
+        """Return model -> API errors over the results so far"""
+        with self._lock:
+            return {model: c[2] for model, c in self._counts.items()}
+
+    def ordered_results(self):
+        """Return results sorted by question order, then model order"""
+        return sorted(
+            self.snapshot(),
+            key=lambda r: (self.question_positions.get(r['question_id'], 0), self.model_positions.get(r['model'], 0))
+        )
+
+class JobRunner:
+    """
+    Runs evaluation jobs on a shared thread pool
+
+    One runner is shared by every session of the app, so jobs keep running when
+    the browser disconnects or the script reruns, and the pool bounds the total
+    number of concurrent API calls.
+    """
+
+    def __init__(self, max_workers=EVAL_CONCURRENCY):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eval-worker")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit_evaluation(self, evaluate_fn, questions, models, run_id=None, batch_size=1, samples=1, combine_fn=None,
+                          adaptive=False, batched_models=None, budget=None, shuffled=False, parity_rate=0.0):
+        """
+        Submit an evaluation job
+
+        Args:
+            evaluate_fn: Callable(question, model_name) returning a result dictionary,
+                or with batch_size > 1, Callable(questions, model_name) returning a
+                list of result dictionaries; with samples > 1 it is called as
+                evaluate_fn(question, model_name, sample index)
+            questions: Questions to evaluate
+            models: Model names to evaluate
+            run_id: Optional ID of a checkpointed run to resume; (question, model)
+                pairs already answered in its checkpoint are not re-evaluated
+            batch_size: Number of questions sent to a model per call
+            samples: Number of independent samples per (question, model) pair; the
+                sample calls share the runner's pool like any other call. A stopped
+                run keeps the samples of unfinished pairs as results marked
+                'incomplete', which a resumed run evaluates again
+            combine_fn: Callable(list of sample results) returning one result;
+                required when samples > 1
+            adaptive: Evaluate in rounds, in the given question order, and stop
+                querying a model once its leaderboard rank is statistically settled
+            batched_models: Optional dictionary of model name -> (batch_fn, batch size)
+                for models evaluated through their own batch function, e.g. local
+                models; batch_fn(questions, model_name) returns a list of results
+            budget: Optional spend cap in USD over the run (including resumed
+                results); once the cost of the calls made reaches it no new calls
+                are made, and calls already in flight finish and are kept
+            shuffled: Whether the samples are evaluations under different option
+                orders; recorded in the manifest so a resumed run keeps the mode
+            parity_rate: Share of batched answers evaluate_fn re-checks one at a
+                time; recorded in the manifest so a resumed run keeps it
+
+        Returns:
+            The submitted EvaluationJob
+        """
+        completed_results = []
+        if run_id:
+            question_ids = {q['id'] for q in questions}
+            completed_results = [
+                r for r in storage.load_run_results(run_id)
+                if r['question_id'] in question_ids and r['model'] in models and r.get('selected') != "ERROR"
+                and not r.get('incomplete')
+            ]
+            print(f"[DEBUG] Resuming run {run_id} with {len(completed_results)} completed evaluations")
+
+        if samples > 1 and (combine_fn is None or batch_size > 1 or batched_models):
+            raise ValueError("Multi-sample evaluation needs a combine_fn and cannot be batched")
+
+        job = EvaluationJob(run_id or uuid.uuid4().hex[:12], questions, models, completed_results, batch_size, samples, adaptive,
+                            budget, shuffled, parity_rate)
+        previous_manifest = storage.load_run_manifest(job.id) if run_id else None
+        if previous_manifest:
+            job.created_at = previous_manifest.get('created_at', job.created_at)
+            job.stopped_models = previous_manifest.get('stopped_models') or {}
+        storage.save_run_manifest(job.id, job.manifest())
+        with self._lock:
+            self._jobs[job.id] = job
+
+        thread = threading.Thread(target=self._run, args=(job, evaluate_fn, combine_fn, batched_models or {}), name=f"eval-job-{job.id}", daemon=True)
+        thread.start()
+        return job
+
+    def get(self, job_id):
+        """Return the job with the given id, or None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest_active(self):
+        """Return the most recently submitted job that is still running, or None"""
+        with self._lock:
+            active = [job for job in self._jobs.values() if job.is_active]
+        return active[-1] if active else None
+
+    def _run(self, job, evaluate_fn, combine_fn=None, batched_models=None):
+        job.status = "running"
+        storage.save_run_manifest(job.id, job.manifest())
+        print(f"[DEBUG] Job {job.id} started: {job.total - job.completed} of {job.total} evaluations remaining")
+
+        checkpoint = []
+        last_checkpoint = time.monotonic()
+        pending_samples = {}
+
+        def record(results):
+            # Add finished results to the job, combining samples and checkpointing in batches
+            nonlocal checkpoint, last_checkpoint
+            for result in results:
+                if job.samples > 1:
+                    # Count each sample's cost as it arrives, so the budget sees partial pairs
+                    job.add_cost(result.get('cost'))
+                    pair = (result['question_id'], result['model'])
+                    pending_samples.setdefault(pair, []).append(result)
+                    if len(pending_samples[pair]) < job.samples:
+                        continue
+                    result = combine_fn(pending_samples.pop(pair))
+                job.add_result(result, cost_added=job.samples > 1)
+                checkpoint.append(result)
+
+            if len(checkpoint) >= CHECKPOINT_BATCH_SIZE or time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL:
+                storage.append_run_results(job.id, checkpoint)
+                # Keep the manifest's progress in step with the log, for resuming after a crash
+                storage.save_run_manifest(job.id, job.manifest())
+                checkpoint = []
+                last_checkpoint = time.monotonic()
+
+        def record_incomplete():
+            # Keep the paid samples of pairs a stopped run did not finish; resuming re-evaluates them
+            for sample_results in pending_samples.values():
+                result = combine_fn(sample_results)
+                result['incomplete'] = True
+                job.add_result(result, cost_added=True)
+                checkpoint.append(result)
+            pending_samples.clear()
+
+        try:
+            if job.adaptive:
+                self._run_adaptive(job, evaluate_fn, record, batched_models)
+            else:
+                for future in as_completed(self._schedule(job, evaluate_fn, job.questions, job.models, batched_models)):
+                    record(future.result())
+            record_incomplete()
+
+            # Replace the results file with the finished (or partial, if cancelled) run
+            storage.save_results(job.ordered_results())
+            storage.update_difficulty_index(job.snapshot())
+            if job.cancelled:
+                job.status = "cancelled"
+            elif job.over_budget and job.completed < job.total:
+                job.status = "budget_reached"
+            else:
+                job.status = "complete"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            print(f"[DEBUG] Job {job.id} failed: {str(e)}")
+        finally:
+            try:
+                record_incomplete()
+            except Exception as e:
+                print(f"[DEBUG] Job {job.id}: could not keep incomplete samples: {str(e)}")
+            if checkpoint:
+                storage.append_run_results(job.id, checkpoint)
+            job.finished_at = datetime.now().isoformat()
+            storage.save_run_manifest(job.id, job.manifest())
+            print(f"[DEBUG] Job {job.id} {job.status}: {job.completed}/{job.total} evaluations")
+
+    def _schedule(self, job, evaluate_fn, questions, models, batched_models=None):
+        """Submit the pending (question, model) pairs to the pool and return the futures"""
+        batched_models = batched_models or {}
+        futures = []
+
+        # Pack each batched model's pending questions into batches; models run in parallel
+        for model_name in models:
+            if model_name in batched_models:
+                batch_fn, batch_size = batched_models[model_name]
+            elif job.batch_size > 1:
+                batch_fn, batch_size = evaluate_fn, job.batch_size
+            else:
+                continue
+            pending = [q for q in questions if (q['id'], model_name) not in job.done_pairs]
+            for start in range(0, len(pending), batch_size):
+                futures.append(self._executor.submit(
+                    self._evaluate_batch, job, batch_fn, pending[start:start + batch_size], model_name
+                ))
+        if job.batch_size > 1:
+            return futures
+
+        # One call per sample; samples of a pair are combined once all have arrived
+        return futures + [
+            self._executor.submit(self._evaluate, job, evaluate_fn, question, model_name, sample)
+            for question in questions
+            for model_name in models
+            if model_name not in batched_models and (question['id'], model_name) not in job.done_pairs
+            for sample in range(job.samples)
+        ]
+
+    def _run_adaptive(self, job, evaluate_fn, record, batched_models=None):
+        """
+        Evaluate in rounds and drop models whose rank has settled
+
+        After each round every model gets a Wilson interval on its accuracy; a model
+        whose interval no longer overlaps any other model's is not queried again.
+        """
+        active = [m for m in job.models if m not in job.stopped_models]
+        for start in range(0, len(job.questions), ADAPTIVE_ROUND_SIZE):
+            if job.cancelled or job.over_budget or not active:
+                break
+
+            round_questions = job.questions[start:start + ADAPTIVE_ROUND_SIZE]
+            for future in as_completed(self._schedule(job, evaluate_fn, round_questions, active, batched_models)):
+                record(future.result())
+
+            counts = job.model_counts()
+            settled = stats.settled_models(counts, ADAPTIVE_CONFIDENCE, ADAPTIVE_MIN_QUESTIONS)
+            for model in active:
+                if model in settled:
+                    job.stopped_models[model] = counts[model][1]
+                    print(f"[DEBUG] Job {job.id}: {model} settled after {counts[model][1]} questions")
+            active = [m for m in active if m not in settled]
+
+    def resumable_runs(self):
+        """
+        Return manifests of checkpointed runs that can be resumed
+
+        Includes runs interrupted by a restart (still marked running on disk but not
+        running in this process) as well as stopped and failed runs.
+        """
+        runs = []
+        for manifest in storage.list_runs():
+            job = self.get(manifest['run_id'])
+            if job is not None and job.is_active:
+                continue
+            if manifest.get('status') in RESUMABLE_STATUSES and manifest.get('completed', 0) < manifest.get('total', 0):
+                runs.append(manifest)
+        return runs
+
+    def discard_run(self, run_id):
+        """Mark a checkpointed run as discarded so it is no longer offered for resume"""
+        manifest = storage.load_run_manifest(run_id)
+        if manifest:
+            manifest['status'] = "discarded"
+            storage.save_run_manifest(run_id, manifest)
+
+    @staticmethod
+    def _error_results(questions, model_name, error):
+        """Error results for a call that raised, so one failure does not stop the job"""
+        print(f"[DEBUG] Evaluation of {len(questions)} question(s) with {model_name} raised: {str(error)}")
+        timestamp = datetime.now().isoformat()
+        return [
+            {"question_id": q['id'], "model": model_name, "selected": "ERROR", "correct": False, "timestamp": timestamp, "error": str(error)}
+            for q in questions
+        ]
+
+    @staticmethod
+    def _evaluate(job, evaluate_fn, question, model_name, sample=0):
+        if job.cancelled or job.over_budget:
+            return []
+        try:
+            if job.samples > 1:
+                return [evaluate_fn(question, model_name, sample)]
+            return [evaluate_fn(question, model_name)]
+        except Exception as e:
+            return JobRunner._error_results([question], model_name, e)
+
+    @staticmethod
+    def _evaluate_batch(job, evaluate_fn, questions, model_name):
+        if job.cancelled or job.over_budget:
+            return []
+        try:
+            return evaluate_fn(questions, model_name)
+        except Exception as e:
+            return JobRunner._error_results(questions, model_name, e)
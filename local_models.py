@@ -0,0 +1,143 @@
+"""
+Local model backend for Hallucinator
+Evaluates against models served on our own hardware by an OpenAI-compatible
+server (llama.cpp, vLLM, llama-cpp-python), submitting prompts in large
+batches so the server can batch them on the accelerator or CPU
+
+Point HALLUCINATOR_LOCAL_URL at the server (e.g. http://localhost:8000/v1);
+every model it serves is added to the model list as "<name> (local)".
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+import transport
+
+LOCAL_URL_ENV = "HALLUCINATOR_LOCAL_URL"
+
+# Provider name in routing and the model ID prefix of local models
+LOCAL_PROVIDER = "local"
+LOCAL_MODEL_PREFIX = "local/"
+LOCAL_DISPLAY_SUFFIX = " (local)"
+
+# Questions per batch submitted to the server. All prompts of a batch are in
+# flight at once, which lets continuous-batching servers (vLLM, llama.cpp with
+# --parallel) run them together; bounded by the local connection pool.
+LOCAL_BATCH_SIZE = transport.POOL_MAX_CONNECTIONS
+
+# Local servers do not check the API key, but the client needs one
+LOCAL_API_KEY = "not-needed"
+
+# Seconds to wait for the server's model list before assuming it is down
+DISCOVERY_TIMEOUT = 2.0
+
+
+def local_server_url():
+    """Base URL of the local server, or None if none is configured"""
+    return os.getenv(LOCAL_URL_ENV) or None
+
+def is_local(model_id):
+    """Whether a model ID refers to a local model"""
+    return model_id.startswith(LOCAL_MODEL_PREFIX)
+
+def discover_models(base_url=None, timeout=DISCOVERY_TIMEOUT):
+    """
+    List the models served by the local server
+
+    Args:
+        base_url: Server base URL (defaults to HALLUCINATOR_LOCAL_URL)
+        timeout: Seconds to wait for the server
+
+    Returns:
+        List of served model names (empty if no server is configured or it is down)
+    """
+    base_url = base_url or local_server_url()
+    if not base_url:
+        return []
+    try:
+        response = httpx.get(f"{base_url.rstrip('/')}/models", timeout=timeout)
+        response.raise_for_status()
+        served = [model['id'] for model in response.json().get('data', [])]
+    except Exception as e:
+        print(f"[DEBUG] Local server at {base_url} unavailable: {str(e)}")
+        return []
+    print(f"[DEBUG] Local server at {base_url} serves: {served}")
+    return served
+
+def model_entries(served_models):
+    """
+    Model list entries for served local models
+
+    Args:
+        served_models: Model names from discover_models
+
+    Returns:
+        Dictionary of display name -> model ID, in the same form as app.MODELS;
+        models are shown by their base name unless another served model shares it
+    """
+    base_names = [name.rsplit('/', 1)[-1] for name in served_models]
+    return {
+        f"{base if base_names.count(base) == 1 else name}{LOCAL_DISPLAY_SUFFIX}": f"{LOCAL_MODEL_PREFIX}{name}"
+        for name, base in zip(served_models, base_names)
+    }
+
+class LocalBackend:
+    """
+    Batched chat completions against the local server
+
+    Uses its own connection pool, so a large local batch never queues behind
+    (or blocks) hosted API calls.
+
+    Args:
+        base_url: Server base URL (defaults to HALLUCINATOR_LOCAL_URL)
+        max_parallel: Prompts in flight at once
+    """
+
+    def __init__(self, base_url=None, max_parallel=LOCAL_BATCH_SIZE):
+        self.base_url = base_url or local_server_url()
+        http_client, self.http_transport = transport.build_http_client()
+        self.client = transport.create_client(self.base_url, LOCAL_API_KEY, http_client=http_client)
+        self._executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="local-batch")
+
+    def complete_batch(self, model_id, prompts, temperature=0):
+        """
+        Submit a batch of single-turn prompts
+
+        Args:
+            model_id: Local model ID (with LOCAL_MODEL_PREFIX)
+            prompts: List of user prompts
+            temperature: Sampling temperature
+
+        Returns:
+            List in prompt order of (response text, usage) tuples, or the
+            exception for prompts that failed
+        """
+        model = model_id[len(LOCAL_MODEL_PREFIX):] if is_local(model_id) else model_id
+
+        def complete(prompt):
+            try:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    **transport.call_options("eval")
+                )
+                return response.choices[0].message.content or "", getattr(response, 'usage', None)
+            except Exception as e:
+                return e
+
+        return list(self._executor.map(complete, prompts))
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+def get_backend():
+    """Return the process-wide backend for HALLUCINATOR_LOCAL_URL"""
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            _default_backend = LocalBackend()
+        return _default_backend
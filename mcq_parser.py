@@ -0,0 +1,157 @@
+"""
+Local MCQ parser for Hallucinator
+Deterministic parsing of well-formatted multiple-choice question dumps, used
+before falling back to LLM-based reference extraction
+"""
+
+import re
+
+# Matches the start of a numbered question ("12.", "12)", "Question 12:", "Q12.")
+QUESTION_BOUNDARY_PATTERN = re.compile(r'^[ \t]*(?:(?:Question|Q)[ \t]*\d+\b|\d+[.)])', re.IGNORECASE | re.MULTILINE)
+
+# Question number prefix to strip from the question text
+QUESTION_NUMBER_PATTERN = re.compile(r'^\s*(?:(?:Question|Q)\s*\d+\s*[.):\-]?|\d+[.)])\s*', re.IGNORECASE)
+
+# Option lines: "A) text", "(A) text", "A. text", "a) text", "A: text"
+OPTION_PATTERN = re.compile(r'^\s*\(?([A-Da-d])[).:]\s*(.*)$')
+
+# Answer lines: "Answer: C", "Correct answer - (C)", "Ans: c", "Answer: C) text"
+ANSWER_PATTERN = re.compile(r'^\s*(?:correct\s+)?(?:answer|ans)\b\s*(?:is)?\s*[:.\-–]?\s*\(?([A-Da-d])\b', re.IGNORECASE)
+
+# Explanation lines: "Explanation: ...", "Reasoning: ...", "Rationale: ..."
+EXPLANATION_PATTERN = re.compile(r'^\s*(?:explanation|reasoning|rationale)\s*[:\-–]\s*(.*)$', re.IGNORECASE)
+
+# Inline option markers, used to tell question-like leftovers from headers and prose
+INLINE_OPTION_PATTERN = re.compile(r'(?:^|\s)\(?[A-D][).]\s')
+
+OPTION_LETTERS = ["A", "B", "C", "D"]
+
+
+def _split_blocks(text):
+    """Split text into blocks that each start at a question boundary"""
+    starts = [m.start() for m in QUESTION_BOUNDARY_PATTERN.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+
+
+def parse_question_block(block):
+    """
+    Parse a single question block
+
+    Args:
+        block: Text of one question, its options and optional answer/explanation
+
+    Returns:
+        Question dictionary, or None if the block is not a well-formed 4-option MCQ
+    """
+    question_lines = []
+    options = {}
+    current_option = None
+    answer = None
+    explanation_lines = None
+
+    for line in block.splitlines():
+        if explanation_lines is not None:
+            explanation_lines.append(line)
+            continue
+
+        answer_match = ANSWER_PATTERN.match(line)
+        if answer_match and options:
+            answer = answer_match.group(1).upper()
+            current_option = None
+            continue
+
+        explanation_match = EXPLANATION_PATTERN.match(line)
+        if explanation_match and options:
+            explanation_lines = [explanation_match.group(1)]
+            continue
+
+        option_match = OPTION_PATTERN.match(line)
+        if option_match and answer is None:
+            letter = option_match.group(1).upper()
+            expected = OPTION_LETTERS[len(options)] if len(options) < len(OPTION_LETTERS) else None
+            if letter == expected:
+                options[letter] = [option_match.group(2).strip()]
+                current_option = letter
+                continue
+
+        if not line.strip():
+            continue
+
+        if current_option is not None:
+            # Continuation of a wrapped option
+            options[current_option].append(line.strip())
+        elif not options:
+            question_lines.append(line.strip())
+        else:
+            return None
+
+    question_text = QUESTION_NUMBER_PATTERN.sub('', " ".join(question_lines), count=1).strip()
+    if not question_text or list(options) != OPTION_LETTERS:
+        return None
+    if any(not " ".join(parts).strip() for parts in options.values()):
+        return None
+
+    return {
+        "question": question_text,
+        "options": [f"{letter}) {' '.join(options[letter]).strip()}" for letter in OPTION_LETTERS],
+        "correct_answer": answer or "unknown",
+        "reasoning": " ".join(line.strip() for line in explanation_lines or [] if line.strip()),
+        "has_answer": answer is not None
+    }
+
+
+def parse_mcq_text(text):
+    """
+    Parse well-formatted MCQs out of text
+
+    Args:
+        text: Text containing numbered multiple-choice questions
+
+    Returns:
+        Tuple of (list of question dictionaries, unparsed text). The unparsed text
+        holds only the blocks that look like questions but could not be parsed;
+        headers and prose without answer options are dropped.
+    """
+    questions = []
+    unparsed_blocks = []
+
+    for block in _split_blocks(text):
+        if not block.strip():
+            continue
+        parsed = parse_question_block(block)
+        if parsed:
+            questions.append(parsed)
+        elif len(INLINE_OPTION_PATTERN.findall(block)) >= 2:
+            unparsed_blocks.append(block)
+
+    return questions, "".join(unparsed_blocks)
+
+
+def build_reference_data(questions):
+    """
+    Build a reference data dictionary from locally parsed questions
+
+    Args:
+        questions: List of parsed question dictionaries
+
+    Returns:
+        Dictionary in the same shape as the LLM extraction output
+    """
+    if not questions:
+        return {"count": 0, "questions": [], "error": "No multiple-choice questions detected in the provided text."}
+
+    question_words = sum(len(q['question'].split()) for q in questions) / len(questions)
+    option_words = sum(len(o.split()) - 1 for q in questions for o in q['options']) / (len(questions) * len(OPTION_LETTERS))
+
+    return {
+        "count": len(questions),
+        "questions": questions,
+        "style_notes": (
+            f"Questions average {question_words:.0f} words with 4 options averaging "
+            f"{option_words:.0f} words each."
+        ),
+        "difficulty_notes": "",
+        "error": None
+    }
@@ -3,18 +3,11 @@ Prompts for Hallucinator - Legal Benchmark Generator & Evaluator
 All LLM prompts used throughout the application
 """
 
-def get_question_generation_prompt(topic, reference_data=None):
-    """
-    Get the prompt for generating a legal MCQ question
+import functools
+import json
 
-    Args:
-        topic: The legal topic for the question
-        reference_data: Optional dictionary containing reference question data
 
-    Returns:
-        String prompt for question generation
-    """
-    base_requirements = f"""Generate a legal multiple-choice question on the topic of {topic}.
+GENERATION_REQUIREMENTS = """Generate a legal multiple-choice question on the requested topic.
 
 Requirements:
 - Create a moderately difficult to difficult question (no easy questions)
@@ -25,39 +18,105 @@ Requirements:
 - Include a detailed reasoning trace explaining why the correct answer is right and why the wrong answers are incorrect
 
 Output format (valid JSON only):
-{{
+{
     "question": "The question text here",
     "options": ["A) First option", "B) Second option", "C) Third option", "D) Fourth option"],
     "correct_answer": "C",
     "reasoning": "Detailed explanation of why C is correct and why A, B, D are incorrect"
-}}
+}"""
+
+
+GENERATION_TOPIC_TEMPLATE = """Topic: {topic}
 
 Respond only with valid JSON, no additional text."""
 
-    if reference_data:
-        # Build reference context
-        reference_context = "\n\nREFERENCE QUESTIONS TO MATCH:\n"
-        reference_context += "Generate questions matching the style, difficulty, length, and structure of these reference questions:\n\n"
 
-        for idx, ref_q in enumerate(reference_data.get('questions', []), 1):
-            reference_context += f"Reference Question {idx}:\n"
-            reference_context += f"Question: {ref_q.get('question', 'N/A')}\n"
-            reference_context += f"Options: {', '.join(ref_q.get('options', []))}\n"
-            reference_context += f"Correct Answer: {ref_q.get('correct_answer', 'N/A')}\n"
-            if ref_q.get('reasoning'):
-                reference_context += f"Reasoning: {ref_q.get('reasoning')}\n"
-            reference_context += "\n"
+def _build_reference_context(reference_data):
+    """
+    Build the reference block that precedes the generation requirements
+
+    Args:
+        reference_data: Dictionary containing reference question data
+
+    Returns:
+        String describing the reference questions, style and difficulty
+    """
+    reference_context = "REFERENCE QUESTIONS TO MATCH:\n"
+    reference_context += "Generate questions matching the style, difficulty, length, and structure of these reference questions:\n\n"
+
+    for idx, ref_q in enumerate(reference_data.get('questions', []), 1):
+        reference_context += f"Reference Question {idx}:\n"
+        reference_context += f"Question: {ref_q.get('question', 'N/A')}\n"
+        reference_context += f"Options: {', '.join(ref_q.get('options', []))}\n"
+        reference_context += f"Correct Answer: {ref_q.get('correct_answer', 'N/A')}\n"
+        if ref_q.get('reasoning'):
+            reference_context += f"Reasoning: {ref_q.get('reasoning')}\n"
+        reference_context += "\n"
+
+    # Add style notes if available
+    if reference_data.get('style_notes'):
+        reference_context += f"\nStyle Characteristics:\n{reference_data.get('style_notes')}\n"
+
+    if reference_data.get('difficulty_notes'):
+        reference_context += f"\nDifficulty Level: {reference_data.get('difficulty_notes')}\n"
+
+    return reference_context
 
-        # Add style notes if available
-        if reference_data.get('style_notes'):
-            reference_context += f"\nStyle Characteristics:\n{reference_data.get('style_notes')}\n"
 
-        if reference_data.get('difficulty_notes'):
-            reference_context += f"\nDifficulty Level: {reference_data.get('difficulty_notes')}\n"
+@functools.lru_cache(maxsize=32)
+def _cached_generation_prefix(reference_json):
+    """Build the generation prefix for a serialized reference (memoized)"""
+    if not reference_json:
+        return GENERATION_REQUIREMENTS
+
+    reference_data = json.loads(reference_json)
+    return _build_reference_context(reference_data) + "\n" + GENERATION_REQUIREMENTS
+
+
+def get_question_generation_prefix(reference_data=None):
+    """
+    Get the stable, cacheable part of the question generation prompt
+
+    The prefix holds everything that does not change between generation calls
+    (reference questions, style/difficulty notes and output requirements), so
+    providers can serve it from their prompt cache. It is built once per
+    distinct reference and memoized.
+
+    Args:
+        reference_data: Optional dictionary containing reference question data
+
+    Returns:
+        String prefix for question generation
+    """
+    reference_json = json.dumps(reference_data, sort_keys=True) if reference_data else ""
+    return _cached_generation_prefix(reference_json)
+
+
+def get_question_generation_suffix(topic):
+    """
+    Get the varying part of the question generation prompt
+
+    Args:
+        topic: The legal topic for the question
+
+    Returns:
+        String suffix for question generation
+    """
+    return GENERATION_TOPIC_TEMPLATE.format(topic=topic)
+
+
+def get_question_generation_prompt(topic, reference_data=None):
+    """
+    Get the prompt for generating a legal MCQ question
 
-        return reference_context + "\n" + base_requirements
+    Args:
+        topic: The legal topic for the question
+        reference_data: Optional dictionary containing reference question data
 
-    return base_requirements
+    Returns:
+        String prompt for question generation
+    """
+    return get_question_generation_prefix(reference_data) + "\n\n" + get_question_generation_suffix(topic)
 
 
 EVALUATION_PROMPT_TEMPLATE = """Answer this multiple choice question.
@@ -74,6 +133,49 @@ Example INCORRECT response: The answer is C because...
 Your answer (single letter only):"""
 
 
+BATCH_EVALUATION_PROMPT_TEMPLATE = """Answer each of the following {count} multiple choice questions.
+
+CRITICAL INSTRUCTION: Respond with ONLY the answer vector - one entry per question, in order, formatted as
+<question number>:<letter>, separated by spaces. Each letter MUST be A, B, C, or D. Nothing else.
+
+{questions}
+
+Example CORRECT response for 3 questions: 1:C 2:A 3:D
+Example INCORRECT response: 1. The answer is C because...
+
+Your answers (answer vector only):"""
+
+
+BATCH_EVALUATION_QUESTION_TEMPLATE = """Question {number}: {question}
+
+{options}"""
+
+
+VALIDATION_PROMPT_TEMPLATE = """You are an expert legal exam reviewer. A drafted multiple-choice question is below,
+with its answer key and the drafter's reasoning.
+
+Check the answer key: is the keyed answer correct, and is every other option (distractor) actually wrong?
+Flag ambiguity, more than one defensible answer, factual or legal errors, and reasoning that does not
+support the key.
+
+Question: {question}
+
+{options}
+
+Keyed answer: {correct_answer}
+
+Drafted reasoning: {reasoning}
+
+Output format (valid JSON only):
+{{
+    "key_correct": true,
+    "distractors_wrong": true,
+    "issues": ["Short description of each problem found, empty if none"]
+}}
+
+Respond only with valid JSON, no additional text."""
+
+
 REFERENCE_EXTRACTION_PROMPT = """You are an expert at analyzing and extracting multiple-choice questions from unstructured text.
 
 Analyze the following text and extract ALL multiple-choice questions (MCQs) you find. For each question:
@@ -137,6 +239,46 @@ def get_evaluation_prompt(question, options):
     return EVALUATION_PROMPT_TEMPLATE.format(question=question, options=options_text)
 
 
+def get_batch_evaluation_prompt(questions):
+    """
+    Get the prompt for evaluating several questions in one request
+
+    Args:
+        questions: List of question dictionaries with 'question' and 'options'
+
+    Returns:
+        String prompt asking for an answer vector like "1:C 2:A"
+    """
+    questions_text = "\n\n".join(
+        BATCH_EVALUATION_QUESTION_TEMPLATE.format(
+            number=number,
+            question=q['question'],
+            options="\n".join(q['options'])
+        )
+        for number, q in enumerate(questions, 1)
+    )
+    return BATCH_EVALUATION_PROMPT_TEMPLATE.format(count=len(questions), questions=questions_text)
+
+
+def get_validation_prompt(question_data):
+    """
+    Get the prompt for validating a drafted question's answer key
+
+    Args:
+        question_data: Drafted question dictionary
+
+    Returns:
+        String prompt asking for a key/distractor check (the validator's own answer
+        comes from a separate, key-free evaluation prompt)
+    """
+    return VALIDATION_PROMPT_TEMPLATE.format(
+        question=question_data.get('question', ''),
+        options="\n".join(question_data.get('options', [])),
+        correct_answer=question_data.get('correct_answer', ''),
+        reasoning=question_data.get('reasoning', '')
+    )
+
+
 def get_reference_extraction_prompt(reference_text):
     """
     Get the prompt for extracting reference questions
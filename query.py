@@ -0,0 +1,169 @@
+"""
+Question bank queries for Hallucinator
+Inverted and sorted indexes for filtering the bank by topic, generating model,
+creation date, past difficulty and text
+"""
+
+import re
+import threading
+from bisect import bisect_left, insort
+
+# Words indexed for text search (lowercased alphanumeric runs)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Split text into a set of lowercase search tokens"""
+    return set(TOKEN_PATTERN.findall((text or "").lower()))
+
+class QuestionIndex:
+    """
+    Query indexes over the question bank
+
+    Topic, generating model and text tokens are inverted indexes (value -> set
+    of ids), so a filter costs a set lookup and the intersection starts from the
+    smallest candidate set. Creation time and past accuracy are sorted
+    (value, id) lists answered with bisect range scans.
+
+    sync() keeps a fingerprint of each indexed question's fields: when the bank
+    file changes, questions with new ids are added incrementally and any edit or
+    removal rebuilds the index. Reads and syncs are serialized by a lock, since
+    one index is shared by every session.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.version = None
+        self.count = 0
+        self.max_id = 0
+        self._fingerprints = {}  # id -> fingerprint of the indexed fields
+        self._by_topic = {}
+        self._by_author = {}
+        self._by_token = {}
+        self._created = []  # sorted (created_at, id)
+        self._accuracy = []  # sorted (accuracy, id) for questions with past results
+        self._difficulty_version = None
+
+    @staticmethod
+    def fingerprint(question):
+        """Hashable summary of the fields a question is indexed by"""
+        return hash((question.get('topic'), question.get('generated_by'), question.get('created_at'),
+                     question.get('question', ''), tuple(question.get('options', []))))
+
+    def add(self, question):
+        """Index a single question"""
+        q_id = question['id']
+        self._fingerprints[q_id] = self.fingerprint(question)
+        self._by_topic.setdefault(question.get('topic') or "Unknown", set()).add(q_id)
+        if question.get('generated_by'):
+            self._by_author.setdefault(question['generated_by'], set()).add(q_id)
+        insort(self._created, (question.get('created_at') or "", q_id))
+
+        text = " ".join([question.get('question', '')] + list(question.get('options', [])))
+        for token in tokenize(text):
+            self._by_token.setdefault(token, set()).add(q_id)
+
+        self.count += 1
+        self.max_id = max(self.max_id, q_id)
+
+    def sync(self, bank, version):
+        """
+        Bring the index up to date with the bank
+
+        Args:
+            bank: storage.QuestionBank
+            version: storage.file_version of the questions file
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            new_questions = []
+            unchanged = 0
+            for question in bank:
+                previous = self._fingerprints.get(question['id'])
+                if previous is None:
+                    new_questions.append(question)
+                elif previous == self.fingerprint(question):
+                    unchanged += 1
+            if unchanged != self.count:
+                # Questions were edited, removed or renumbered; start over
+                print(f"[DEBUG] Rebuilding question index ({len(bank)} questions)")
+                self._reset()
+                new_questions = list(bank)
+            for question in new_questions:
+                self.add(question)
+            self.version = version
+
+    def set_difficulty(self, item_statistics, version):
+        """
+        Index per-question accuracy from past results
+
+        Args:
+            item_statistics: Output of stats.item_statistics
+            version: Version of the difficulty index the statistics came from
+        """
+        with self._lock:
+            if version != self._difficulty_version:
+                self._accuracy = sorted((accuracy, q_id) for q_id, (accuracy, _, _) in item_statistics.items())
+                self._difficulty_version = version
+
+    def topics(self):
+        with self._lock:
+            return sorted(self._by_topic)
+
+    def authors(self):
+        with self._lock:
+            return sorted(self._by_author)
+
+    def query(self, topic=None, generated_by=None, created_after=None, created_before=None,
+              min_accuracy=None, max_accuracy=None, unevaluated=False, text=None):
+        """
+        Find questions matching every given filter
+
+        Args:
+            topic: Exact topic
+            generated_by: Exact generating model name
+            created_after: Inclusive lower bound on created_at (ISO string)
+            created_before: Exclusive upper bound on created_at (ISO string)
+            min_accuracy: Inclusive lower bound on past model accuracy (0-1)
+            max_accuracy: Exclusive upper bound on past model accuracy (0-1)
+            unevaluated: Only questions without past results
+            text: Words that must all appear in the question or its options
+
+        Returns:
+            Sorted list of matching question ids
+        """
+        with self._lock:
+            return self._query(topic, generated_by, created_after, created_before, min_accuracy, max_accuracy, unevaluated, text)
+
+    def _query(self, topic, generated_by, created_after, created_before, min_accuracy, max_accuracy, unevaluated, text):
+        candidates = []
+        if topic is not None:
+            candidates.append(self._by_topic.get(topic, set()))
+        if generated_by is not None:
+            candidates.append(self._by_author.get(generated_by, set()))
+        for token in tokenize(text):
+            candidates.append(self._by_token.get(token, set()))
+
+        if created_after is not None or created_before is not None:
+            start = bisect_left(self._created, (created_after,)) if created_after is not None else 0
+            end = bisect_left(self._created, (created_before,)) if created_before is not None else len(self._created)
+            candidates.append({q_id for _, q_id in self._created[start:end]})
+
+        if min_accuracy is not None or max_accuracy is not None:
+            start = bisect_left(self._accuracy, (min_accuracy,)) if min_accuracy is not None else 0
+            end = bisect_left(self._accuracy, (max_accuracy,)) if max_accuracy is not None else len(self._accuracy)
+            candidates.append({q_id for _, q_id in self._accuracy[start:end]})
+
+        if not candidates:
+            matches = {q_id for _, q_id in self._created}
+        else:
+            candidates.sort(key=len)
+            matches = set(candidates[0]).intersection(*candidates[1:])
+
+        if unevaluated:
+            matches.difference_update(q_id for _, q_id in self._accuracy)
+        return sorted(matches)
@@ -0,0 +1,123 @@
+"""
+Offline re-scoring for Hallucinator
+Recomputes selected/correct for stored results from archived raw responses and
+the current answer keys, without any API calls
+
+Usage:
+    python rescore.py                  # re-score eval_results.json
+    python rescore.py --run 3f2a9c1b7d0e
+    python rescore.py --dry-run
+"""
+
+import argparse
+import sys
+import time
+
+import answer_extraction
+import response_archive
+import shuffling
+import storage
+
+
+def rescore_results(results, questions, archive=None):
+    """
+    Re-extract answers from archived raw responses and re-check them against the bank
+
+    'selected' is recomputed for results whose raw response is available (in
+    the archive, or inline for results from before the archive existed);
+    'correct' is recomputed for every result, so corrected answer keys apply
+    too. Answers given under shuffled option orders are mapped back to the
+    original labels, and the single-question answer of a batch parity check is
+    re-extracted from its own archived response. API errors and results for
+    questions no longer in the bank are kept as they are, and so are
+    multi-sample and shuffled results: they keep only the majority answer's
+    response, so their per-sample answers and vote cannot be recomputed.
+
+    Args:
+        results: Iterable of result dictionaries (or a ResultTable)
+        questions: storage.QuestionBank (or anything with .get(question_id))
+        archive: Optional ResponseArchive (defaults to the shared archive)
+
+    Returns:
+        Tuple of (rescored result list, summary dictionary with counts of
+        results, changed answers, changed correctness, missing responses and
+        results that are not rescorable)
+    """
+    archive = archive or response_archive.get_archive()
+    results = [r.to_dict() if hasattr(r, 'to_dict') else dict(r) for r in results]
+    responses = archive.get_many(
+        key for r in results for key in (r.get('response_key'), r.get('single_response_key')) if key
+    )
+    summary = {"results": len(results), "changed_answers": 0, "changed_correct": 0, "missing_responses": 0, "not_rescorable": 0}
+
+    rescored_results = []
+    for result in results:
+        question = questions.get(result['question_id'])
+        if question is None or result['selected'] == "ERROR":
+            rescored_results.append(result)
+            continue
+        if result.get('samples') or result.get('shuffle_choices'):
+            summary['not_rescorable'] += 1
+            rescored_results.append(result)
+            continue
+
+        rescored = dict(result)
+        model_id, raw_response = responses.get(result.get('response_key'), (None, result.get('raw_response')))
+        if raw_response is None:
+            summary['missing_responses'] += 1
+        elif result.get('batch_position'):
+            position = result['batch_position']
+            letter = answer_extraction.parse_answer_vector(raw_response, position).get(position)
+            rescored.update({"selected": letter or "?", "confidence": 1.0 if letter else 0.0, "extraction_rule": "answer_vector"})
+        else:
+            extraction = answer_extraction.extract_answer(raw_response, model_id or "")
+            rescored.update({"selected": extraction.letter, "confidence": extraction.confidence, "extraction_rule": extraction.rule})
+            if result.get('permutation'):
+                # Answered with the options reordered; map back to the original labels
+                rescored['shown'] = extraction.letter
+                rescored['selected'] = shuffling.to_original(extraction.letter, result['permutation'])
+
+        rescored['correct'] = rescored['selected'] == question['correct_answer']
+        if result.get('single_response_key') in responses:
+            single_model_id, single_response = responses[result['single_response_key']]
+            rescored['single_selected'] = answer_extraction.extract_answer(single_response, single_model_id).letter
+        if 'single_selected' in rescored:
+            rescored['single_correct'] = rescored['single_selected'] == question['correct_answer']
+
+        summary['changed_answers'] += rescored['selected'] != result['selected']
+        summary['changed_correct'] += rescored['correct'] != result['correct']
+        rescored_results.append(rescored)
+
+    return rescored_results, summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored evaluation results without API calls")
+    parser.add_argument("--run", help="Re-score a checkpointed run instead of the results file")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = storage.load_run_results(args.run) if args.run else storage.load_results()
+    rescored, summary = rescore_results(results, storage.load_question_bank())
+    elapsed = time.perf_counter() - start
+
+    print(f"Re-scored {summary['results']} result(s) in {elapsed:.2f}s: "
+          f"{summary['changed_answers']} answer(s) and {summary['changed_correct']} score(s) changed")
+    if summary['missing_responses']:
+        print(f"⚠ {summary['missing_responses']} result(s) have no archived response; only their correctness was re-checked")
+    if summary['not_rescorable']:
+        print(f"⚠ {summary['not_rescorable']} multi-sample or shuffled result(s) were left unchanged")
+
+    if args.dry_run:
+        return 0
+    if args.run:
+        storage.save_run_results(args.run, rescored)
+        print(f"✓ Updated {storage.get_run_path(args.run)}")
+    else:
+        storage.save_results(rescored)
+        storage.update_difficulty_index(rescored)
+        print(f"✓ Updated {storage.RESULTS_FILE}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Raw response archive for Hallucinator
+Compressed, content-addressed store of every raw model response, so answers
+can be re-extracted and re-scored offline without repeating API calls
+"""
+
+import hashlib
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+
+ARCHIVE_FILE = "responses.db"
+
+# zlib level (the library default): a good ratio on short prose at low CPU cost
+COMPRESSION_LEVEL = 6
+
+# Keys looked up per query when fetching many responses at once
+LOOKUP_BATCH_SIZE = 500
+
+
+def prompt_hash(prompt):
+    """Stable hash of a prompt (hex SHA-256)"""
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+def response_key(model_id, prompt_digest, response):
+    """Content address of a response: hash of the model, the prompt hash and the response text"""
+    return hashlib.sha256(f"{model_id}\0{prompt_digest}\0{response}".encode('utf-8')).hexdigest()
+
+class ResponseArchive:
+    """
+    SQLite-backed archive of raw responses
+
+    Each response is stored once, zlib-compressed, under its content address;
+    archiving the same response again is a no-op. Responses can also be listed
+    by (model, prompt hash). Safe to share between evaluation worker threads.
+
+    Args:
+        path: Database file path
+    """
+
+    def __init__(self, path=ARCHIVE_FILE):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread; SQLite serializes writers across them
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model_id TEXT NOT NULL, prompt_hash TEXT NOT NULL, "
+                "created_at TEXT NOT NULL, data BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_by_prompt ON responses (model_id, prompt_hash)")
+            self._local.conn = conn
+        return conn
+
+    def store(self, model_id, prompt, response):
+        """
+        Archive a raw response
+
+        Args:
+            model_id: OpenRouter model ID
+            prompt: Prompt sent to the model
+            response: Raw response text
+
+        Returns:
+            Tuple of (response key, prompt hash)
+        """
+        digest = prompt_hash(prompt)
+        key = response_key(model_id, digest, response)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO responses (key, model_id, prompt_hash, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                (key, model_id, digest, datetime.now().isoformat(), zlib.compress(response.encode('utf-8'), COMPRESSION_LEVEL))
+            )
+        return key, digest
+
+    def get(self, key):
+        """Return (model_id, response text) for a key, or None"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """
+        Fetch many archived responses
+
+        Args:
+            keys: Iterable of response keys
+
+        Returns:
+            Dictionary of key -> (model_id, response text) for the keys found
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[start:start + LOOKUP_BATCH_SIZE]
+            rows = conn.execute(
+                f"SELECT key, model_id, data FROM responses WHERE key IN ({','.join('?' * len(batch))})", batch
+            )
+            for key, model_id, data in rows:
+                found[key] = (model_id, zlib.decompress(data).decode('utf-8'))
+        return found
+
+    def find(self, model_id, prompt):
+        """Return every archived response of a model to a prompt, oldest first"""
+        rows = self._connection().execute(
+            "SELECT data FROM responses WHERE model_id = ? AND prompt_hash = ? ORDER BY created_at",
+            (model_id, prompt_hash(prompt))
+        )
+        return [zlib.decompress(data).decode('utf-8') for (data,) in rows]
+
+_default_archive = None
+_default_archive_lock = threading.Lock()
+
+def get_archive():
+    """Return the process-wide archive at ARCHIVE_FILE"""
+    global _default_archive
+    with _default_archive_lock:
+        if _default_archive is None:
+            _default_archive = ResponseArchive()
+        return _default_archive
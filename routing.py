@@ -0,0 +1,382 @@
+"""
+Provider routing for Hallucinator
+Maps each model to an ordered list of OpenAI-compatible endpoints (OpenRouter,
+direct provider APIs, self-hosted vLLM / llama.cpp servers) and sends each call
+to the healthiest, fastest one, failing over to the next on errors
+
+Providers and routes can be added in providers.json:
+
+    {
+      "providers": {
+        "local-vllm": {"base_url": "http://localhost:8000/v1"}
+      },
+      "routes": {
+        "meta-llama/llama-3.1-8b-instruct": [
+          {"provider": "local-vllm", "model": "meta-llama/Llama-3.1-8B-Instruct"},
+          "openrouter"
+        ]
+      }
+    }
+
+Usage:
+    python routing.py                                # list providers
+    python routing.py --check                        # probe every provider
+    python routing.py --model openai/gpt-4o-mini     # show a model's route
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+
+import local_models
+import transport
+
+PROVIDERS_FILE = "providers.json"
+
+OPENROUTER = "openrouter"
+
+# Direct provider APIs with OpenAI-compatible endpoints. Each is a fallback for
+# its own models (by OpenRouter model ID prefix) when its API key is set.
+DIRECT_PROVIDERS = {
+    "openai": {
+        "base_url": "https://api.openai.com/v1",
+        "api_key_env": "OPENAI_API_KEY",
+        "model_prefix": "openai/"
+    },
+    "anthropic": {
+        "base_url": "https://api.anthropic.com/v1/",
+        "api_key_env": "ANTHROPIC_API_KEY",
+        "model_prefix": "anthropic/",
+        # OpenRouter "claude-sonnet-4.5" is "claude-sonnet-4-5" on the Anthropic API
+        "version_separator": "-"
+    },
+    "google": {
+        "base_url": "https://generativelanguage.googleapis.com/v1beta/openai/",
+        "api_key_env": "GEMINI_API_KEY",
+        "model_prefix": "google/"
+    },
+}
+
+# Errors that move a call on to the next endpoint. Bad requests are the
+# caller's fault and would fail everywhere, so they are raised immediately.
+FAILOVER_ERRORS = (
+    openai.APIConnectionError,  # includes timeouts
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.AuthenticationError,
+    openai.PermissionDeniedError,
+    openai.NotFoundError,
+)
+
+# Errors that say nothing about the provider as a whole (the model is just not
+# served there), so they fail over without opening the circuit breaker
+MODEL_ERRORS = (openai.NotFoundError,)
+
+# Circuit breaker: a failing provider is skipped for COOLDOWN_BASE seconds,
+# doubling with each consecutive failure up to COOLDOWN_MAX
+COOLDOWN_BASE = 5.0
+COOLDOWN_MAX = 300.0
+
+# Weight of the newest sample in each provider's moving-average latency
+LATENCY_SMOOTHING = 0.3
+
+# An endpoint later in a route must be this much faster than an earlier one
+# (per position) to be preferred, so routes do not flap between equal providers
+PREFERENCE_FACTOR = 1.25
+
+# Placeholder key for self-hosted servers that do not check one
+NO_API_KEY = local_models.LOCAL_API_KEY
+
+
+class ProviderHealth:
+    """Health and latency statistics for one provider"""
+
+    def __init__(self):
+        self.failures = 0  # consecutive
+        self.open_until = 0.0
+        self.latency = {}  # call type -> moving average seconds to response headers
+        self.requests = 0
+        self.errors = 0
+        self.last_error = None
+
+    def record_success(self, call_type, elapsed):
+        self.requests += 1
+        self.failures = 0
+        self.open_until = 0.0
+        previous = self.latency.get(call_type)
+        self.latency[call_type] = elapsed if previous is None else (
+            LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * previous
+        )
+
+    def record_failure(self, error, trip=True):
+        self.requests += 1
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"[:200]
+        if trip:
+            self.failures += 1
+            cooldown = min(COOLDOWN_BASE * 2 ** (self.failures - 1), COOLDOWN_MAX)
+            self.open_until = time.monotonic() + cooldown
+
+class ModelRouter:
+    """
+    Routes chat completions across providers
+
+    Exposes the same chat.completions.create(...) call as an OpenAI client, so
+    it can be passed anywhere the app expects one. Every provider shares one
+    pooled HTTP transport. Streams fail over only until the response starts;
+    errors after that are raised to the caller.
+
+    Args:
+        providers: Dictionary of provider name -> {base_url, api_key, headers,
+            model_prefix, version_separator, exclusive}; an exclusive provider
+            is the only one used for models with its prefix
+        routes: Dictionary of model ID -> list of provider names or
+            {"provider", "model"} entries, replacing the default route
+    """
+
+    def __init__(self, providers, routes=None):
+        self.providers = providers
+        self.routes = routes or {}
+        self.http_client, self.http_transport = transport.build_http_client()
+        self._clients = {}
+        self._retry_free_clients = {}
+        for name, provider in providers.items():
+            client = transport.create_client(
+                provider['base_url'], provider.get('api_key') or NO_API_KEY,
+                provider.get('headers'), self.http_client
+            )
+            self._clients[name] = client
+            # Earlier endpoints in a route fail over at once instead of retrying
+            self._retry_free_clients[name] = client.with_options(max_retries=0)
+        self._health = {name: ProviderHealth() for name in providers}
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def route(self, model_id):
+        """
+        Endpoints configured for a model, in preference order
+
+        Args:
+            model_id: OpenRouter model ID
+
+        Returns:
+            List of (provider name, model name at that provider)
+        """
+        if model_id in self.routes:
+            endpoints = []
+            for entry in self.routes[model_id]:
+                if isinstance(entry, str):
+                    entry = {"provider": entry}
+                if entry['provider'] in self.providers:
+                    endpoints.append((entry['provider'], entry.get('model') or self._provider_model(entry['provider'], model_id)))
+            return endpoints
+
+        exclusive = [
+            name for name, provider in self.providers.items()
+            if provider.get('exclusive') and provider.get('model_prefix') and model_id.startswith(provider['model_prefix'])
+        ]
+        if exclusive:
+            return [(name, self._provider_model(name, model_id)) for name in exclusive]
+
+        endpoints = [(OPENROUTER, model_id)] if OPENROUTER in self.providers else []
+        for name, provider in self.providers.items():
+            prefix = provider.get('model_prefix')
+            if name != OPENROUTER and prefix and model_id.startswith(prefix):
+                endpoints.append((name, self._provider_model(name, model_id)))
+        return endpoints
+
+    def _provider_model(self, provider_name, model_id):
+        provider = self.providers[provider_name]
+        prefix = provider.get('model_prefix')
+        if not prefix or not model_id.startswith(prefix):
+            return model_id
+        model = model_id[len(prefix):]
+        if provider.get('version_separator'):
+            model = model.replace(".", provider['version_separator'])
+        return model
+
+    def candidates(self, model_id, call_type=transport.DEFAULT_CALL_TYPE):
+        """
+        Endpoints for a model in the order they will be tried
+
+        Healthy providers come first, ordered by observed latency for this call
+        type (weighted by route position; providers with no samples yet are
+        tried first so every endpoint gets measured). Providers cooling down
+        after failures follow, soonest available first.
+
+        Returns:
+            List of (provider name, model name at that provider)
+        """
+        endpoints = self.route(model_id)
+        now = time.monotonic()
+        with self._lock:
+            def sort_key(item):
+                position, (provider_name, _) = item
+                health = self._health[provider_name]
+                if health.open_until > now:
+                    return (1, health.open_until, position)
+                return (0, health.latency.get(call_type, 0.0) * PREFERENCE_FACTOR ** position, position)
+            return [endpoint for _, endpoint in sorted(enumerate(endpoints), key=sort_key)]
+
+    def create(self, model, **kwargs):
+        """
+        Create a chat completion on the best available endpoint
+
+        Takes the same arguments as client.chat.completions.create; model is
+        the OpenRouter model ID.
+
+        Raises:
+            The last provider's error if every endpoint fails, or RuntimeError
+            if no provider serves the model
+        """
+        call_type = (kwargs.get('extra_headers') or {}).get(transport.CALL_TYPE_HEADER, transport.DEFAULT_CALL_TYPE)
+        endpoints = self.candidates(model, call_type)
+        if not endpoints:
+            raise RuntimeError(f"No provider configured for {model}")
+
+        last_error = None
+        for position, (provider_name, provider_model) in enumerate(endpoints):
+            is_last = position == len(endpoints) - 1
+            client = self._clients[provider_name] if is_last else self._retry_free_clients[provider_name]
+            start = time.monotonic()
+            try:
+                response = client.chat.completions.create(model=provider_model, **kwargs)
+            except FAILOVER_ERRORS as e:
+                with self._lock:
+                    self._health[provider_name].record_failure(e, trip=not isinstance(e, MODEL_ERRORS))
+                last_error = e
+                if not is_last:
+                    print(f"[DEBUG] {provider_name} failed for {model} ({type(e).__name__}), failing over")
+                continue
+            with self._lock:
+                self._health[provider_name].record_success(call_type, time.monotonic() - start)
+            return response
+        raise last_error
+
+    def status(self):
+        """
+        Snapshot of every provider's health
+
+        Returns:
+            List of dictionaries (provider, base_url, healthy, cooldown seconds
+            left, consecutive failures, requests, errors, latency per call
+            type, last error)
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "provider": name,
+                    "base_url": self.providers[name]['base_url'],
+                    "healthy": health.open_until <= now,
+                    "cooldown": max(0.0, health.open_until - now),
+                    "failures": health.failures,
+                    "requests": health.requests,
+                    "errors": health.errors,
+                    "latency": dict(health.latency),
+                    "last_error": health.last_error
+                }
+                for name, health in self._health.items()
+            ]
+
+    def check(self, provider_name):
+        """
+        Probe a provider by listing its models; updates its health
+
+        Returns:
+            Tuple of (ok, seconds, error message or None)
+        """
+        start = time.monotonic()
+        try:
+            self._retry_free_clients[provider_name].models.list()
+        except Exception as e:
+            with self._lock:
+                self._health[provider_name].record_failure(e)
+            return False, time.monotonic() - start, f"{type(e).__name__}: {e}"
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self._health[provider_name].record_success("check", elapsed)
+        return True, elapsed, None
+
+def load_providers(path=PROVIDERS_FILE, openrouter_headers=None):
+    """
+    Assemble the provider set and routes
+
+    OpenRouter is used when OPENROUTER_API_KEY is set, direct providers when
+    their API key is set and the local server (the only route for local/
+    models) when HALLUCINATOR_LOCAL_URL is set. Providers in the config file are added (or replace a
+    built-in of the same name); one whose api_key_env is set but missing from
+    the environment is skipped, one without api_key_env needs no key.
+
+    Args:
+        path: Optional JSON config file with "providers" and "routes"
+        openrouter_headers: Extra headers for OpenRouter requests
+
+    Returns:
+        Tuple of (providers dictionary, routes dictionary)
+    """
+    config = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            config = json.load(f)
+
+    definitions = {OPENROUTER: {"base_url": transport.OPENROUTER_BASE_URL, "api_key_env": "OPENROUTER_API_KEY", "headers": openrouter_headers}}
+    definitions.update(DIRECT_PROVIDERS)
+    if local_models.local_server_url():
+        definitions[local_models.LOCAL_PROVIDER] = {
+            "base_url": local_models.local_server_url(),
+            "model_prefix": local_models.LOCAL_MODEL_PREFIX,
+            "exclusive": True
+        }
+    definitions.update(config.get('providers', {}))
+
+    providers = {}
+    for name, definition in definitions.items():
+        provider = dict(definition)
+        key_env = provider.pop('api_key_env', None)
+        if key_env:
+            provider['api_key'] = os.getenv(key_env)
+            if not provider['api_key']:
+                continue
+        providers[name] = provider
+
+    print(f"[DEBUG] Providers: {', '.join(providers) or 'none'}")
+    return providers, config.get('routes', {})
+
+def create_router(openrouter_headers=None, path=PROVIDERS_FILE):
+    """Create a ModelRouter from the environment and the providers file"""
+    providers, routes = load_providers(path, openrouter_headers)
+    return ModelRouter(providers, routes)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and probe model providers")
+    parser.add_argument("--config", default=PROVIDERS_FILE, help="Providers file")
+    parser.add_argument("--check", action="store_true", help="Probe every provider")
+    parser.add_argument("--model", help="Show the route for an OpenRouter model ID")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    router = create_router(path=args.config)
+
+    for name, provider in router.providers.items():
+        line = f"{name:<12} {provider['base_url']}"
+        if args.check:
+            ok, elapsed, error = router.check(name)
+            line += f"  ✓ {elapsed * 1000:.0f} ms" if ok else f"  ❌ {error}"
+        print(line)
+
+    if args.model:
+        print(f"\nRoute for {args.model}:")
+        for position, (provider_name, provider_model) in enumerate(router.candidates(args.model), 1):
+            print(f"  {position}. {provider_name} ({provider_model})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Full-text search for the Hallucinator question bank
+SQLite FTS5 index over question text, options and reasoning, ranked with BM25
+
+Usage:
+    python search.py "miranda custodial"
+    python search.py shatzer --limit 5
+    python search.py --rebuild
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import storage
+
+SEARCH_INDEX_FILE = "questions_fts.db"
+
+# BM25 column weights: question, options, reasoning
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0)
+
+# Snippet highlight markers (control characters cannot occur in indexed text);
+# use highlight() to turn them into brackets, HTML, etc.
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+# Words of a search query; quoted so FTS5 operators in user input are literal
+QUERY_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _connect():
+    conn = sqlite3.connect(SEARCH_INDEX_FILE)
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5("
+        "question, options, reasoning, topic UNINDEXED, tokenize='porter unicode61')"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS content_hashes (id INTEGER PRIMARY KEY, hash TEXT NOT NULL)")
+    return conn
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+def _content_hash(question):
+    """Hash of the indexed fields of a question, to detect edits"""
+    content = json.dumps([question.get('question', ''), question.get('options', []), question.get('reasoning', ''), question.get('topic', '')])
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+
+def _insert(conn, questions):
+    questions = list(questions)
+    conn.executemany(
+        "INSERT OR REPLACE INTO questions_fts (rowid, question, options, reasoning, topic) VALUES (?, ?, ?, ?, ?)",
+        (
+            (q['id'], q.get('question', ''), "\n".join(q.get('options', [])), q.get('reasoning', ''), q.get('topic', ''))
+            for q in questions
+        )
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO content_hashes (id, hash) VALUES (?, ?)",
+        ((q['id'], _content_hash(q)) for q in questions)
+    )
+
+def index_question(question, previous_version):
+    """
+    Add a newly saved question to the index
+
+    Called after storage.save_question. The index is only marked current if it
+    was current for the file before this save; otherwise the next search syncs
+    whatever else changed.
+
+    Args:
+        question: Saved question dictionary (with id)
+        previous_version: storage.file_version of the questions file before the save
+    """
+    conn = _connect()
+    try:
+        with conn:
+            stored_version = _get_meta(conn, 'version')
+            _insert(conn, [question])
+            if stored_version is not None and tuple(stored_version) == tuple(previous_version or ()):
+                _set_meta(conn, 'version', storage.file_version(storage.QUESTIONS_FILE))
+    finally:
+        conn.close()
+
+def sync_index():
+    """
+    Bring the index up to date with the questions file
+
+    Each indexed question carries a hash of its indexed fields, so new, edited
+    and removed questions are found in one streaming pass over the bank and
+    only those rows are rewritten.
+
+    Returns:
+        Number of questions added, re-indexed or removed
+    """
+    version = storage.file_version(storage.QUESTIONS_FILE)
+    conn = _connect()
+    try:
+        stored_version = _get_meta(conn, 'version')
+        if stored_version is not None and tuple(stored_version) == tuple(version or ()):
+            return 0
+
+        stored_hashes = dict(conn.execute("SELECT id, hash FROM content_hashes"))
+        changed = []
+        for question in storage.iter_questions():
+            q_id = question.get('id', 0)
+            if stored_hashes.pop(q_id, None) != _content_hash(question):
+                changed.append(question)
+        removed = list(stored_hashes)
+
+        with conn:
+            if removed:
+                conn.executemany("DELETE FROM questions_fts WHERE rowid = ?", ((q_id,) for q_id in removed))
+                conn.executemany("DELETE FROM content_hashes WHERE id = ?", ((q_id,) for q_id in removed))
+            _insert(conn, changed)
+            _set_meta(conn, 'version', version)
+        if changed or removed:
+            print(f"[DEBUG] Search index: {len(changed)} question(s) indexed, {len(removed)} removed")
+        return len(changed) + len(removed)
+    finally:
+        conn.close()
+
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 match expression
+
+    Every word must match; the last word also matches as a prefix so results
+    update while typing.
+
+    Returns:
+        Match expression, or None if the text has no words
+    """
+    tokens = QUERY_TOKEN_PATTERN.findall(text or "")
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " AND ".join(terms)
+
+def search_questions(text, limit=20, topic=None):
+    """
+    Ranked full-text search over the bank
+
+    Args:
+        text: Free-text query
+        limit: Maximum number of hits
+        topic: Optional exact topic filter
+
+    Returns:
+        List of hit dictionaries (id, topic, score, question snippet, reasoning
+        snippet or None if the reasoning did not match), best first; snippets
+        mark matches with MATCH_START/MATCH_END
+    """
+    match = build_match_query(text)
+    if match is None:
+        return []
+
+    sync_index()
+    sql = (
+        "SELECT rowid, topic, bm25(questions_fts, ?, ?, ?) AS score, "
+        "snippet(questions_fts, 0, ?, ?, '…', 24), snippet(questions_fts, 2, ?, ?, '…', 16) "
+        "FROM questions_fts WHERE questions_fts MATCH ?"
+    )
+    params = [*COLUMN_WEIGHTS, MATCH_START, MATCH_END, MATCH_START, MATCH_END, match]
+    if topic:
+        sql += " AND topic = ?"
+        params.append(topic)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+
+    conn = _connect()
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "id": q_id,
+            "topic": q_topic,
+            "score": -score,
+            "question": question_snippet,
+            "reasoning": reasoning_snippet if MATCH_START in reasoning_snippet else None
+        }
+        for q_id, q_topic, score, question_snippet, reasoning_snippet in rows
+    ]
+
+def highlight(snippet, start="[", end="]"):
+    """Replace the match markers in a snippet"""
+    return snippet.replace(MATCH_START, start).replace(MATCH_END, end)
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over the question bank")
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--topic")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        if os.path.exists(SEARCH_INDEX_FILE):
+            os.remove(SEARCH_INDEX_FILE)
+        print(f"✓ Indexed {sync_index()} question(s) into {SEARCH_INDEX_FILE}")
+        if not args.query:
+            return 0
+
+    start = time.perf_counter()
+    hits = search_questions(args.query, args.limit, args.topic)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{len(hits)} result(s) in {elapsed_ms:.1f} ms")
+    for hit in hits:
+        print(f"\n#{hit['id']} [{hit['topic']}] score {hit['score']:.2f}")
+        print(f"   {highlight(hit['question'])}")
+        if hit['reasoning']:
+            print(f"   reasoning: {highlight(hit['reasoning'])}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Option shuffling for Hallucinator
+Evaluates questions under several orderings of their options, to separate a
+model's knowledge from a preference for answer positions
+"""
+
+import random
+from collections import namedtuple
+
+import numpy as np
+
+import costs
+
+LETTERS = "ABCD"
+
+# Marker for a permutation with no usable answer (API error or no letter found)
+NO_CHOICE = 255
+
+# Per-permutation data of shuffled results, as arrays over questions x models x permutations
+ShuffleMatrix = namedtuple("ShuffleMatrix", ["question_ids", "models", "key_positions", "choices"])
+
+
+def option_permutations(question_id, count):
+    """
+    Option orders to evaluate a question under
+
+    The first orders are the cyclic shifts of the original order (starting with
+    the original itself), which show the correct answer once at every position.
+    Further orders are distinct random permutations, seeded by the question id so
+    every run (and the response cache) sees the same ones.
+
+    Args:
+        question_id: Question id
+        count: Number of orders (at most 24)
+
+    Returns:
+        List of permutations (tuples); permutation[i] is the original index of
+        the option shown at position i
+    """
+    n = len(LETTERS)
+    permutations = [tuple((i + shift) % n for i in range(n)) for shift in range(min(count, n))]
+    rng = random.Random(question_id)
+    while len(permutations) < min(count, 24):
+        candidate = tuple(rng.sample(range(n), n))
+        if candidate not in permutations:
+            permutations.append(candidate)
+    return permutations
+
+def permutation_code(permutation):
+    """Compact string form of a permutation, e.g. "CDAB" for a shift by two"""
+    return "".join(LETTERS[i] for i in permutation)
+
+def option_text(option):
+    """Option text without its "A) " label"""
+    return option[3:].strip() if len(option) > 2 and option[1] in ").:" else option.strip()
+
+def permute_question(question, permutation):
+    """
+    A copy of a question with its options reordered and the key remapped
+
+    Args:
+        question: Question dictionary
+        permutation: Option order (see option_permutations)
+
+    Returns:
+        Question dictionary with relabeled options and correct_answer
+    """
+    options = list(question['options'])
+    permuted = dict(question.to_dict() if hasattr(question, 'to_dict') else question)
+    permuted['options'] = [f"{letter}) {option_text(options[source])}" for letter, source in zip(LETTERS, permutation)]
+    permuted['correct_answer'] = LETTERS[permutation.index(LETTERS.index(question['correct_answer']))]
+    return permuted
+
+def to_original(letter, code):
+    """Map a letter chosen under a permutation (given by its code) back to the original option's letter"""
+    if not letter or letter not in LETTERS:
+        return letter
+    return code[LETTERS.index(letter)]
+
+def combine_permutations(permutation_results):
+    """
+    Combine the results of one (question, model) pair under several option orders
+
+    Each result's 'selected' is in the original labels and 'shown' is the letter
+    the model actually picked. The majority original answer becomes 'selected';
+    the per-order data is stored as compact strings, one character per order:
+    'shuffle_keys' (position of the correct answer), 'shuffle_choices' (position
+    chosen, '?' if no letter was found, '!' for API errors), plus the orders
+    themselves in 'shuffle_orders'. Error results without per-order fields
+    (a call that raised before its order was known) count as '!' with an
+    unknown key position.
+
+    Args:
+        permutation_results: List of result dictionaries for the same question
+            and model, each with 'permutation', 'shown' and 'shuffle_index'
+
+    Returns:
+        Single result dictionary
+    """
+    ordered = sorted(permutation_results, key=lambda r: r.get('shuffle_index', 0))
+    answers = "".join("!" if r['selected'] == "ERROR" else (r['selected'] or "?")[0] for r in ordered)
+    counts = {}
+    for answer in answers:
+        counts[answer] = counts.get(answer, 0) + 1
+
+    # Majority vote; ties go to the earliest order, errors and unparsed answers never win over a letter
+    ranked = sorted(counts, key=lambda a: (a not in LETTERS, -counts[a], answers.index(a)))
+    majority = ranked[0]
+    majority_result = next(r for r, answer in zip(ordered, answers) if answer == majority)
+
+    combined = dict(majority_result)
+    combined.pop('shuffle_index', None)
+    combined.pop('shown_key', None)
+    costs.add_costs(combined, *(r for r in ordered if r is not majority_result))
+    combined.update({
+        "timestamp": max(r['timestamp'] for r in ordered),
+        "shuffle_orders": ",".join(r.get('permutation', "") for r in ordered),
+        "shuffle_keys": "".join(r.get('shown_key', "?") for r in ordered),
+        "shuffle_choices": "".join("!" if r['selected'] == "ERROR" else (r.get('shown') or "?")[0] for r in ordered),
+        "agreement": round(counts[majority] / len(answers), 3)
+    })
+    return combined
+
+def shuffle_matrix(results):
+    """
+    Collect per-permutation choices of shuffled results into arrays
+
+    Args:
+        results: Iterable of result dictionaries; only shuffled results
+            (with 'shuffle_choices') are used
+
+    Returns:
+        ShuffleMatrix with key_positions (questions x permutations; position of
+        the correct answer in each order) and choices (questions x models x
+        permutations; position chosen, NO_CHOICE if none), or None if there are
+        no shuffled results
+    """
+    shuffled = [r for r in results if r.get('shuffle_choices')]
+    if not shuffled:
+        return None
+
+    question_ids = sorted({r['question_id'] for r in shuffled})
+    models = sorted({r['model'] for r in shuffled})
+    count = max(len(r['shuffle_choices']) for r in shuffled)
+    rows = {q_id: i for i, q_id in enumerate(question_ids)}
+    columns = {model: j for j, model in enumerate(models)}
+
+    key_positions = np.full((len(question_ids), count), NO_CHOICE, dtype=np.uint8)
+    choices = np.full((len(question_ids), len(models), count), NO_CHOICE, dtype=np.uint8)
+    lookup = np.full(256, NO_CHOICE, dtype=np.uint8)
+    lookup[np.frombuffer(LETTERS.encode(), dtype=np.uint8)] = np.arange(len(LETTERS))
+    for result in shuffled:
+        row, column = rows[result['question_id']], columns[result['model']]
+        keys = lookup[np.frombuffer(result['shuffle_keys'].encode(), dtype=np.uint8)]
+        chosen = lookup[np.frombuffer(result['shuffle_choices'].encode(), dtype=np.uint8)]
+        key_positions[row, :len(keys)] = keys
+        choices[row, column, :len(chosen)] = chosen
+    return ShuffleMatrix(question_ids, models, key_positions, choices)
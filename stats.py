@@ -0,0 +1,416 @@
+"""
+Statistics for Hallucinator
+Confidence intervals and sampling helpers used by evaluation and the leaderboard
+"""
+
+import math
+import random
+from statistics import NormalDist
+
+import numpy as np
+
+# Bootstrap resamples are drawn in chunks so the weight matrix stays around
+# BOOTSTRAP_CHUNK_CELLS entries regardless of bank size
+BOOTSTRAP_ITERATIONS = 10000
+BOOTSTRAP_CHUNK_CELLS = 4_000_000
+
+# Multinomial draws over distinct correctness patterns are used when there are
+# fewer than 1/BOOTSTRAP_PATTERN_RATIO as many patterns as questions
+BOOTSTRAP_PATTERN_RATIO = 8
+
+# Below this many discordant pairs McNemar uses the exact binomial test
+MCNEMAR_EXACT_LIMIT = 25
+
+# Significance level for model comparisons (leaderboard tiers and pairwise tests)
+SIGNIFICANCE_LEVEL = 0.05
+
+
+def z_score(confidence):
+    """Two-sided normal critical value for a confidence level (e.g. 0.95 -> 1.96)"""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+def wilson_interval(correct, total, confidence=0.95):
+    """
+    Wilson score interval for a binomial proportion
+
+    Args:
+        correct: Number of successes
+        total: Number of trials
+        confidence: Confidence level
+
+    Returns:
+        Tuple of (low, high) bounds in [0, 1]; (0, 1) when total is 0
+    """
+    if total == 0:
+        return 0.0, 1.0
+    z = z_score(confidence)
+    p = correct / total
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+def settled_models(counts, confidence=0.95, min_total=10):
+    """
+    Find models whose leaderboard position is already determined
+
+    A model is settled when its accuracy interval is disjoint from every other
+    model's interval, so more questions cannot change where it ranks. A single
+    model has no rank to settle, so nothing settles with fewer than two models.
+
+    Args:
+        counts: Dictionary of model -> (correct, total)
+        confidence: Confidence level for the intervals
+        min_total: Minimum answered questions before a model can be settled
+
+    Returns:
+        Set of settled model names
+    """
+    if len(counts) < 2:
+        return set()
+    intervals = {model: wilson_interval(c, t, confidence) for model, (c, t) in counts.items()}
+    settled = set()
+    for model, (low, high) in intervals.items():
+        if counts[model][1] < min_total:
+            continue
+        if all(high < other_low or low > other_high
+               for other, (other_low, other_high) in intervals.items() if other != model):
+            settled.add(model)
+    return settled
+
+def stratified_order(items, key, seed=None):
+    """
+    Shuffle items so that every prefix is proportionally stratified by key
+
+    Each stratum is shuffled, then items are interleaved by their relative position
+    within their stratum, so taking the first N items samples each stratum in
+    proportion to its size.
+
+    Args:
+        items: Items to order
+        key: Callable returning the stratum of an item (e.g. its topic)
+        seed: Optional random seed
+
+    Returns:
+        New list with the items in stratified random order
+    """
+    rng = random.Random(seed)
+    strata = {}
+    for item in items:
+        strata.setdefault(key(item), []).append(item)
+
+    keyed = []
+    for members in strata.values():
+        rng.shuffle(members)
+        offset = rng.random()
+        for idx, item in enumerate(members):
+            keyed.append(((idx + offset) / len(members), rng.random(), item))
+
+    keyed.sort(key=lambda entry: entry[:2])
+    return [item for _, _, item in keyed]
+
+def item_statistics(index):
+    """
+    Per-question difficulty and discrimination from a difficulty index
+
+    Difficulty is the fraction of models answering correctly. Discrimination is the
+    correlation between answering the question correctly and a model's overall
+    accuracy, so questions that strong models get right and weak models get wrong
+    score highest.
+
+    Args:
+        index: Dictionary of question_id -> {model: 1 if correct else 0}
+
+    Returns:
+        Dictionary of question_id -> (accuracy, discrimination, models answered)
+    """
+    totals = {}
+    for models in index.values():
+        for model, correct in models.items():
+            c, t = totals.get(model, (0, 0))
+            totals[model] = (c + correct, t + 1)
+    ability = {model: c / t for model, (c, t) in totals.items()}
+
+    items = {}
+    for q_id, models in index.items():
+        n = len(models)
+        accuracy = sum(models.values()) / n
+        discrimination = 0.0
+        if n >= 2 and 0 < accuracy < 1:
+            abilities = [ability[m] for m in models]
+            mean_ability = sum(abilities) / n
+            ability_sd = math.sqrt(sum((a - mean_ability) ** 2 for a in abilities) / n)
+            if ability_sd > 0:
+                # Point-biserial correlation between item correctness and model ability
+                mean_correct_ability = sum(ability[m] for m, c in models.items() if c) / sum(models.values())
+                discrimination = (mean_correct_ability - mean_ability) / ability_sd * math.sqrt(accuracy / (1 - accuracy))
+        items[q_id] = (accuracy, discrimination, n)
+    return items
+
+def select_discriminative(index, count, candidates=None):
+    """
+    Pick the questions that best separate models
+
+    Questions every model gets right (or wrong) carry no ranking information and
+    are skipped. The rest are grouped by accuracy level and picked round-robin
+    across levels, most discriminative first, so the subset separates strong from
+    middling models as well as middling from weak ones.
+
+    Args:
+        index: Dictionary of question_id -> {model: 1 if correct else 0}
+        count: Number of questions to select
+        candidates: Optional set of question ids to choose from
+
+    Returns:
+        List of selected question ids (may be shorter than count)
+    """
+    levels = {}
+    for q_id, (accuracy, discrimination, n) in item_statistics(index).items():
+        if n >= 2 and 0 < accuracy < 1 and (candidates is None or q_id in candidates):
+            levels.setdefault(round(accuracy, 1), []).append((discrimination, q_id))
+
+    queues = [sorted(levels[level], reverse=True) for level in sorted(levels)]
+    selected = []
+    while len(selected) < count and any(queues):
+        for queue in queues:
+            if queue and len(selected) < count:
+                selected.append(queue.pop(0)[1])
+    return selected
+
+def subset_accuracy(index, question_ids, exclude_models=()):
+    """
+    Accuracy of each indexed model on a set of questions
+
+    Args:
+        index: Dictionary of question_id -> {model: 1 if correct else 0}
+        question_ids: Questions to score on
+        exclude_models: Models to leave out
+
+    Returns:
+        Dictionary of model -> (correct, answered)
+    """
+    counts = {}
+    for q_id in question_ids:
+        for model, correct in index.get(q_id, {}).items():
+            if model in exclude_models:
+                continue
+            c, t = counts.get(model, (0, 0))
+            counts[model] = (c + correct, t + 1)
+    return counts
+
+def bootstrap_intervals(correct, answered, iterations=BOOTSTRAP_ITERATIONS, confidence=0.95, seed=None):
+    """
+    Percentile bootstrap intervals on each model's accuracy
+
+    Questions are resampled with replacement, shared across models, so the
+    resampling matches how the bank itself was drawn. Questions with the same
+    correctness pattern across models are interchangeable, so each resample only
+    needs a count per distinct pattern: a multinomial draw when there are few
+    patterns, otherwise uniform question indices counted with one bincount. A
+    whole chunk of resamples is turned into accuracies with two matrix products
+    instead of a Python loop.
+
+    Args:
+        correct: (questions, models) 0/1 matrix
+        answered: (questions, models) 0/1 matrix of answered cells
+        iterations: Number of bootstrap resamples
+        confidence: Confidence level
+        seed: Optional random seed
+
+    Returns:
+        Array of shape (models, 2) with (low, high) bounds in [0, 1]
+    """
+    n_questions, n_models = correct.shape
+    if n_questions == 0:
+        return np.tile([0.0, 1.0], (n_models, 1))
+
+    rng = np.random.default_rng(seed)
+    patterns, pattern_of = np.unique(np.hstack([correct, answered]), axis=0, return_inverse=True)
+    pattern_of = pattern_of.ravel()
+    n_patterns = len(patterns)
+    pattern_probabilities = np.bincount(pattern_of, minlength=n_patterns) / n_questions
+    pattern_correct = patterns[:, :n_models].astype(np.float64)
+    pattern_answered = patterns[:, n_models:].astype(np.float64)
+    chunk = max(1, BOOTSTRAP_CHUNK_CELLS // n_questions)
+
+    accuracies = np.empty((iterations, n_models))
+    for start in range(0, iterations, chunk):
+        size = min(chunk, iterations - start)
+        if n_patterns * BOOTSTRAP_PATTERN_RATIO < n_questions:
+            weights = rng.multinomial(n_questions, pattern_probabilities, size=size).astype(np.float64)
+        else:
+            draws = pattern_of[rng.integers(0, n_questions, size=(size, n_questions))]
+            draws += np.arange(size)[:, None] * n_patterns
+            weights = np.bincount(draws.ravel(), minlength=size * n_patterns).reshape(size, n_patterns).astype(np.float64)
+        totals = weights @ pattern_answered
+        with np.errstate(invalid='ignore', divide='ignore'):
+            accuracies[start:start + size] = (weights @ pattern_correct) / totals
+
+    alpha = (1 - confidence) / 2
+    bounds = np.nanquantile(accuracies, [alpha, 1 - alpha], axis=0).T
+    return np.nan_to_num(bounds, nan=0.0)
+
+def mcnemar_test(correct_a, correct_b):
+    """
+    McNemar test for two models answering the same questions
+
+    Only discordant questions (one model right, the other wrong) carry
+    information. Uses the exact binomial test for few discordant pairs and the
+    continuity-corrected chi-square otherwise.
+
+    Args:
+        correct_a: 0/1 array of model A's correctness on shared questions
+        correct_b: 0/1 array of model B's correctness on the same questions
+
+    Returns:
+        Tuple of (A-only correct, B-only correct, two-sided p-value)
+    """
+    correct_a = np.asarray(correct_a, dtype=bool)
+    correct_b = np.asarray(correct_b, dtype=bool)
+    only_a = int(np.count_nonzero(correct_a & ~correct_b))
+    only_b = int(np.count_nonzero(correct_b & ~correct_a))
+    discordant = only_a + only_b
+    if discordant == 0:
+        return only_a, only_b, 1.0
+
+    if discordant < MCNEMAR_EXACT_LIMIT:
+        tail = sum(math.comb(discordant, k) for k in range(min(only_a, only_b) + 1)) / 2 ** discordant
+        return only_a, only_b, min(1.0, 2 * tail)
+
+    chi_square = (abs(only_a - only_b) - 1) ** 2 / discordant
+    return only_a, only_b, math.erfc(math.sqrt(chi_square / 2))
+
+def pairwise_mcnemar(correct, answered, models):
+    """
+    McNemar tests between every pair of models on the questions both answered
+
+    Args:
+        correct: (questions, models) 0/1 matrix
+        answered: (questions, models) 0/1 matrix of answered cells
+        models: Model names, one per column
+
+    Returns:
+        Dictionary of (model_a, model_b) -> (A-only correct, B-only correct, p-value),
+        with one entry per unordered pair
+    """
+    tests = {}
+    for i in range(len(models)):
+        for j in range(i + 1, len(models)):
+            shared = (answered[:, i] & answered[:, j]).astype(bool)
+            tests[(models[i], models[j])] = mcnemar_test(correct[shared, i], correct[shared, j])
+    return tests
+
+def tied_groups(ranked_models, tests, alpha=SIGNIFICANCE_LEVEL):
+    """
+    Group ranked models into statistically tied tiers
+
+    Walking down the ranking, a model joins the current tier unless it is
+    significantly worse than the tier's leader; otherwise it starts a new tier.
+
+    Args:
+        ranked_models: Model names ordered best first
+        tests: Output of pairwise_mcnemar
+        alpha: Significance level
+
+    Returns:
+        Dictionary of model -> tier number (1 = top tier)
+    """
+    groups = {}
+    leader = None
+    tier = 0
+    for model in ranked_models:
+        if leader is not None:
+            _, _, p_value = tests.get((leader, model)) or tests.get((model, leader)) or (0, 0, 1.0)
+            if p_value >= alpha:
+                groups[model] = tier
+                continue
+        tier += 1
+        leader = model
+        groups[model] = tier
+    return groups
+
+def chi_square_sf(x, df):
+    """
+    Upper tail probability of the chi-square distribution
+
+    Uses the closed forms for 1 and 2 degrees of freedom and the recurrence
+    Q(x, k + 2) = Q(x, k) + (x/2)^(k/2) e^(-x/2) / Γ(k/2 + 1).
+
+    Args:
+        x: Chi-square statistic
+        df: Degrees of freedom (positive integer)
+
+    Returns:
+        P(X >= x)
+    """
+    if x <= 0:
+        return 1.0
+    k = 2 - df % 2
+    tail = math.erfc(math.sqrt(x / 2)) if k == 1 else math.exp(-x / 2)
+    while k < df:
+        tail += math.exp((k / 2) * math.log(x / 2) - x / 2 - math.lgamma(k / 2 + 1))
+        k += 2
+    return min(1.0, tail)
+
+def position_bias(key_positions, choices, positions=4):
+    """
+    Per-model answer-position bias from evaluations under shuffled option orders
+
+    For every model, compares how often each position is chosen with how often
+    the correct answer sits there (a chi-square goodness-of-fit test), and
+    breaks accuracy down by the correct answer's position. A model without
+    position bias chooses positions in proportion to the keys and is equally
+    accurate wherever the key appears.
+
+    Args:
+        key_positions: (questions, orders) array of the correct answer's position
+            under each order; values >= positions mark missing orders
+        choices: (questions, models, orders) array of the position each model
+            chose; values >= positions mark missing or unparsed answers
+        positions: Number of answer positions
+
+    Returns:
+        Dictionary of arrays over models: 'answered' (choices counted),
+        'choice_share' and 'key_share' (models x positions), 'accuracy_by_key'
+        (models x positions, NaN where a position never held the key),
+        'chi_square', 'p_value', 'all_correct' (share of fully answered
+        questions right under every order) and 'flipped' (share right under
+        some orders only)
+    """
+    keys = key_positions[:, None, :]
+    valid = (choices < positions) & (keys < positions)
+    correct = valid & (choices == keys)
+    slots = np.arange(positions)
+
+    # Counts per model and position over all (question, order) cells in one pass
+    chosen = np.count_nonzero((choices[..., None] == slots) & valid[..., None], axis=(0, 2))
+    expected = np.count_nonzero((keys[..., None] == slots) & valid[..., None], axis=(0, 2))
+    hits = np.count_nonzero((keys[..., None] == slots) & correct[..., None], axis=(0, 2))
+    answered = valid.sum(axis=(0, 2))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        choice_share = chosen / answered[:, None]
+        key_share = expected / answered[:, None]
+        accuracy_by_key = hits / expected
+        expected_counts = np.where(expected > 0, expected, 1)
+        chi_square = np.where(expected > 0, (chosen - expected) ** 2 / expected_counts, 0.0).sum(axis=1)
+    df = np.count_nonzero(expected, axis=1) - 1
+    p_value = np.array([chi_square_sf(x, k) if k > 0 else 1.0 for x, k in zip(chi_square, df)])
+
+    # Consistency over questions answered under every order
+    complete = valid.all(axis=2)
+    n_complete = np.maximum(complete.sum(axis=0), 1)
+    right = correct.sum(axis=2)
+    all_correct = (complete & (right == choices.shape[2])).sum(axis=0) / n_complete
+    flipped = (complete & (right > 0) & (right < choices.shape[2])).sum(axis=0) / n_complete
+
+    return {
+        "answered": answered,
+        "choice_share": np.nan_to_num(choice_share),
+        "key_share": np.nan_to_num(key_share),
+        "accuracy_by_key": accuracy_by_key,
+        "chi_square": chi_square,
+        "p_value": p_value,
+        "all_correct": all_correct,
+        "flipped": flipped
+    }
@@ -0,0 +1,673 @@
+"""
+Storage for Hallucinator
+JSON file storage for approved questions and evaluation results
+"""
+
+import itertools
+import json
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+import numpy as np
+
+# File paths
+QUESTIONS_FILE = "questions.json"
+RESULTS_FILE = "eval_results.json"
+RUNS_DIR = "eval_runs"
+DIFFICULTY_INDEX_FILE = "difficulty_index.json"
+RESULTS_MATRIX_FILE = "results.matrix"
+
+# Read size used when streaming JSON arrays from disk
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+def load_questions():
+    """Load questions from JSON file"""
+    if os.path.exists(QUESTIONS_FILE):
+        with open(QUESTIONS_FILE, 'r') as f:
+            return json.load(f)
+    return []
+
+def save_question(question_data):
+    """Save a new question to JSON file"""
+    questions = load_questions()
+
+    # Generate new ID
+    new_id = max([q.get('id', 0) for q in questions], default=0) + 1
+    question_data['id'] = new_id
+    question_data['created_at'] = datetime.now().isoformat()
+
+    questions.append(question_data)
+
+    with open(QUESTIONS_FILE, 'w') as f:
+        json.dump(questions, f, indent=2)
+
+    return new_id
+
+def load_results():
+    """Load evaluation results from JSON file"""
+    if os.path.exists(RESULTS_FILE):
+        with open(RESULTS_FILE, 'r') as f:
+            return json.load(f)
+    return []
+
+def save_results(results):
+    """Save evaluation results to JSON file"""
+    with open(RESULTS_FILE, 'w') as f:
+        json.dump(results, f, indent=2)
+
+# Evaluation run checkpoints: a JSON manifest plus a JSONL result log per run
+def get_run_path(run_id):
+    """Return the path of the JSONL result log for an evaluation run"""
+    return os.path.join(RUNS_DIR, f"{run_id}.jsonl")
+
+def get_run_manifest_path(run_id):
+    """Return the path of the JSON manifest for an evaluation run"""
+    return os.path.join(RUNS_DIR, f"{run_id}.json")
+
+def append_run_results(run_id, results):
+    """Append a batch of results to an evaluation run's JSONL log and sync it to disk"""
+    os.makedirs(RUNS_DIR, exist_ok=True)
+    with open(get_run_path(run_id), 'a') as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def load_run_results(run_id):
+    """
+    Load the results logged for an evaluation run
+
+    A torn final line (from a crash mid-write) is ignored. If a (question, model)
+    pair was logged more than once, the latest result wins.
+
+    Args:
+        run_id: Evaluation run ID
+
+    Returns:
+        List of result dictionaries
+    """
+    path = get_run_path(run_id)
+    if not os.path.exists(path):
+        return []
+
+    results = {}
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results[(result['question_id'], result['model'])] = result
+    return list(results.values())
+
+def save_run_results(run_id, results):
+    """Atomically replace an evaluation run's JSONL log (e.g. after re-scoring)"""
+    os.makedirs(RUNS_DIR, exist_ok=True)
+    path = get_run_path(run_id)
+    with open(path + ".tmp", 'w') as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+    os.replace(path + ".tmp", path)
+
+def save_run_manifest(run_id, manifest):
+    """Atomically write an evaluation run's manifest"""
+    os.makedirs(RUNS_DIR, exist_ok=True)
+    path = get_run_manifest_path(run_id)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def load_run_manifest(run_id):
+    """Load an evaluation run's manifest, or None if it does not exist"""
+    path = get_run_manifest_path(run_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def list_runs():
+    """Return all evaluation run manifests, most recent first"""
+    if not os.path.isdir(RUNS_DIR):
+        return []
+    manifests = []
+    for name in os.listdir(RUNS_DIR):
+        if name.endswith(".json"):
+            manifest = load_run_manifest(name[:-len(".json")])
+            if manifest:
+                manifests.append(manifest)
+    return sorted(manifests, key=lambda m: m.get('created_at', ''), reverse=True)
+
+# Per-question difficulty index: latest correctness of every model on every question,
+# accumulated across runs (the results file only holds the most recent run)
+def load_difficulty_index():
+    """
+    Load the difficulty index
+
+    Built from the current results file the first time it is needed.
+
+    Returns:
+        Dictionary of question_id -> {model: 1 if correct else 0}
+    """
+    if not os.path.exists(DIFFICULTY_INDEX_FILE):
+        return update_difficulty_index(())
+    with open(DIFFICULTY_INDEX_FILE, 'r') as f:
+        data = json.load(f)
+    return {int(q_id): models for q_id, models in data['questions'].items()}
+
+def update_difficulty_index(results):
+    """
+    Merge evaluation results into the difficulty index and save it
+
+    A missing index is first rebuilt from every result in the results file, so
+    callers that only pass their latest batch (CLI tools, jobs) never leave an
+    index covering just that batch.
+
+    Args:
+        results: Iterable of result dictionaries; API errors are ignored
+
+    Returns:
+        The updated index
+    """
+    if os.path.exists(DIFFICULTY_INDEX_FILE):
+        index = load_difficulty_index()
+    else:
+        index = {}
+        results = itertools.chain(iter_json_array(RESULTS_FILE), results)
+    for result in results:
+        if result['selected'] == "ERROR":
+            continue
+        index.setdefault(result['question_id'], {})[result['model']] = 1 if result['correct'] else 0
+
+    with open(DIFFICULTY_INDEX_FILE + ".tmp", 'w') as f:
+        json.dump({"questions": {str(q_id): models for q_id, models in index.items()}}, f)
+    os.replace(DIFFICULTY_INDEX_FILE + ".tmp", DIFFICULTY_INDEX_FILE)
+    return index
+
+# Streaming helpers for large banks
+def _scan_json_array(f, path):
+    """Scan an open JSON array file, yielding one element at a time"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def next_char():
+        # Skip whitespace, reading more data as needed; returns '' at EOF
+        nonlocal buffer, pos, eof
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos] if pos < len(buffer) else ""
+            buffer = f.read(STREAM_CHUNK_SIZE)
+            pos = 0
+            eof = not buffer
+
+    if next_char() != "[":
+        raise ValueError(f"{path} does not contain a JSON array")
+    pos += 1
+
+    if next_char() == "]":
+        return
+
+    while True:
+        next_char()
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(STREAM_CHUNK_SIZE)
+                eof = not more
+                buffer = buffer[pos:] + more
+                pos = 0
+        yield element
+        pos = end
+
+        separator = next_char()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Malformed JSON array in {path}")
+        pos += 1
+
+def iter_json_array(path):
+    """
+    Stream the elements of a JSON array file one at a time
+
+    Only a small read buffer is held in memory, so banks far larger than RAM can
+    be scanned.
+
+    Args:
+        path: Path to a file containing a JSON array
+
+    Returns:
+        Generator yielding each array element
+    """
+    if not os.path.exists(path):
+        return
+
+    with open(path, 'r') as f:
+        yield from _scan_json_array(f, path)
+
+def iter_questions():
+    """Stream questions from the JSON file without loading the whole bank"""
+    return iter_json_array(QUESTIONS_FILE)
+
+def _write_json_array(f, records):
+    """Write records as a JSON array formatted like json.dump(records, f, indent=2)"""
+    count = 0
+    for record in records:
+        f.write("[\n  " if count == 0 else ",\n  ")
+        f.write(json.dumps(record, indent=2).replace("\n", "\n  "))
+        count += 1
+    f.write("\n]" if count else "[]")
+    return count
+
+def append_questions(new_questions):
+    """
+    Append many questions to the JSON file in a single write
+
+    IDs are assigned in bulk after the current maximum. Existing and new questions
+    are streamed into a temporary file which then atomically replaces the bank, so
+    memory use stays bounded regardless of bank or import size.
+
+    Args:
+        new_questions: Iterable of validated question dictionaries
+
+    Returns:
+        Number of questions appended
+    """
+    next_id = max((q.get('id', 0) for q in iter_questions()), default=0) + 1
+    created_at = datetime.now().isoformat()
+    appended = 0
+
+    def numbered_questions():
+        nonlocal next_id, appended
+        for question_data in new_questions:
+            question_data['id'] = next_id
+            question_data.setdefault('created_at', created_at)
+            next_id += 1
+            appended += 1
+            yield question_data
+
+    def all_questions():
+        yield from iter_questions()
+        yield from numbered_questions()
+
+    temp_file = QUESTIONS_FILE + ".tmp"
+    try:
+        with open(temp_file, 'w') as f:
+            _write_json_array(f, all_questions())
+        os.replace(temp_file, QUESTIONS_FILE)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+    return appended
+
+def file_version(path):
+    """Return a cheap version stamp (mtime, size) for a file, or None if missing"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+# Compact in-memory records
+def _intern(value):
+    """Intern repeated short strings (topics, model names) so rows share one copy"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class _Record:
+    """
+    Base for __slots__ records that also support dict-style access
+
+    Unset slots behave like missing keys, so existing code using record['key']
+    and record.get('key', default) keeps working.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __contains__(self, key):
+        return hasattr(self, key)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+
+class Question(_Record):
+    """Compact, read-only view of a stored question"""
+    __slots__ = ("question", "options", "correct_answer", "reasoning", "topic", "generated_by", "id", "created_at")
+
+    def __init__(self, data):
+        for name in self.__slots__:
+            if name in data:
+                value = data[name]
+                if name in ("topic", "generated_by", "correct_answer"):
+                    value = _intern(value)
+                elif name == "options":
+                    value = tuple(value)
+                setattr(self, name, value)
+
+    def to_dict(self):
+        data = super().to_dict()
+        if "options" in data:
+            data["options"] = list(data["options"])
+        return data
+
+class QuestionBank:
+    """
+    Compact collection of questions with id lookup
+
+    Lookups use a sorted id array and binary search instead of a per-rerun dict.
+    """
+
+    def __init__(self, questions):
+        self._questions = [Question(q) for q in questions]
+        order = sorted(range(len(self._questions)), key=lambda i: self._questions[i].get('id', 0))
+        self._sorted_ids = array('q', (self._questions[i].get('id', 0) for i in order))
+        self._positions = array('l', order)
+
+    def __len__(self):
+        return len(self._questions)
+
+    def __iter__(self):
+        return iter(self._questions)
+
+    def __getitem__(self, index):
+        return self._questions[index]
+
+    def get(self, question_id, default=None):
+        """Return the question with the given id"""
+        i = bisect_left(self._sorted_ids, question_id)
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == question_id:
+            return self._questions[self._positions[i]]
+        return default
+
+    def since(self, question_id):
+        """Return the questions with an id greater than question_id, in id order"""
+        start = bisect_right(self._sorted_ids, question_id)
+        return [self._questions[self._positions[i]] for i in range(start, len(self._sorted_ids))]
+
+def load_question_bank():
+    """Load questions into a compact QuestionBank"""
+    return QuestionBank(iter_questions())
+
+class Result(_Record):
+    """Single evaluation result row materialized from a ResultTable"""
+    __slots__ = ("question_id", "model", "selected", "correct", "timestamp", "extra")
+
+    def __getitem__(self, key):
+        if key in Result.__slots__:
+            return super().__getitem__(key)
+        return self.extra[key]
+
+    def get(self, key, default=None):
+        if key in Result.__slots__:
+            return super().get(key, default)
+        return self.extra.get(key, default)
+
+    def __contains__(self, key):
+        return key in self.extra if key not in Result.__slots__ else hasattr(self, key)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in Result.__slots__[:-1]}
+        data.update(self.extra)
+        return data
+
+class ResultTable:
+    """
+    Array-backed table of evaluation results
+
+    Models and selected answers are stored as small integer codes into interned
+    label lists, correctness as one byte per row and timestamps as floats. Fields
+    outside the core schema (errors, etc.) are kept in a sparse per-row dict.
+    """
+
+    CORE_FIELDS = ("question_id", "model", "selected", "correct", "timestamp")
+
+    def __init__(self, records=()):
+        self.models = []
+        self.labels = []
+        self._model_codes = {}
+        self._label_codes = {}
+        self.question_ids = array('q')
+        self.model_codes = array('H')
+        self.selected_codes = array('B')
+        self.correct = bytearray()
+        self.timestamps = array('d')
+        self.extras = {}
+        for record in records:
+            self.append(record)
+
+    @staticmethod
+    def _code(value, values, codes):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(_intern(value))
+        return code
+
+    def append(self, record):
+        """Append a result dictionary"""
+        row = len(self.question_ids)
+        self.question_ids.append(record['question_id'])
+        self.model_codes.append(self._code(record['model'], self.models, self._model_codes))
+        self.selected_codes.append(self._code(record['selected'], self.labels, self._label_codes))
+        self.correct.append(1 if record['correct'] else 0)
+        timestamp = record.get('timestamp')
+        self.timestamps.append(datetime.fromisoformat(timestamp).timestamp() if timestamp else 0.0)
+        extra = {k: v for k, v in record.items() if k not in self.CORE_FIELDS}
+        if extra:
+            self.extras[row] = extra
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def row(self, i):
+        """Materialize row i as a Result"""
+        result = Result()
+        result.question_id = self.question_ids[i]
+        result.model = self.models[self.model_codes[i]]
+        result.selected = self.labels[self.selected_codes[i]]
+        result.correct = bool(self.correct[i])
+        ts = self.timestamps[i]
+        result.timestamp = datetime.fromtimestamp(ts).isoformat() if ts else None
+        result.extra = self.extras.get(i, {})
+        return result
+
+    def __iter__(self):
+        return (self.row(i) for i in range(len(self)))
+
+    def to_records(self):
+        """Return the results as a list of plain dictionaries"""
+        return [r.to_dict() for r in self]
+
+def load_result_table():
+    """Load evaluation results into a compact ResultTable"""
+    return ResultTable(iter_json_array(RESULTS_FILE))
+
+# Question x model answer matrix, memory-mapped from RESULTS_MATRIX_FILE
+_MATRIX_HEADER = struct.Struct("<qqqqq")  # source mtime_ns, source size, questions, models, metadata bytes
+
+class ResultMatrix:
+    """
+    Question x model view of the evaluation results
+
+    Rows follow the sorted question_ids, columns follow models. Answers are
+    uint8 codes into labels (MISSING where a model has no result for a question)
+    and correctness is a packed bitmap. When loaded from disk both arrays are
+    read-only memory maps, so analytics share one copy across sessions.
+    """
+
+    MISSING = 255
+
+    def __init__(self, question_ids, models, labels, answers, correct_bits):
+        self.question_ids = question_ids
+        self.models = list(models)
+        self.labels = list(labels)
+        self.answers = answers
+        self.correct_bits = correct_bits
+        self._correct = None
+
+    @property
+    def shape(self):
+        return self.answers.shape
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    @property
+    def correct(self):
+        """Boolean (questions, models) correctness matrix, unpacked once from the bitmap"""
+        if self._correct is None:
+            cells = self.answers.size
+            self._correct = np.unpackbits(self.correct_bits, count=cells).astype(bool).reshape(self.shape)
+        return self._correct
+
+    @property
+    def attempted(self):
+        """Boolean matrix of cells with a result, API errors included"""
+        return self.answers != self.MISSING
+
+    @property
+    def answered(self):
+        """Boolean matrix of cells with a real answer (API errors excluded)"""
+        answered = self.attempted
+        if "ERROR" in self.labels:
+            answered &= self.answers != self.labels.index("ERROR")
+        return answered
+
+    def row(self, question_id):
+        """Return the row index of a question, or None"""
+        i = int(np.searchsorted(self.question_ids, question_id))
+        if i < len(self.question_ids) and self.question_ids[i] == question_id:
+            return i
+        return None
+
+    def responses(self, row):
+        """Return [(model, selected, correct)] for the attempted cells of a row"""
+        answers = self.answers[row]
+        correct = self.correct[row]
+        return [
+            (model, self.labels[answers[col]], bool(correct[col]))
+            for col, model in enumerate(self.models)
+            if answers[col] != self.MISSING
+        ]
+
+    def model_counts(self, include_errors=True):
+        """Return model -> (correct, total)"""
+        mask = self.attempted if include_errors else self.answered
+        correct = (self.correct & mask).sum(axis=0)
+        totals = mask.sum(axis=0)
+        return {model: (int(correct[col]), int(totals[col])) for col, model in enumerate(self.models)}
+
+    def question_accuracy(self):
+        """Fraction of attempting models that answered each question correctly"""
+        attempted = self.attempted.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.nan_to_num(self.correct.sum(axis=1) / attempted)
+
+    def answer_counts(self):
+        """(questions, labels) matrix counting how many models chose each answer"""
+        return np.stack([(self.answers == code).sum(axis=1) for code in range(len(self.labels))], axis=1) \
+            if self.labels else np.zeros((len(self), 0), dtype=np.int64)
+
+def build_result_matrix(results=None, version=None):
+    """
+    Build the result matrix and write it to RESULTS_MATRIX_FILE
+
+    When a (question, model) pair has several results the last one wins. The
+    file is stamped with the results file version the matrix was built from,
+    so results appended during the build make it stale rather than current.
+
+    Args:
+        results: Optional ResultTable; loaded from RESULTS_FILE if omitted
+        version: file_version of RESULTS_FILE when the results were read; read
+            before loading them if omitted. Given results without a version are
+            stamped as never current.
+
+    Returns:
+        ResultMatrix
+    """
+    if results is None:
+        version = version or file_version(RESULTS_FILE)
+        results = load_result_table()
+    version = version or (0, 0)
+    if len(results.labels) >= ResultMatrix.MISSING:
+        raise ValueError(f"Too many distinct answers ({len(results.labels)}) for a uint8 answer matrix")
+
+    row_ids = np.frombuffer(results.question_ids, dtype=np.int64)
+    model_codes = np.frombuffer(results.model_codes, dtype=np.uint16).astype(np.int64)
+    question_ids, rows = np.unique(row_ids, return_inverse=True)
+    n_models = len(results.models)
+
+    # Keep the last result of each cell
+    cells = rows.ravel() * n_models + model_codes
+    _, last = np.unique(cells[::-1], return_index=True)
+    keep = len(cells) - 1 - last
+
+    answers = np.full(len(question_ids) * n_models, ResultMatrix.MISSING, dtype=np.uint8)
+    correct = np.zeros(len(question_ids) * n_models, dtype=np.uint8)
+    answers[cells[keep]] = np.frombuffer(results.selected_codes, dtype=np.uint8)[keep]
+    correct[cells[keep]] = np.frombuffer(bytes(results.correct), dtype=np.uint8)[keep]
+    correct_bits = np.packbits(correct)
+
+    metadata = json.dumps({"models": results.models, "labels": results.labels}).encode('utf-8')
+    metadata += b" " * (-len(metadata) % 8)  # keep the arrays 8-byte aligned
+    temp_path = RESULTS_MATRIX_FILE + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_MATRIX_HEADER.pack(version[0], version[1], len(question_ids), n_models, len(metadata)))
+        f.write(metadata)
+        for column in (question_ids.astype(np.int64), answers, correct_bits):
+            f.write(column.tobytes())
+    os.replace(temp_path, RESULTS_MATRIX_FILE)
+
+    return ResultMatrix(question_ids, results.models, results.labels,
+                        answers.reshape(len(question_ids), n_models), correct_bits)
+
+def load_result_matrix():
+    """
+    Memory-map the result matrix, rebuilding it if the results file has changed
+
+    Returns:
+        ResultMatrix
+    """
+    version = file_version(RESULTS_FILE) or (0, 0)
+    if os.path.exists(RESULTS_MATRIX_FILE):
+        with open(RESULTS_MATRIX_FILE, 'rb') as f:
+            header = f.read(_MATRIX_HEADER.size)
+            if len(header) == _MATRIX_HEADER.size:
+                mtime_ns, size, n_questions, n_models, metadata_length = _MATRIX_HEADER.unpack(header)
+                if (mtime_ns, size) == tuple(version):
+                    metadata = json.loads(f.read(metadata_length).decode('utf-8'))
+                    if n_questions * n_models == 0:
+                        return ResultMatrix(np.zeros(n_questions, dtype=np.int64), metadata['models'], metadata['labels'],
+                                            np.zeros((n_questions, n_models), dtype=np.uint8), np.zeros(0, dtype=np.uint8))
+                    offset = _MATRIX_HEADER.size + metadata_length
+                    question_ids = np.memmap(RESULTS_MATRIX_FILE, dtype=np.int64, mode='r', offset=offset, shape=(n_questions,))
+                    offset += n_questions * 8
+                    answers = np.memmap(RESULTS_MATRIX_FILE, dtype=np.uint8, mode='r', offset=offset, shape=(n_questions, n_models))
+                    offset += n_questions * n_models
+                    correct_bits = np.memmap(RESULTS_MATRIX_FILE, dtype=np.uint8, mode='r', offset=offset,
+                                             shape=((n_questions * n_models + 7) // 8,))
+                    return ResultMatrix(question_ids, metadata['models'], metadata['labels'], answers, correct_bits)
+    return build_result_matrix(version=version)
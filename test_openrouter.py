@@ -3,12 +3,28 @@ Test script to verify OpenRouter API connection
 """
 
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+DEFAULT_HEADERS = {
+    "HTTP-Referer": "http://localhost:8501",
+    "X-Title": "Hallucinator - Legal Benchmark Generator",
+}
+
+# One pooled HTTP client shared by every test, as in the app
+_http_client = None
+
+def get_client(api_key):
+    """OpenRouter client on the shared pooled HTTP client"""
+    import transport  # only needed once a key is configured
+
+    global _http_client
+    if _http_client is None:
+        _http_client, _ = transport.build_http_client()
+    return transport.create_client(transport.OPENROUTER_BASE_URL, api_key, DEFAULT_HEADERS, _http_client)
+
 def test_openrouter_connection():
     """Test basic OpenRouter API connection"""
 
@@ -34,14 +50,7 @@ def test_openrouter_connection():
     # Initialize OpenRouter client
     print("Initializing OpenRouter client...")
     try:
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key,
-            default_headers={
-                "HTTP-Referer": "http://localhost:8501",
-                "X-Title": "Hallucinator - Legal Benchmark Generator",
-            }
-        )
+        client = get_client(api_key)
         print("✓ Client initialized successfully")
         print()
     except Exception as e:
@@ -104,14 +113,7 @@ def test_multiple_models():
         print("❌ API key not found")
         return
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-        default_headers={
-            "HTTP-Referer": "http://localhost:8501",
-            "X-Title": "Hallucinator - Legal Benchmark Generator",
-        }
-    )
+    client = get_client(api_key)
 
     # Test models from your app
     test_models = [
@@ -0,0 +1,75 @@
+"""
+Test provider failover in routing.ModelRouter against local stand-in servers
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+
+import routing
+
+MODEL_ID = "test/model"
+
+
+def start_server(status):
+    """Serve chat completions on localhost, answering every request with the given status"""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            requests.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            if status == 200:
+                body = {
+                    "id": "stand-in", "object": "chat.completion", "created": 0, "model": requests[-1]['model'],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Answer: B"}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12}
+                }
+            else:
+                body = {"error": {"message": "stand-in failure", "type": "server_error"}}
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1", requests
+
+def test_failover_to_next_provider():
+    """A provider returning 500 is skipped: the call succeeds on the next one and the failing one cools down"""
+    failing, failing_url, failing_requests = start_server(500)
+    healthy, healthy_url, healthy_requests = start_server(200)
+    try:
+        router = routing.ModelRouter(
+            {"failing": {"base_url": failing_url}, "healthy": {"base_url": healthy_url}},
+            {MODEL_ID: ["failing", "healthy"]}
+        )
+        response = router.chat.completions.create(model=MODEL_ID, messages=[{"role": "user", "content": "Q"}])
+
+        assert response.choices[0].message.content == "Answer: B"
+        # The earlier endpoint fails over at once instead of retrying
+        assert len(failing_requests) == 1
+        assert len(healthy_requests) == 1
+
+        status = {provider['provider']: provider for provider in router.status()}
+        assert not status['failing']['healthy']
+        assert status['failing']['errors'] == 1
+        assert status['healthy']['healthy']
+
+        # While the failing provider cools down, the healthy one is tried first
+        assert router.candidates(MODEL_ID)[0][0] == "healthy"
+        router.chat.completions.create(model=MODEL_ID, messages=[{"role": "user", "content": "Q"}])
+        assert len(failing_requests) == 1
+        assert len(healthy_requests) == 2
+    finally:
+        failing.shutdown()
+        healthy.shutdown()
@@ -0,0 +1,177 @@
+"""
+HTTP transport for Hallucinator
+Shared, pooled httpx client for OpenRouter with HTTP/2, keep-alive, per-call-type
+timeouts and connection-pool metrics
+"""
+
+import importlib.metadata
+import importlib.util
+import os
+import threading
+import time
+
+import httpx
+from openai import OpenAI
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Connection pool sizing: enough keep-alive connections for every evaluation
+# worker (jobs.EVAL_CONCURRENCY) plus streaming generation and extraction calls
+POOL_MAX_CONNECTIONS = 32
+POOL_MAX_KEEPALIVE = 16
+KEEPALIVE_EXPIRY = 90.0
+
+# HTTP/2 multiplexes concurrent requests over one connection; needs the h2
+# package (httpx[http2]) and can be turned off with HALLUCINATOR_HTTP2=0
+HTTP2_ENABLED = os.getenv("HALLUCINATOR_HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+
+# Timeouts per call type. Evaluation answers are a few tokens, so a stalled call
+# should fail fast and be retried; streamed generation can pause between chunks.
+CALL_TIMEOUTS = {
+    "eval": httpx.Timeout(60.0, connect=5.0),
+    "generation": httpx.Timeout(connect=5.0, read=120.0, write=30.0, pool=30.0),
+    "extraction": httpx.Timeout(180.0, connect=5.0),
+}
+DEFAULT_CALL_TYPE = "eval"
+
+# Internal header used to tag a request's call type for metrics; stripped before sending
+CALL_TYPE_HEADER = "X-Hallucinator-Call-Type"
+
+# Connection-level retries for failed connects (the OpenAI SDK retries API errors itself)
+CONNECT_RETRIES = 2
+
+
+def _version(package):
+    """(major, minor) of an installed package, or None if missing or unparseable"""
+    try:
+        return tuple(int(part) for part in importlib.metadata.version(package).split(".")[:2])
+    except (importlib.metadata.PackageNotFoundError, ValueError):
+        return None
+
+# Pool connection counts read httpx's private HTTPTransport._pool (an httpcore
+# ConnectionPool); only do so on the versions known to have it
+_HTTPX_VERSION, _HTTPCORE_VERSION = _version("httpx"), _version("httpcore")
+POOL_METRICS_SUPPORTED = (
+    _HTTPX_VERSION is not None and (0, 18) <= _HTTPX_VERSION < (1, 0)
+    and _HTTPCORE_VERSION is not None and (0, 14) <= _HTTPCORE_VERSION < (2, 0)
+)
+
+
+class MeteredTransport(httpx.BaseTransport):
+    """
+    Pooled transport that records request and connection-pool metrics
+
+    Wraps httpx.HTTPTransport; thread-safe, so one instance serves every
+    evaluation worker.
+    """
+
+    def __init__(self, **transport_kwargs):
+        self._transport = httpx.HTTPTransport(**transport_kwargs)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._calls = {}  # call type -> [requests, errors, total seconds]
+
+    def handle_request(self, request):
+        call_type = request.headers.pop(CALL_TYPE_HEADER, DEFAULT_CALL_TYPE)
+        with self._lock:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        start = time.monotonic()
+        failed = True
+        try:
+            response = self._transport.handle_request(request)
+            failed = response.status_code == 429 or response.status_code >= 500
+            return response
+        finally:
+            # Time to response headers; streamed bodies are read after this returns
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self._in_flight -= 1
+                stats = self._calls.setdefault(call_type, [0, 0, 0.0])
+                stats[0] += 1
+                stats[1] += failed
+                stats[2] += elapsed
+
+    def close(self):
+        self._transport.close()
+
+    def metrics(self):
+        """
+        Return a snapshot of transport metrics
+
+        Returns:
+            Dictionary with in-flight and peak concurrent requests, open/idle/HTTP/2
+            pooled connections (None where POOL_METRICS_SUPPORTED is False), and
+            per call type request counts, errors and mean time to response headers
+        """
+        connections = list(self._transport._pool.connections) if POOL_METRICS_SUPPORTED else None
+        with self._lock:
+            calls = {
+                call_type: {
+                    "requests": requests,
+                    "errors": errors,
+                    "mean_latency": total / requests if requests else 0.0
+                }
+                for call_type, (requests, errors, total) in self._calls.items()
+            }
+            in_flight, peak = self._in_flight, self._peak_in_flight
+        return {
+            "in_flight": in_flight,
+            "peak_in_flight": peak,
+            "open_connections": None if connections is None else sum(1 for c in connections if not c.is_closed()),
+            "idle_connections": None if connections is None else sum(1 for c in connections if c.is_idle()),
+            "http2_connections": None if connections is None else sum(1 for c in connections if "HTTP/2" in c.info()),
+            "http2_enabled": HTTP2_ENABLED,
+            "calls": calls,
+        }
+
+def build_http_client():
+    """
+    Build the pooled httpx client shared by all OpenRouter calls
+
+    Returns:
+        Tuple of (httpx.Client, MeteredTransport)
+    """
+    limits = httpx.Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+    transport = MeteredTransport(http2=HTTP2_ENABLED, limits=limits, retries=CONNECT_RETRIES)
+    client = httpx.Client(transport=transport, timeout=CALL_TIMEOUTS[DEFAULT_CALL_TYPE])
+    print(f"[DEBUG] HTTP client: pool {POOL_MAX_CONNECTIONS}/{POOL_MAX_KEEPALIVE} keep-alive, HTTP/2 {'on' if HTTP2_ENABLED else 'off'}")
+    return client, transport
+
+def create_client(base_url, api_key, default_headers=None, http_client=None):
+    """
+    Create an OpenAI SDK client for any OpenAI-compatible endpoint
+
+    Args:
+        base_url: API base URL (e.g. OPENROUTER_BASE_URL or a local vLLM server)
+        api_key: API key
+        default_headers: Extra headers sent with every request
+        http_client: Pooled httpx client to share (from build_http_client)
+
+    Returns:
+        OpenAI client
+    """
+    return OpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        default_headers=default_headers,
+        http_client=http_client,
+        timeout=CALL_TIMEOUTS[DEFAULT_CALL_TYPE]
+    )
+
+def call_options(call_type):
+    """
+    Per-request options for a call type, to pass as **kwargs to client.chat.completions.create
+
+    Args:
+        call_type: Key of CALL_TIMEOUTS ("eval", "generation", "extraction")
+
+    Returns:
+        Dictionary with the timeout and the call-type tag used for metrics
+    """
+    return {"timeout": CALL_TIMEOUTS[call_type], "extra_headers": {CALL_TYPE_HEADER: call_type}}
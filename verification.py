@@ -0,0 +1,261 @@
+"""
+Answer-key verification for Hallucinator
+Asks several models to answer every question blind and flags questions whose
+consensus disagrees with the stored correct_answer. Verdicts are cached per
+question content hash, so only new or edited questions are re-checked.
+
+Usage:
+    python verification.py                       # verify new/edited questions
+    python verification.py --models openai/gpt-5,google/gemini-2.5-pro
+    python verification.py --review              # list disagreements only
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import answer_extraction
+import costs
+import prompts
+import storage
+import transport
+
+VERDICTS_FILE = "answer_key_verdicts.json"
+
+# Strong models from different families, so one family's blind spot cannot form a consensus
+DEFAULT_VERIFIER_MODELS = ("anthropic/claude-sonnet-4.5", "openai/gpt-5", "google/gemini-2.5-pro")
+
+# Concurrent verification calls
+VERIFICATION_CONCURRENCY = 8
+
+# Verdicts are saved every CHECKPOINT_INTERVAL seconds while a job runs
+CHECKPOINT_INTERVAL = 5.0
+
+
+def question_hash(question):
+    """Hash of the parts of a question a verdict depends on (text, options, key)"""
+    content = json.dumps([question.get('question', ''), question.get('options', []), question.get('correct_answer', '')])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:24]
+
+def load_verdicts():
+    """
+    Load cached verdicts
+
+    Returns:
+        Dictionary of question hash -> {"question_id", "answers": {model ID: letter}, "checked_at"}
+    """
+    if not os.path.exists(VERDICTS_FILE):
+        return {}
+    with open(VERDICTS_FILE, 'r') as f:
+        return json.load(f)
+
+def save_verdicts(verdicts):
+    """Atomically save cached verdicts"""
+    with open(VERDICTS_FILE + ".tmp", 'w') as f:
+        json.dump(verdicts, f)
+    os.replace(VERDICTS_FILE + ".tmp", VERDICTS_FILE)
+
+def pending_checks(questions, models, verdicts):
+    """
+    (question, model ID) pairs with no usable cached verdict for the question's current content
+
+    A cached "?" (a reply no letter could be extracted from, cached by older
+    versions) counts as pending, like a missing answer.
+
+    Args:
+        questions: Iterable of question dictionaries
+        models: Verifier model IDs
+        verdicts: Cached verdicts (see load_verdicts)
+
+    Returns:
+        List of (question, model ID)
+    """
+    pending = []
+    for question in questions:
+        answers = verdicts.get(question_hash(question), {}).get('answers', {})
+        pending.extend((question, model_id) for model_id in models if answers.get(model_id, "?") == "?")
+    return pending
+
+def ask_model(client, question, model_id):
+    """
+    Have one model answer a question blind
+
+    Returns:
+        Tuple of (letter, "?" if no answer could be extracted; token/cost fields)
+    """
+    response = client.chat.completions.create(
+        model=model_id,
+        messages=[{"role": "user", "content": prompts.get_evaluation_prompt(question['question'], question['options'])}],
+        temperature=0,
+        **transport.call_options("eval")
+    )
+    extraction = answer_extraction.extract_answer(response.choices[0].message.content or "", model_id)
+    return extraction.letter, costs.usage_fields(model_id, getattr(response, 'usage', None))
+
+class VerificationJob:
+    """
+    Background verification run
+
+    Runs the pending checks on its own thread pool and merges each answer into
+    the verdict cache, saving it periodically. API errors and replies without
+    an extractable letter are not cached, so those checks are retried by the
+    next run.
+
+    Args:
+        client: OpenAI-compatible client (e.g. routing.ModelRouter)
+        questions: Questions to verify
+        models: Verifier model IDs
+        max_workers: Concurrent calls
+    """
+
+    def __init__(self, client, questions, models, max_workers=VERIFICATION_CONCURRENCY):
+        self.id = uuid.uuid4().hex[:12]
+        self.client = client
+        self.models = list(models)
+        self.verdicts = load_verdicts()
+        self.checks = pending_checks(questions, self.models, self.verdicts)
+        self.total = len(self.checks)
+        self.completed = 0
+        self.errors = 0
+        self.unparsed = 0
+        self.cost = 0.0
+        self.status = "queued"  # "queued" | "running" | "complete" | "cancelled" | "failed"
+        self.error = None
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @property
+    def is_active(self):
+        return self.status in ("queued", "running")
+
+    def cancel(self):
+        """Stop starting new checks; answers already received are kept"""
+        self._cancelled.set()
+
+    def start(self):
+        """Run the job on a background thread"""
+        threading.Thread(target=self.run, name=f"verify-{self.id}", daemon=True).start()
+        return self
+
+    def _check(self, question, model_id):
+        if self._cancelled.is_set():
+            return question, model_id, None, {}
+        try:
+            letter, usage = ask_model(self.client, question, model_id)
+            return question, model_id, letter, usage
+        except Exception as e:
+            print(f"[DEBUG] Verification of Q{question.get('id')} with {model_id} failed: {str(e)}")
+            return question, model_id, None, {}
+
+    def run(self):
+        self.status = "running"
+        print(f"[DEBUG] Verification {self.id}: {self.total} checks with {len(self.models)} models")
+        last_save = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="verify-worker") as executor:
+                futures = [executor.submit(self._check, question, model_id) for question, model_id in self.checks]
+                for future in as_completed(futures):
+                    question, model_id, letter, usage = future.result()
+                    with self._lock:
+                        if letter is None:
+                            self.errors += not self._cancelled.is_set()
+                        elif letter == "?":
+                            self.unparsed += 1
+                        else:
+                            entry = self.verdicts.setdefault(question_hash(question), {"question_id": question.get('id'), "answers": {}})
+                            entry['answers'][model_id] = letter
+                            entry['checked_at'] = datetime.now().isoformat()
+                            self.completed += 1
+                        self.cost += usage.get('cost') or 0
+                    if time.monotonic() - last_save >= CHECKPOINT_INTERVAL:
+                        with self._lock:
+                            save_verdicts(self.verdicts)
+                        last_save = time.monotonic()
+            self.status = "cancelled" if self._cancelled.is_set() else "complete"
+        except Exception as e:
+            self.error = str(e)
+            self.status = "failed"
+            print(f"[DEBUG] Verification {self.id} failed: {str(e)}")
+        finally:
+            with self._lock:
+                save_verdicts(self.verdicts)
+            print(f"[DEBUG] Verification {self.id} {self.status}: {self.completed}/{self.total} checks, "
+                  f"{self.errors} errors, {self.unparsed} unparsed")
+
+def review_list(questions, verdicts, models=None, min_answers=2):
+    """
+    Questions whose verifier answers disagree with the key, most disputed first
+
+    Args:
+        questions: Iterable of question dictionaries
+        verdicts: Cached verdicts (see load_verdicts)
+        models: Optional verifier model IDs to count (default: all cached)
+        min_answers: Minimum verifier answers for a question to be listed
+
+    Returns:
+        List of dictionaries (question_id, correct_answer, consensus, answers,
+        disagreement = share of verifiers not choosing the key, flagged = a strict
+        majority agrees on an answer other than the key), sorted by disagreement
+    """
+    rows = []
+    for question in questions:
+        entry = verdicts.get(question_hash(question))
+        if not entry:
+            continue
+        answers = {m: letter for m, letter in entry['answers'].items() if models is None or m in models}
+        letters = [letter for letter in answers.values() if letter != "?"]
+        if len(letters) < min_answers:
+            continue
+        key = question['correct_answer']
+        disagreement = 1 - letters.count(key) / len(letters)
+        if disagreement == 0:
+            continue
+        consensus, consensus_count = Counter(letters).most_common(1)[0]
+        rows.append({
+            "question_id": question.get('id'),
+            "correct_answer": key,
+            "consensus": consensus,
+            "answers": answers,
+            "disagreement": disagreement,
+            "flagged": consensus != key and consensus_count * 2 > len(letters)
+        })
+    rows.sort(key=lambda row: (-row['disagreement'], -len(row['answers']), row['question_id'] or 0))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify answer keys against a panel of models")
+    parser.add_argument("--models", help="Comma-separated verifier model IDs")
+    parser.add_argument("--review", action="store_true", help="Only print the review list from cached verdicts")
+    args = parser.parse_args()
+
+    models = args.models.split(",") if args.models else list(DEFAULT_VERIFIER_MODELS)
+
+    if not args.review:
+        from dotenv import load_dotenv
+        import routing
+        load_dotenv()
+        job = VerificationJob(routing.create_router(), storage.iter_questions(), models)
+        print(f"{job.total} check(s) pending ({len(models)} models)")
+        job.run()
+        print(f"✓ {job.completed} answer(s) cached, {job.errors} error(s), {job.unparsed} unparsed, ${job.cost:.4f}")
+
+    rows = review_list(storage.iter_questions(), load_verdicts(), models)
+    flagged = sum(row['flagged'] for row in rows)
+    print(f"\n{len(rows)} question(s) with disagreement, {flagged} flagged (majority disagrees with the key)")
+    for row in rows:
+        answers = " ".join(f"{m.split('/')[-1]}={letter}" for m, letter in row['answers'].items())
+        print(f"{'⚠' if row['flagged'] else ' '} Q{row['question_id']}: key {row['correct_answer']}, "
+              f"consensus {row['consensus']}, {row['disagreement']:.0%} disagree ({answers})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())